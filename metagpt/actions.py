@@ -1,21 +1,33 @@
 from utils import get_template, json_to_markdown
 from metagpt.actions import Action, ActionOutput
 from temp import template0, templates, templates1, templates2, templates3, templates4, templates5
-from PIL import Image, ImageDraw, ImageFont
 from metagpt.roles import Role
 import shutil
 from pathlib import Path
 from main_action import Action, ActionOutput
 from metagpt.config import CONFIG
-from metagpt.const import WORKSPACE_ROOT
 from metagpt.logs import logger
+from metagpt.utils.artifact_writer import get_artifact_writer
 from metagpt.utils.common import CodeParser
 from metagpt.utils.get_template import get_template
+from metagpt.utils.empathy_map_renderer import get_empathy_map_renderer, parse_empathy_map
 from metagpt.utils.json_to_markdown import json_to_markdown
+from metagpt.utils.text import fit_message
+from metagpt.utils.workspace import get_workspace
 from metagpt.llm import ai_func
 from pydantic import BaseModel
 import textwrap
 
+
+def fit_transcript(transcript: str, prompt_template: str, format_example: str) -> str:
+    """Cut the middle out of a transcript too long to fit next to the rest of the prompt and the answer"""
+    rest = prompt_template.format(context="", format_example=format_example)
+    fitted, tokens = fit_message(transcript, CONFIG.openai_api_model, rest, CONFIG.max_tokens_rsp)
+    if fitted != transcript:
+        logger.warning(f"Interview transcript truncated to {tokens} tokens to fit the context window")
+    return fitted
+
+
 class CreateEmpathyMap(Action):
     def __init__(self, name="", context=None, llm=None):
         super().__init__(name, context, llm)
@@ -33,82 +45,18 @@ class CreateEmpathyMap(Action):
         logger.info(f"Saving Summarized Insights to {empathy_map_file}")
 
         if isinstance(empathy_map, str):
-            empathy_map_file.write_text(empathy_map)
+            empathy_map_text = empathy_map
         else:
-            empathy_map_file.write_text(json_to_markdown(empathy_map.dict()))
-        empathy_map_image_path = docs_path / "empathy_map.png"
-        self.create_empathy_map_image(empathy_map_file, empathy_map_image_path)
-
-    def create_empathy_map_image(self, md_filepath, output_path):
-        empathy_map_data = self.parse_markdown(md_filepath)
-        self.generate_empathy_map_image(empathy_map_data, output_path)
-
-    def parse_markdown(self, md_filepath):
-        with open(md_filepath, 'r') as file:
-            content = file.readlines()
-
-        empathy_map = {}
-        current_section = None
-        for line in content:
-            if line.startswith('Thoughts:') or line.startswith('Feelings:') or line.startswith('Pain Points:') or line.startswith('Goals:'):
-                current_section = line.strip().split(':')[0]
-                empathy_map[current_section] = ''
-            elif current_section and line.startswith('- '):
-                empathy_map[current_section] += line[2:].strip() + '\n'
-
-        return empathy_map
-
-    def generate_empathy_map_image(self, empathy_map, output_path):
-        # Define image size and background color
-        img = Image.new('RGB', (1024, 768), color='white')
-        d = ImageDraw.Draw(img)
-
-        # Define font
-        try:
-            font = ImageFont.truetype("arial.ttf", size=14)
-        except IOError:
-            font = ImageFont.load_default()
-
-        # Define positions for the section titles
-        title_positions = {
-            "Thoughts": (10, 10),
-            "Feelings": (10, 384),
-            "Pain Points": (512, 10),
-            "Goals": (512, 384)
-        }
-
-        # Define starting positions for the section contents just below the titles
-        content_positions = {
-            "Thoughts": (10, 50),
-            "Feelings": (10, 420),
-            "Pain Points": (512, 50),
-            "Goals": (512, 420)
-        }
-
-        # Fixed increment for line spacing, may require adjustment
-        line_height = 20
-
-        # Function to draw wrapped text
-        def draw_wrapped_text(draw, text, position, font, line_height):
-            x, y = position
-            for line in text.split('\n'):
-                draw.text((x, y), line, font=font, fill="black")
-                y += line_height
-
-        # Draw the section titles and contents
-        for section, position in title_positions.items():
-            # Draw the title
-            d.text(position, section, font=font, fill="black")
-            # Draw the content with fixed line height increments
-            draw_wrapped_text(d, empathy_map[section], content_positions[section], font, line_height)
-
-        # Save the image
-        img.save(output_path)
+            empathy_map_text = json_to_markdown(empathy_map.dict())
+        get_artifact_writer().write_text(empathy_map_file, empathy_map_text)
+        # drawn from memory off the event loop, the markdown is not read back
+        get_empathy_map_renderer().render(parse_empathy_map(empathy_map_text), docs_path / "empathy_map.png")
 
     async def run(self, interview_output, *args, **kwargs) -> ActionOutput:
         # Logic for creating the empathy map
         prompt_template, format_example = get_template(template0, CONFIG.prompt_format)
-        prompt = prompt_template.format(context=interview_output, format_example=format_example)
+        context = fit_transcript(interview_output, prompt_template, format_example)
+        prompt = prompt_template.format(context=context, format_example=format_example)
 
         logger.info(f"Creating an empathy map")
         empathy_map = await ai_func(prompt)
@@ -117,9 +65,8 @@ class CreateEmpathyMap(Action):
             ws_name = empathy_map.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=empathy_map)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_empathy_map(docs_path, empathy_map)
 
         class InstructContent(BaseModel):
@@ -154,9 +101,9 @@ class UserInterview(Action):
         interview_transcript_file = docs_path / "interview_transcript.md"
         logger.info(f"Saving Interview Transcript to {interview_transcript_file}")
         if isinstance(interview_transcript, str):
-            interview_transcript_file.write_text(interview_transcript)
+            get_artifact_writer().write_text(interview_transcript_file, interview_transcript)
         else:
-            interview_transcript_file.write_text(json_to_markdown(interview_transcript.dict()))
+            get_artifact_writer().write_text(interview_transcript_file, json_to_markdown(interview_transcript.dict()))
 
     async def run(self, service_design_problem, *args, **kwargs) -> ActionOutput:
         selected_participants = self.select_participants()
@@ -172,9 +119,8 @@ class UserInterview(Action):
             ws_name = formatted_transcript.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=formatted_transcript)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_interview_transcript(docs_path, interview_transcript)
 
         class InstructContent(BaseModel):
@@ -199,13 +145,14 @@ class SummarizeInsights(Action):
         logger.info(f"Saving Summarized Insights to {summarized_insights_file}")
 
         if isinstance(summarized_insights, str):
-            summarized_insights_file.write_text(summarized_insights)
+            get_artifact_writer().write_text(summarized_insights_file, summarized_insights)
         else:
-            summarized_insights_file.write_text(json_to_markdown(summarized_insights.dict()))
+            get_artifact_writer().write_text(summarized_insights_file, json_to_markdown(summarized_insights.dict()))
 
     async def run(self, interview_content, *args, **kwargs) -> ActionOutput:
         prompt_template, format_example = get_template(templates1, CONFIG.prompt_format)
-        prompt = prompt_template.format(context=interview_content, format_example=format_example)
+        context = fit_transcript(interview_content, prompt_template, format_example)
+        prompt = prompt_template.format(context=context, format_example=format_example)
 
         logger.info(f"Summarizing insights from interview content")
         summarized_insights = await ai_func(prompt)
@@ -214,9 +161,8 @@ class SummarizeInsights(Action):
             ws_name = summarized_insights.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=summarized_insights)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_summarized_insights(docs_path, summarized_insights)
 
         class InstructContent(BaseModel):
@@ -241,9 +187,9 @@ class DefineProblemStatements(Action):
         logger.info(f"Saving problem statements to {problem_statements_file}")
 
         if isinstance(problem_statements, str):
-            problem_statements_file.write_text(problem_statements)
+            get_artifact_writer().write_text(problem_statements_file, problem_statements)
         else:
-            problem_statements_file.write_text(json_to_markdown(problem_statements.dict()))
+            get_artifact_writer().write_text(problem_statements_file, json_to_markdown(problem_statements.dict()))
 
     async def run(self, context):
         prompt_template, format_example = get_template(templates2, CONFIG.prompt_format)
@@ -253,9 +199,8 @@ class DefineProblemStatements(Action):
             ws_name = problem_statements.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=problem_statements)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_problem_statements(docs_path, problem_statements)
 
         class InstructContent(BaseModel):
@@ -280,9 +225,9 @@ class IdeateSolutions(Action):
         logger.info(f"Saving ideation results to {ideation_results_file}")
 
         if isinstance(ideation_results, str):
-            ideation_results_file.write_text(ideation_results)
+            get_artifact_writer().write_text(ideation_results_file, ideation_results)
         else:
-            ideation_results_file.write_text(json_to_markdown(ideation_results.dict()))
+            get_artifact_writer().write_text(ideation_results_file, json_to_markdown(ideation_results.dict()))
 
     async def run(self, problem_statements, *args, **kwargs) -> ActionOutput:
         prompt_template, format_example = get_template(templates3, CONFIG.prompt_format)
@@ -294,9 +239,8 @@ class IdeateSolutions(Action):
             ws_name = ideation_results.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=ideation_results)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_ideation_results(docs_path, ideation_results)
 
         class InstructContent(BaseModel):
@@ -321,9 +265,9 @@ class PrototypeSolutions(Action):
         logger.info(f"Saving prototyping_plan to {prototyping_plan_file}")
 
         if isinstance(prototyping_plan, str):
-            prototyping_plan_file.write_text(prototyping_plan)
+            get_artifact_writer().write_text(prototyping_plan_file, prototyping_plan)
         else:
-            prototyping_plan_file.write_text(json_to_markdown(prototyping_plan.dict()))
+            get_artifact_writer().write_text(prototyping_plan_file, json_to_markdown(prototyping_plan.dict()))
 
     async def run(self, ideas, *args, **kwargs) -> ActionOutput:
         prompt_template, format_example = get_template(templates4, CONFIG.prompt_format)
@@ -336,9 +280,8 @@ class PrototypeSolutions(Action):
             ws_name = prototyping_plan.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=prototyping_plan)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_prototyping_plan(docs_path, prototyping_plan)
 
         class InstructContent(BaseModel):
@@ -380,9 +323,8 @@ class DevelopFeaturePlan(Action):
             ws_name = feature_plan_details.instruct_content.dict()["Python package name"]
         else:
             ws_name = CodeParser.parse_str(block="Python package name", text=feature_plan_details)
-        workspace = WORKSPACE_ROOT / ws_name
+        workspace = get_workspace() / ws_name
         docs_path = workspace / "docs"
-        docs_path.mkdir(parents=True, exist_ok=True)
         await self.save_feature_plan(docs_path, feature_plan_details)
 
         class InstructContent(BaseModel):
@@ -395,6 +337,6 @@ class DevelopFeaturePlan(Action):
         logger.info(f"Saving feature plan to {feature_plan_file}")
 
         if isinstance(feature_plan, str):
-            feature_plan_file.write_text(feature_plan)
+            get_artifact_writer().write_text(feature_plan_file, feature_plan)
         else:
-            feature_plan_file.write_text(json_to_markdown(feature_plan.dict()))
+            get_artifact_writer().write_text(feature_plan_file, json_to_markdown(feature_plan.dict()))
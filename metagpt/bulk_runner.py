@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 21:40
+@File    : bulk_runner.py
+@Desc    : Run the service design pipeline unattended for every problem of a JSONL file.
+"""
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import fire
+
+from main import build_pipeline
+from main_action import ActionOutput
+from roles import UserResearcher, DesignStrategist, ServiceDesigner, ProductManager
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+from metagpt.utils.batch_scheduler import BatchScheduler
+from metagpt.utils.artifact_writer import get_artifact_writer
+from metagpt.utils.checkpoint import RUNS_ROOT, CheckpointStore, new_run_id
+from metagpt.utils.dag import Stage
+from metagpt.utils.http_pool import get_http_pool
+from metagpt.utils.telemetry import get_telemetry
+from metagpt.utils.workspace import use_workspace
+
+
+def read_problems(path: str) -> list[dict]:
+    """One problem per line: a JSON string, or an object with a "problem" or "title"/"body" and an optional "id"
+    or "request_id". A problem with an id keeps its run id, so running the same file again resumes it."""
+    problems = []
+    for lineno, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if isinstance(item, str):
+            item = {"problem": item}
+        problem = item.get("problem") or "\n\n".join(filter(None, [item.get("title"), item.get("body")]))
+        if not problem:
+            raise ValueError(f"{path}:{lineno} has no problem, title or body")
+        run_id = item.get("id") or item.get("request_id")
+        run_id = re.sub(r"[^\w.-]", "_", str(run_id)) if run_id else new_run_id()
+        problems.append({"run_id": run_id, "problem": problem})
+    return problems
+
+
+async def run_problem(item: dict, policy: str, k: int) -> dict:
+    """Run one pipeline with its artifacts and checkpoints under workspace/runs/<run id>. Returns once its
+    artifacts are written"""
+    checkpoints = CheckpointStore(item["run_id"], factory=ActionOutput)
+    checkpoints.save_meta(problem=item["problem"])
+    product_manager = ProductManager(name="Fiona")
+    pipeline = build_pipeline(
+        UserResearcher(name="Alice"), DesignStrategist(name="Bob"), ServiceDesigner(name="Charlie"), product_manager,
+        checkpoints,
+    )
+    pipeline.add(
+        Stage(
+            "elaboration",
+            lambda i: product_manager.elaborate_ideas(i.content, policy, k),
+            ("ideation",),
+            fingerprint=[policy, k],
+        )
+    )
+    start = time.perf_counter()
+    writer = get_artifact_writer()
+    with writer.collect() as artifacts, use_workspace(checkpoints.path):
+        results = await pipeline.run({"problem": item["problem"]})
+    await writer.wait(artifacts)  # a run whose artifacts failed to write is recorded as failed
+    return {
+        "elapsed": round(time.perf_counter() - start, 2),
+        "restored": sorted(pipeline.restored),
+        "ideas": results["elaboration"],
+    }
+
+
+async def bulk_run(
+    path: str,
+    concurrency: int = 4,
+    policy: str = "top-k",
+    k: int = 3,
+    manifest: Optional[str] = None,
+):
+    """Run every problem of `path`, at most `concurrency` pipelines at once, and append one line per finished run
+    to `manifest`. LLM calls of all pipelines share the process-wide rate limiter (RPM/TPM)."""
+    problems = read_problems(path)
+    manifest = Path(manifest) if manifest else RUNS_ROOT / "manifest.jsonl"
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    scheduler = BatchScheduler(
+        lambda item: run_problem(item, policy, k),
+        concurrency=concurrency,
+        max_retries=0,
+    )
+    logger.info(f"running {len(problems)} service design problems from {path}")
+    if CONFIG.http_pool_warmup:
+        await get_http_pool().warm_up([CONFIG.openai_api_base])
+    failed = 0
+    try:
+        async for idx, result in scheduler.as_completed(problems, return_exceptions=True):
+            record = {"run_id": problems[idx]["run_id"], "problem": problems[idx]["problem"], "finished_at": time.time()}
+            if isinstance(result, Exception):
+                failed += 1
+                record.update(status="error", error=f"{type(result).__name__}: {result}")
+                logger.error(f"run {record['run_id']} failed: {record['error']}")
+            else:
+                record.update(status="ok", **result)
+                logger.info(f"run {record['run_id']} finished in {result['elapsed']}s")
+            with open(manifest, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    finally:
+        try:
+            await get_artifact_writer().flush()
+        finally:
+            await get_http_pool().close()
+            get_telemetry().log_summary()
+    logger.info(f"{len(problems) - failed}/{len(problems)} runs succeeded, manifest at {manifest}")
+
+
+def main(
+    path: str,
+    concurrency: int = 4,
+    policy: str = "top-k",
+    k: int = 3,
+    manifest: Optional[str] = None,
+):
+    """python metagpt/bulk_runner.py problems.jsonl --concurrency 4 --policy top-k --k 3"""
+    asyncio.run(bulk_run(path, concurrency, policy, k, manifest))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
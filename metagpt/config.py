@@ -10,7 +10,7 @@ from metagpt.const import WORKSPACE_ROOT
 import openai
 import yaml
 
-from metagpt.const import PROJECT_ROOT
+from metagpt.const import DATA_PATH, PROJECT_ROOT
 from metagpt.logs import logger
 from metagpt.tools import SearchEngineType, WebBrowserEngineType
 from metagpt.utils.singleton import Singleton
@@ -59,6 +59,8 @@ class Config(metaclass=Singleton):
         self.openai_api_type = self._get("OPENAI_API_TYPE")
         self.openai_api_version = self._get("OPENAI_API_VERSION")
         self.openai_api_rpm = self._get("RPM", 3)
+        self.openai_api_tpm = self._get("TPM", 0)
+        self.batch_concurrency = self._get("BATCH_CONCURRENCY", 8)
         self.openai_api_model = self._get("OPENAI_API_MODEL", "gpt-4")
         self.max_tokens_rsp = self._get("MAX_TOKENS", 2048)
         self.deployment_name = self._get("DEPLOYMENT_NAME")
@@ -89,6 +91,29 @@ class Config(metaclass=Singleton):
         self.puppeteer_config = self._get("PUPPETEER_CONFIG", "")
         self.mmdc = self._get("MMDC", "mmdc")
         self.calc_usage = self._get("CALC_USAGE", True)
+        self.http_pool_limit = self._get("HTTP_POOL_LIMIT", 100)
+        self.http_pool_limit_per_host = self._get("HTTP_POOL_LIMIT_PER_HOST", 20)
+        self.http_pool_keepalive_timeout = self._get("HTTP_POOL_KEEPALIVE_TIMEOUT", 30)
+        self.http_pool_dns_ttl = self._get("HTTP_POOL_DNS_TTL", 300)
+        self.http_pool_warmup = self._get("HTTP_POOL_WARMUP", False)
+        self.llm_cache = self._get("LLM_CACHE", False)
+        self.llm_cache_path = self._get("LLM_CACHE_PATH", str(DATA_PATH / "llm_cache.db"))
+        self.llm_cache_ttl = self._get("LLM_CACHE_TTL", 7 * 24 * 3600)
+        self.llm_cache_max_entries = self._get("LLM_CACHE_MAX_ENTRIES", 10000)
+        self.llm_cache_max_size = self._get("LLM_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+        self.llm_coalesce = self._get("LLM_COALESCE", False)
+        self.llm_backends = self._get("LLM_BACKENDS")
+        self.role_history_budget = self._get("ROLE_HISTORY_BUDGET", 0.5)
+        self.pipeline_concurrency = self._get("PIPELINE_CONCURRENCY", 4)
+        self.empathy_map_formats = self._get("EMPATHY_MAP_FORMATS", ["png"])
+        self.history_log_dir = self._get("HISTORY_LOG_DIR")
+        self.history_log_keep = self._get("HISTORY_LOG_KEEP", 1000)
+        self.role_timeout = self._get("ROLE_TIMEOUT", 0)
+        self.action_timeout = self._get("ACTION_TIMEOUT", 0)
+        self.role_concurrency = self._get("ROLE_CONCURRENCY", 0)
+        self.telemetry_jsonl_path = self._get("TELEMETRY_JSONL_PATH")
+        self.telemetry_prometheus_path = self._get("TELEMETRY_PROMETHEUS_PATH")
+        self.telemetry_flush_interval = self._get("TELEMETRY_FLUSH_INTERVAL", 10)
         self.model_for_researcher_summary = self._get("MODEL_FOR_RESEARCHER_SUMMARY")
         self.model_for_researcher_report = self._get("MODEL_FOR_RESEARCHER_REPORT")
         self.mermaid_engine = self._get("MERMAID_ENGINE", "nodejs")
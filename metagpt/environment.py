@@ -6,12 +6,14 @@
 @File    : environment.py
 """
 import asyncio
-from typing import Iterable
+from collections import defaultdict
+from typing import Iterable, Optional, Type
 from metagpt.logs import logger
 
 from pydantic import BaseModel, Field
 
-from metagpt.memory import Memory
+from metagpt.config import CONFIG
+from metagpt.memory import HistoryLog, Memory
 from metagpt.roles import Role
 from metagpt.schema import Message
 
@@ -24,7 +26,11 @@ class Environment(BaseModel):
 
     roles: dict[str, Role] = Field(default_factory=dict)
     memory: Memory = Field(default_factory=Memory)
-    history: str = Field(default='')
+    history: HistoryLog = Field(
+        default_factory=lambda: HistoryLog.in_dir(CONFIG.history_log_dir, CONFIG.history_log_keep), exclude=True
+    )
+    subscribers: dict[Type, list[Role]] = Field(default_factory=lambda: defaultdict(list), exclude=True)
+    wakeup: Optional[asyncio.Event] = Field(default=None, exclude=True)
 
     class Config:
         arbitrary_types_allowed = True
@@ -35,6 +41,17 @@ class Environment(BaseModel):
         """
         role.set_env(self)
         self.roles[role.profile] = role
+        self.subscribe(role)
+
+    def subscribe(self, role: Role):
+        """Deliver the messages caused by the actions the role watches to its inbox, including those already
+        published. Call it again after the role watches more actions"""
+        role._rc.inbox = role._rc.inbox or asyncio.Queue()
+        for action in role._rc.watch:
+            if role not in self.subscribers[action]:
+                self.subscribers[action].append(role)
+        for message in self.memory.get_by_actions(role._rc.watch):
+            role._rc.inbox.put_nowait(message)
 
     def add_roles(self, roles: Iterable[Role]):
         """增加一批在当前环境的角色
@@ -48,27 +65,65 @@ class Environment(BaseModel):
           Post information to the current environment
         """
         # self.message_queue.put(message)
-        self.memory.add(message)
-        self.history += f"\n{message}"
+        if not self.memory.add(message):
+            return  # already published, its watchers have it
+        self.history.append(message)
+        for role in self.subscribers.get(message.cause_by, []):
+            if message not in role._rc.memory:  # e.g. the role's own message
+                role._rc.inbox.put_nowait(message)
+        if self.wakeup:
+            self.wakeup.set()
+
+    def is_idle(self) -> bool:
+        """No role has news waiting, running the environment would wake no one"""
+        return all(role._rc.inbox is None or role._rc.inbox.empty() for role in self.roles.values())
+
+    async def _run_role(self, name: str, role: Role, timeout: float):
+        try:
+            return await asyncio.wait_for(role.run(), timeout or None)
+        except asyncio.TimeoutError:
+            # the role's reaction or one of its actions ran out of time, the others go on without its answer
+            logger.warning(f"{name} timed out and was cancelled, its news is dropped")
+
+    async def run(self, k=1, role_timeout: Optional[float] = None, max_concurrency: Optional[int] = None) -> dict:
+        """Run the roles as messages they watch arrive, until no role has news left or each role reacted k times.
 
-    async def run(self, k=1):
-        """处理一次所有信息的运行
-        Process all Role runs at once
+        A role starts as soon as a message lands in its inbox, while other roles may still be running, and roles
+        without news are never woken. A reaction taking longer than `role_timeout` seconds is cancelled, and at most
+        `max_concurrency` roles react at once; both default to ROLE_TIMEOUT and ROLE_CONCURRENCY, 0 is no limit.
+        Returns how many times each role reacted.
         """
-        # while not self.message_queue.empty():
-        # message = self.message_queue.get()
-        # rsp = await self.manager.handle(message, self)
-        # self.message_queue.put(rsp)
-        for _ in range(k):
-            futures = []
-            for role in self.roles.values():
-                future = role.run()
-                futures.append(future)
-            logger.info("Starting to process roles")
-            await asyncio.gather(*futures)
-            logger.info("Finished processing roles")
-
-            #await asyncio.gather(*futures)
+        role_timeout = CONFIG.role_timeout if role_timeout is None else role_timeout
+        max_concurrency = CONFIG.role_concurrency if max_concurrency is None else max_concurrency
+        reactions = defaultdict(int)
+        running: dict[asyncio.Task, str] = {}
+        self.wakeup = asyncio.Event()
+        try:
+            while True:
+                for name, role in self.roles.items():
+                    if max_concurrency and len(running) >= max_concurrency:
+                        break
+                    if name in running.values() or reactions[name] >= k or role._rc.inbox.empty():
+                        continue
+                    reactions[name] += 1
+                    running[asyncio.create_task(self._run_role(name, role, role_timeout))] = name
+                if not running:
+                    break
+                logger.debug(f"Running roles {sorted(running.values())}")
+                waiter = asyncio.create_task(self.wakeup.wait())
+                done, _ = await asyncio.wait([*running, waiter], return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                self.wakeup.clear()
+                for task in done - {waiter}:
+                    running.pop(task)
+                    task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self.wakeup = None
+        logger.info("Finished processing roles")
+        return dict(reactions)
 
     def get_roles(self) -> dict[str, Role]:
         """获得环境内的所有角色
@@ -7,13 +7,21 @@
 """
 
 from metagpt.provider.anthropic_api import Claude2 as Claude
-from metagpt.provider.openai_api import OpenAIGPTAPI as LLM
+from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.provider.openai_api import OpenAIGPTAPI
+from metagpt.provider.router_api import get_router
+
+
+def LLM() -> BaseGPTAPI:
+    """The LLM used by roles and actions: the shared router when LLM_BACKENDS is set, otherwise OpenAI"""
+    return get_router() or OpenAIGPTAPI()
+
 
 DEFAULT_LLM = LLM()
 CLAUDE_LLM = Claude()
 
-async def ai_func(prompt):
+async def ai_func(prompt, use_cache=True):
     """使用LLM进行QA
        QA with LLMs
      """
-    return await DEFAULT_LLM.aask(prompt)
+    return await DEFAULT_LLM.aask(prompt, use_cache=use_cache)
@@ -1,22 +1,102 @@
 import asyncio
+from typing import Optional
+
+import fire
+
 from roles import UserResearcher, DesignStrategist, ServiceDesigner, ProductManager
+from main_action import ActionOutput
+from temp import template0, templates, templates1, templates2, templates3, templates4, templates5
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+from metagpt.utils.artifact_writer import get_artifact_writer
+from metagpt.utils.checkpoint import CheckpointStore, new_run_id
+from metagpt.utils.dag import DAGExecutor, Stage
+from metagpt.utils.http_pool import get_http_pool
+from metagpt.utils.telemetry import get_telemetry
+
+
+def build_pipeline(
+    user_researcher, design_strategist, service_designer, product_manager, checkpoints: CheckpointStore = None
+) -> DAGExecutor:
+    """The service design stages and the outputs each one needs. The empathy map only needs the interview, so it
+    runs alongside the define and ideate stages, and prototyping runs alongside the feature plan."""
+
+    def fingerprint(template):
+        return [template, CONFIG.prompt_format]
+
+    stages = [
+        Stage("interview", user_researcher.interview, ("problem",), fingerprint=fingerprint(templates)),
+        Stage(
+            "empathy_map",
+            lambda i: user_researcher.create_empathy_map(i.content),
+            ("interview",),
+            fingerprint=fingerprint(template0),
+        ),
+        Stage(
+            "insights",
+            lambda i: design_strategist.summarize_insights(i.content),
+            ("interview",),
+            fingerprint=fingerprint(templates1),
+        ),
+        Stage(
+            "problem_statements",
+            lambda i: design_strategist.define_problem_statements(i.content),
+            ("insights",),
+            fingerprint=fingerprint(templates2),
+        ),
+        Stage(
+            "ideation",
+            lambda i: service_designer.ideate(i.content),
+            ("problem_statements",),
+            fingerprint=fingerprint(templates3),
+        ),
+        Stage(
+            "prototyping",
+            lambda i: service_designer.prototype(i.content),
+            ("ideation",),
+            fingerprint=fingerprint(templates4),
+        ),
+        Stage(
+            "feature_plan",
+            lambda i: product_manager.develop_feature_plan(i.content),
+            ("ideation",),
+            fingerprint=fingerprint(templates5),
+        ),
+    ]
+    return DAGExecutor(stages, concurrency=CONFIG.pipeline_concurrency, checkpoints=checkpoints)
 
-async def main():
-    user_input = input("Please enter your service design problem: ")
 
-    user_researcher = UserResearcher(name="Alice")
-    await user_researcher.run_actions(user_input)
-    print(f"Empathy Map: {user_researcher.empathy_map}")
+async def main(resume: Optional[str] = None):
+    """Run the service design pipeline. Every stage is checkpointed under workspace/runs/<run id>, pass
+    `--resume <run id>` to continue a failed or interrupted run from its last completed stages."""
+    checkpoints = CheckpointStore(resume or new_run_id(), factory=ActionOutput)
+    user_input = checkpoints.load_meta().get("problem")
+    if resume and user_input is None:
+        raise ValueError(f"no run {resume} to resume under {checkpoints.path.parent}")
+    if user_input is None:
+        user_input = input("Please enter your service design problem: ")
+        checkpoints.save_meta(problem=user_input)
+    logger.info(f"run {checkpoints.run_id}, resume it with --resume {checkpoints.run_id}")
+    if CONFIG.http_pool_warmup:
+        await get_http_pool().warm_up([CONFIG.openai_api_base])
 
-    design_strategist = DesignStrategist(name="Bob")
-    await design_strategist.run_actions(user_researcher.interview_output.content)
+    try:
+        user_researcher = UserResearcher(name="Alice")
+        design_strategist = DesignStrategist(name="Bob")
+        service_designer = ServiceDesigner(name="Charlie")
+        product_manager = ProductManager(name="Fiona")
 
-    service_designer = ServiceDesigner(name="Charlie")
-    await service_designer.run_actions(design_strategist.problem_statements_output.content)
+        pipeline = build_pipeline(user_researcher, design_strategist, service_designer, product_manager, checkpoints)
+        results = await pipeline.run({"problem": user_input})
+        print(f"Empathy Map: {results['empathy_map'].content}")
 
-    product_manager = ProductManager(name="Fiona")
-    await product_manager.run_actions(service_designer.ideation_output.content)
-    await product_manager.choose_idea(service_designer.ideation_output.content)
+        await product_manager.choose_idea(results["ideation"].content)
+    finally:
+        try:
+            await get_artifact_writer().flush()
+        finally:
+            await get_http_pool().close()
+            get_telemetry().log_summary()
 
     """interaction_designer = InteractionDesigner(name="Dana")
     await interaction_designer.run_actions(service_designer.ideation_output.content)
@@ -29,4 +109,4 @@ async def main():
 
 # Run the async function in the event loop
 if __name__ == "__main__":
-    asyncio.run(main())
+    fire.Fire(lambda resume=None: asyncio.run(main(resume)))
@@ -19,11 +19,18 @@ from pydantic import BaseModel, create_model, root_validator, validator
 from metagpt.actions.action_output import ActionOutput
 from metagpt.llm import LLM
 from metagpt.logs import logger
+from metagpt.utils import telemetry
 from metagpt.utils.common import OutputParser
 from metagpt.utils.custom_decoder import CustomDecoder
 
 
 class Action(ABC):
+    def __init_subclass__(cls, **kwargs):
+        """Attribute the LLM calls made by a subclass's run to that Action in telemetry"""
+        super().__init_subclass__(**kwargs)
+        if "run" in cls.__dict__:
+            cls.run = telemetry.traced("action")(cls.run)
+
     def __init__(self, name: str = "", context=None, llm: LLM = None):
         self.name: str = name
         if llm is None:
@@ -7,7 +7,8 @@
 """
 from __future__ import annotations
 
-from typing import Iterable, Type
+import asyncio
+from typing import Iterable, Optional, Type
 
 from pydantic import BaseModel, Field
 
@@ -17,7 +18,10 @@ from metagpt.actions import Action, ActionOutput
 from metagpt.llm import LLM
 from metagpt.logs import logger
 from metagpt.memory import Memory, LongTermMemory
+from metagpt.memory.history_compactor import HistoryCompactor
 from metagpt.schema import Message
+from metagpt.utils import telemetry
+from metagpt.utils.token_counter import TOKEN_MAX
 
 PREFIX_TEMPLATE = """You are a {profile}, named {name}, your goal is {goal}, and the constraint is {constraints}. """
 
@@ -71,6 +75,8 @@ class RoleContext(BaseModel):
     todo: Action = Field(default=None)
     watch: set[Type[Action]] = Field(default_factory=set)
     news: list[Type[Message]] = Field(default=[])
+    env_cursor: int = Field(default=0)  # env.memory sequence number observed up to
+    inbox: Optional[asyncio.Queue] = Field(default=None)  # watched messages the environment delivered
 
     class Config:
         arbitrary_types_allowed = True
@@ -95,6 +101,10 @@ class Role:
 
     def __init__(self, name="", profile="", goal="", constraints="", desc=""):
         self._llm = LLM()
+        model = getattr(self._llm, "model", CONFIG.openai_api_model)
+        budget = int(TOKEN_MAX.get(model, 4096) * CONFIG.role_history_budget)
+        self._history = HistoryCompactor(self._llm, model, budget)
+        self._context = HistoryCompactor(self._llm, model, budget)
         self._setting = RoleSetting(name=name, profile=profile, goal=goal, constraints=constraints, desc=desc)
         self._states = []
         self._actions = []
@@ -150,11 +160,13 @@ class Role:
             # If there is only one action, then only this one can be performed
             self._set_state(0)
             return
-        prompt = self._get_prefix()
-        prompt += STATE_TEMPLATE.format(history=self._rc.history, states="\n".join(self._states),
-                                        n_states=len(self._states) - 1)
-        print(prompt)
-        next_state = await self._llm.aask(prompt)
+        with telemetry.scope(role=self.profile):
+            prompt = self._get_prefix()
+            history = await self._history.render(self._rc.history)
+            prompt += STATE_TEMPLATE.format(history=history, states="\n".join(self._states),
+                                            n_states=len(self._states) - 1)
+            print(prompt)
+            next_state = await self._llm.aask(prompt)
         logger.debug(f"{prompt=}")
         if not next_state.isdigit() or int(next_state) not in range(len(self._states)):
             logger.warning(f'Invalid answer of state, {next_state=}')
@@ -167,7 +179,10 @@ class Role:
         #                                history=self.history)
 
         logger.info(f"{self._setting}: ready to {self._rc.todo}")
-        response = await self._rc.todo.run(self._rc.important_memory)
+        with telemetry.scope(role=self.profile):
+            response = await asyncio.wait_for(
+                self._rc.todo.run(await self._context.compact(self._rc.important_memory)), CONFIG.action_timeout or None
+            )
         # logger.info(response)
         if isinstance(response, ActionOutput):
             msg = Message(content=response.content, instruct_content=response.instruct_content,
@@ -183,9 +198,14 @@ class Role:
         """Observe from the environment, obtain important information, and add it to memory"""
         if not self._rc.env:
             return 0
-        env_msgs = self._rc.env.memory.get()
+        env_msgs, self._rc.env_cursor = self._rc.env.memory.get_since(self._rc.env_cursor)
 
-        observed = self._rc.env.memory.get_by_actions(self._rc.watch)
+        if self._rc.inbox is not None:
+            observed = []
+            while not self._rc.inbox.empty():
+                observed.append(self._rc.inbox.get_nowait())
+        else:
+            observed = [i for i in env_msgs if i.cause_by in self._rc.watch]
 
         self._rc.news = self._rc.memory.find_news(
             observed)  # find news (previously unseen messages) from observed messages
@@ -215,7 +235,7 @@ class Role:
         """add message to history."""
         # self._history += f"\n{message}"
         # self._context = self._history
-        if message in self._rc.memory.get():
+        if message in self._rc.memory:
             return
         self._rc.memory.add(message)
 
@@ -8,9 +8,11 @@
 
 from metagpt.memory.memory import Memory
 from metagpt.memory.longterm_memory import LongTermMemory
+from metagpt.memory.history_log import HistoryLog
 
 
 __all__ = [
     "Memory",
     "LongTermMemory",
+    "HistoryLog",
 ]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 19:50
+@File    : history_compactor.py
+@Desc    : Keep a role's conversation history within a token budget.
+"""
+from typing import Optional
+
+from metagpt.logs import logger
+from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.schema import Message
+from metagpt.utils.text import truncate_text
+from metagpt.utils.token_counter import count_string_tokens
+
+SUMMARY_PROMPT = """Below is a summary of a conversation so far, followed by new messages of the same conversation.
+Rewrite the summary so it also covers the new messages. Keep decisions, requirements, findings and open questions,
+drop pleasantries and repetition. Answer with the summary only, in at most {max_words} words.
+
+## Summary so far
+{summary}
+
+## New messages
+{messages}
+"""
+
+
+class HistoryCompactor:
+    """Compact a growing list of messages into a running summary plus a verbatim window of recent messages.
+
+    The most recent messages are kept verbatim up to `recent_ratio` of `budget` tokens. Older messages are folded
+    into a running summary, at most `batch_tokens` of messages per LLM call. The summary is kept between calls, so
+    each message is summarized once however many rounds the role runs. When the whole history fits in the budget
+    nothing is summarized.
+    """
+
+    def __init__(
+        self, llm: BaseGPTAPI, model: str, budget: int, recent_ratio: float = 0.6, batch_tokens: int = 2000
+    ):
+        self.llm = llm
+        self.model = model
+        self.budget = budget
+        self.recent_budget = int(budget * recent_ratio)
+        self.summary_budget = budget - self.recent_budget
+        self.batch_tokens = batch_tokens
+        self.summary = ""
+        self._summarized = 0  # number of leading messages folded into the summary
+        self._last_summarized: Optional[Message] = None
+
+    def _tokens(self, message: Message) -> int:
+        return count_string_tokens(str(message), self.model)
+
+    async def compact(self, messages: list[Message]) -> list[Message]:
+        """Return the messages to send: a summary message, if any, followed by the recent messages"""
+        counts = [self._tokens(i) for i in messages]
+        if sum(counts) <= self.budget:
+            return list(messages)
+        if self._summarized and (
+            self._summarized > len(messages) or messages[self._summarized - 1] is not self._last_summarized
+        ):
+            logger.debug("history was rewritten, summarizing it again")
+            self.summary, self._summarized, self._last_summarized = "", 0, None
+
+        window, used = len(messages), 0
+        while window > self._summarized and used + counts[window - 1] <= self.recent_budget:
+            window -= 1
+            used += counts[window]
+        if window == len(messages):  # the last message alone is over budget
+            window -= 1
+        await self._fold(messages, counts, window)
+
+        recent = messages[window:]
+        if used == 0:
+            content, _ = truncate_text(recent[-1].content, self.model, self.recent_budget, "middle")
+            recent = [Message(content=content, role=recent[-1].role, cause_by=recent[-1].cause_by)]
+        summary = [Message(content=f"Summary of the earlier conversation: {self.summary}", role="system")]
+        return (summary if self.summary else []) + recent
+
+    async def render(self, messages: list[Message]) -> str:
+        """Return the compacted history as text, one message per line"""
+        return "\n".join(str(i) for i in await self.compact(messages))
+
+    async def _fold(self, messages: list[Message], counts: list[int], end: int):
+        """Fold messages[_summarized:end] into the running summary, batch by batch"""
+        while self._summarized < end:
+            start, size = self._summarized, 0
+            stop = start
+            while stop < end and (stop == start or size + counts[stop] <= self.batch_tokens):
+                size += counts[stop]
+                stop += 1
+            batch = "\n".join(str(i) for i in messages[start:stop])
+            batch, _ = truncate_text(batch, self.model, self.batch_tokens, "middle")
+            prompt = SUMMARY_PROMPT.format(
+                max_words=max(50, self.summary_budget * 3 // 4), summary=self.summary or "(empty)", messages=batch
+            )
+            summary = await self.llm.aask(prompt)
+            self.summary, _ = truncate_text(summary, self.model, self.summary_budget, "head")
+            self._summarized = stop
+            self._last_summarized = messages[stop - 1]
+            logger.debug(f"folded messages {start}-{stop} into the history summary")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 00:10
+@File    : history_log.py
+@Desc    : Append-only history of the messages published in an environment.
+"""
+import json
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from metagpt.schema import Message
+
+
+class HistoryLog:
+    """Published messages as an append-only list of segments, rendered lazily.
+
+    Appending is O(1): nothing is concatenated until a view is rendered. With `spill_path`, every segment is also
+    appended to a JSONL file and only the last `keep_in_memory` stay in memory, older ones are read back through
+    an index of file offsets when a view needs them, so a long-running environment keeps a bounded footprint.
+    The file is opened on the first append and stays open until `close`, a later append opens it again.
+
+    `str()` renders the same text as the former history string, one "\\n"-prefixed line per message, and `len()`
+    is the length of that text.
+    """
+
+    def __init__(self, spill_path: Optional[Path] = None, keep_in_memory: int = 1000):
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.keep_in_memory = keep_in_memory
+        self._recent: deque[tuple[str, str]] = deque(maxlen=keep_in_memory if self.spill_path else None)
+        self._roles: list[str] = []
+        self._offsets: list[int] = []
+        self._chars = 0
+        self._file = None
+        if self.spill_path:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def in_dir(cls, directory: Optional[str], keep_in_memory: int = 1000) -> "HistoryLog":
+        """A log spilled to a new file in `directory`, or kept in memory when it is not set"""
+        if not directory:
+            return cls()
+        return cls(Path(directory) / f"history-{uuid.uuid4().hex}.jsonl", keep_in_memory)
+
+    def append(self, message: Message):
+        text = str(message)
+        self._recent.append((message.role, text))
+        self._roles.append(message.role)
+        self._chars += 1 + len(text)
+        if self.spill_path:
+            if self._file is None:
+                self._file = open(self.spill_path, "ab")
+            self._offsets.append(self._file.tell())
+            record = json.dumps({"role": message.role, "text": text}, ensure_ascii=False)
+            self._file.write(record.encode("utf-8") + b"\n")
+
+    def __len__(self) -> int:
+        return self._chars
+
+    def count(self) -> int:
+        """Number of messages in the log"""
+        return len(self._roles)
+
+    def _segments(self, indexes: Sequence[int]) -> Iterator[tuple[str, str]]:
+        """Yield (role, text) of the messages at `indexes`, reading spilled ones from the file"""
+        first_recent = len(self._roles) - len(self._recent)
+        spilled = [i for i in indexes if i < first_recent]
+        if spilled:
+            if self._file:
+                self._file.flush()
+            with open(self.spill_path, "rb") as f:
+                for i in spilled:
+                    f.seek(self._offsets[i])
+                    record = json.loads(f.readline())
+                    yield record["role"], record["text"]
+        recent = list(self._recent)
+        for i in indexes:
+            if i >= first_recent:
+                yield recent[i - first_recent]
+
+    def __iter__(self) -> Iterator[str]:
+        for _, text in self._segments(range(len(self._roles))):
+            yield text
+
+    def render(self) -> str:
+        return "".join(f"\n{text}" for text in self)
+
+    def render_last(self, n: int) -> str:
+        """The last `n` messages"""
+        indexes = range(max(0, len(self._roles) - n), len(self._roles))
+        return "".join(f"\n{text}" for _, text in self._segments(indexes))
+
+    def render_by_role(self, role: str) -> str:
+        """The messages sent by `role`, only those are read back from the file"""
+        indexes = [i for i, r in enumerate(self._roles) if r == role]
+        return "".join(f"\n{text}" for _, text in self._segments(indexes))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"HistoryLog({self.count()} messages, {len(self)} chars)"
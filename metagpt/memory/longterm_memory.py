@@ -34,13 +34,14 @@ class LongTermMemory(Memory):
         self.add_batch(messages)
         self.msg_from_recover = False
 
-    def add(self, message: Message):
-        super(LongTermMemory, self).add(message)
+    def add(self, message: Message) -> bool:
+        added = super(LongTermMemory, self).add(message)
         for action in self.rc.watch:
             if message.cause_by == action and not self.msg_from_recover:
                 # currently, only add role's watching messages to its memory_storage
                 # and ignore adding messages from recover repeatedly
                 self.memory_storage.add(message)
+        return added
 
     def find_news(self, observed: list[Message], k=0) -> list[Message]:
         """
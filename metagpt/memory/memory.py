@@ -5,28 +5,67 @@
 @Author  : alexanderwu
 @File    : memory.py
 """
+from bisect import bisect_right
 from collections import defaultdict
-from typing import Iterable, Type
+from itertools import islice
+from typing import Iterable, Optional, Type
 
 from metagpt.actions import Action
+from metagpt.memory.text_index import InvertedIndex
 from metagpt.schema import Message
 
 
+def message_key(message: Message) -> str:
+    """Digest of the fields Message equality compares, so equal messages share a key"""
+    return message.digest
+
+
 class Memory:
-    """The most basic memory: super-memory"""
-
-    def __init__(self):
-        """Initialize an empty storage list and an empty index dictionary"""
-        self.storage: list[Message] = []
-        self.index: dict[Type[Action], list[Message]] = defaultdict(list)
-
-    def add(self, message: Message):
-        """Add a new message to storage, while updating the index"""
-        if message in self.storage:
-            return
-        self.storage.append(message)
+    """The most basic memory: super-memory
+
+    Every message gets a monotonic sequence number when it is added. Membership goes through a set of message
+    digests, and the messages are indexed by role and by the Action that caused them, so adding, deleting and
+    looking up a message do not scan the storage. `get_since` returns the messages added after a cursor, which
+    lets a reader process only what is new.
+
+    With `full_text_index`, contents are also indexed by token, built on the first content query and then kept up
+    to date by `add` and `delete`. `search` runs ranked keyword, "phrase" and prefix* queries against it, while
+    `try_remember` and `get_by_content` keep substring matching and only use it to avoid scanning every message.
+    """
+
+    def __init__(self, full_text_index: bool = True):
+        """Initialize an empty storage and empty indexes"""
+        self.full_text_index = full_text_index
+        self._text_index: Optional[InvertedIndex] = None
+        self._seq = 0
+        self._messages: dict[int, Message] = {}
+        self._keys: dict[str, int] = {}
+        self._order: list[int] = []  # sequence numbers in insertion order, deleted ones are dropped lazily
+        self._by_role: dict[str, dict[int, Message]] = defaultdict(dict)
+        self.index: dict[Type[Action], dict[int, Message]] = defaultdict(dict)
+
+    @property
+    def storage(self) -> list[Message]:
+        return list(self._messages.values())
+
+    def __contains__(self, message: Message) -> bool:
+        return message_key(message) in self._keys
+
+    def add(self, message: Message) -> bool:
+        """Add a new message to storage, while updating the index. Returns False when it was already stored"""
+        key = message_key(message)
+        if key in self._keys:
+            return False
+        self._seq += 1
+        self._messages[self._seq] = message
+        self._keys[key] = self._seq
+        self._order.append(self._seq)
+        self._by_role[message.role][self._seq] = message
         if message.cause_by:
-            self.index[message.cause_by].append(message)
+            self.index[message.cause_by][self._seq] = message
+        if self._text_index is not None:
+            self._text_index.add(self._seq, message.content)
+        return True
 
     def add_batch(self, messages: Iterable[Message]):
         for message in messages:
@@ -34,48 +73,82 @@ class Memory:
 
     def get_by_role(self, role: str) -> list[Message]:
         """Return all messages of a specified role"""
-        return [message for message in self.storage if message.role == role]
+        return list(self._by_role.get(role, {}).values())
+
+    def _get_text_index(self) -> Optional[InvertedIndex]:
+        if self.full_text_index and self._text_index is None:
+            self._text_index = InvertedIndex()
+            for seq, message in self._messages.items():
+                self._text_index.add(seq, message.content)
+        return self._text_index
 
     def get_by_content(self, content: str) -> list[Message]:
         """Return all messages containing a specified content"""
-        return [message for message in self.storage if content in message.content]
+        text_index = self._get_text_index()
+        candidates = text_index.substring_candidates(content) if text_index is not None else None
+        if candidates is None:
+            return [message for message in self._messages.values() if content in message.content]
+        return [self._messages[i] for i in sorted(candidates) if content in self._messages[i].content]
+
+    def search(self, query: str, k: int = 0) -> list[Message]:
+        """Return the messages matching every keyword, "quoted phrase" and prefix* of `query`, best match first,
+        at most k when k>0. Empty when the full text index is disabled"""
+        text_index = self._get_text_index()
+        if text_index is None:
+            return []
+        return [self._messages[i] for i in text_index.search(query, limit=k or None)]
 
     def delete(self, message: Message):
         """Delete the specified message from storage, while updating the index"""
-        self.storage.remove(message)
-        if message.cause_by and message in self.index[message.cause_by]:
-            self.index[message.cause_by].remove(message)
+        seq = self._keys.pop(message_key(message), None)
+        if seq is None:
+            raise ValueError(f"{message} is not in memory")
+        stored = self._messages.pop(seq)
+        self._by_role[stored.role].pop(seq, None)
+        if stored.cause_by:
+            self.index[stored.cause_by].pop(seq, None)
+        if self._text_index is not None:
+            self._text_index.remove(seq, stored.content)
+        if len(self._order) > 2 * len(self._messages) + 64:
+            self._order = list(self._messages)
 
     def clear(self):
-        """Clear storage and index"""
-        self.storage = []
-        self.index = defaultdict(list)
+        """Clear storage and index. Sequence numbers keep counting, so cursors stay valid"""
+        self._messages = {}
+        self._keys = {}
+        self._order = []
+        self._by_role = defaultdict(dict)
+        self.index = defaultdict(dict)
+        self._text_index = None
 
     def count(self) -> int:
         """Return the number of messages in storage"""
-        return len(self.storage)
+        return len(self._messages)
 
     def try_remember(self, keyword: str) -> list[Message]:
         """Try to recall all messages containing a specified keyword"""
-        return [message for message in self.storage if keyword in message.content]
+        return self.get_by_content(keyword)
 
     def get(self, k=0) -> list[Message]:
         """Return the most recent k memories, return all when k=0"""
-        return self.storage[-k:]
+        if not k:
+            return list(self._messages.values())
+        return list(islice(reversed(self._messages.values()), k))[::-1]
+
+    def get_since(self, cursor: int = 0) -> tuple[list[Message], int]:
+        """Return the messages added after `cursor`, oldest first, and the cursor to pass next time"""
+        start = bisect_right(self._order, cursor)
+        news = [self._messages[i] for i in self._order[start:] if i in self._messages]
+        return news, self._seq
 
     def find_news(self, observed: list[Message], k=0) -> list[Message]:
         """find news (previously unseen messages) from the the most recent k memories, from all memories when k=0"""
-        already_observed = self.get(k)
-        news: list[Message] = []
-        for i in observed:
-            if i in already_observed:
-                continue
-            news.append(i)
-        return news
+        already_observed = self._keys if not k else {message_key(i) for i in self.get(k)}
+        return [i for i in observed if message_key(i) not in already_observed]
 
     def get_by_action(self, action: Type[Action]) -> list[Message]:
         """Return all messages triggered by a specified Action"""
-        return self.index[action]
+        return list(self.index.get(action, {}).values())
 
     def get_by_actions(self, actions: Iterable[Type[Action]]) -> list[Message]:
         """Return all messages triggered by specified Actions"""
@@ -83,6 +156,5 @@ class Memory:
         for action in actions:
             if action not in self.index:
                 continue
-            rsp += self.index[action]
+            rsp += self.index[action].values()
         return rsp
-    
\ No newline at end of file
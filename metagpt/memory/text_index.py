@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 01:10
+@File    : text_index.py
+@Desc    : Incremental inverted index with positions, for keyword, phrase and prefix queries over memory.
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Iterable, Optional
+
+# a CJK character is a token on its own, other tokens are runs of word characters
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+CJK_RE = re.compile(f"[{_CJK}]")
+TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+K1, B = 1.2, 0.75  # BM25
+
+
+def tokenize(text: str) -> list[str]:
+    return [i.lower() for i in TOKEN_RE.findall(text)]
+
+
+class InvertedIndex:
+    """Token positions of every document, kept up to date by `add` and `remove`.
+
+    `search` takes whitespace separated clauses that must all match: a keyword, a "quoted phrase", or a prefix
+    ending with `*`. Results are ranked by BM25, most recent document first on ties. `substring_candidates`
+    narrows a plain substring search down to the documents that can contain it.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, list[int]]] = defaultdict(dict)
+        self._vocabulary: list[str] = []  # sorted, for prefix lookups
+        self._lengths: dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: int, text: str):
+        if doc_id in self._lengths:
+            self.remove(doc_id, text)
+        tokens = tokenize(text)
+        positions: dict[str, list[int]] = defaultdict(list)
+        for position, token in enumerate(tokens):
+            positions[token].append(position)
+        for token, found in positions.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+            self._postings[token][doc_id] = found
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: int, text: str):
+        """Remove a document, `text` is what it was added with"""
+        if doc_id not in self._lengths:
+            return
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                idx = bisect_left(self._vocabulary, token)
+                if idx < len(self._vocabulary) and self._vocabulary[idx] == token:
+                    del self._vocabulary[idx]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def expand(self, prefix: str) -> list[str]:
+        """Indexed tokens starting with `prefix`"""
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        return self._vocabulary[start:end]
+
+    def _docs(self, tokens: Iterable[str]) -> set[int]:
+        docs = None
+        for token in sorted(tokens, key=lambda i: len(self._postings.get(i, ()))):
+            found = self._postings.get(token)
+            if not found:
+                return set()
+            docs = set(found) if docs is None else docs.intersection(found)
+            if not docs:
+                return docs
+        return docs or set()
+
+    def _phrase(self, tokens: list[str]) -> set[int]:
+        docs = self._docs(tokens)
+        if len(tokens) < 2:
+            return docs
+        matched = set()
+        for doc in docs:
+            starts = set(self._postings[tokens[0]][doc])
+            for offset, token in enumerate(tokens[1:], start=1):
+                starts &= {i - offset for i in self._postings[token][doc]}
+                if not starts:
+                    break
+            if starts:
+                matched.add(doc)
+        return matched
+
+    def _prefix(self, tokens: list[str]) -> tuple[set[int], list[str]]:
+        """Documents with the exact `tokens[:-1]` and a token starting with `tokens[-1]`"""
+        expanded = self.expand(tokens[-1])
+        docs = set()
+        for token in expanded:
+            docs.update(self._postings[token])
+        if tokens[:-1]:
+            docs &= self._docs(tokens[:-1])
+        return docs, expanded
+
+    def search(self, query: str, limit: Optional[int] = None) -> list[int]:
+        """Ids of the documents matching every clause of `query`, best first"""
+        docs: Optional[set[int]] = None
+        scored: list[str] = []
+        for phrase, word in QUERY_RE.findall(query):
+            if word.endswith("*") and not phrase:
+                tokens = tokenize(word[:-1])
+                if not tokens:
+                    continue
+                matched, expanded = self._prefix(tokens)
+                scored += tokens[:-1] + expanded
+            else:
+                tokens = tokenize(phrase or word)
+                if not tokens:
+                    continue
+                matched = self._phrase(tokens)
+                scored += tokens
+            docs = matched if docs is None else docs & matched
+            if not docs:
+                return []
+        if not docs:
+            return []
+
+        n = len(self._lengths)
+        avg_length = self._total_length / n if n else 0
+        scores = dict.fromkeys(docs, 0.0)
+        for token in set(scored):
+            postings = self._postings.get(token, {})
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            small, large = (docs, postings) if len(docs) < len(postings) else (postings, docs)
+            for doc in small:
+                if doc not in large:
+                    continue
+                tf = len(postings[doc])
+                norm = K1 * (1 - B + B * self._lengths[doc] / avg_length) if avg_length else K1
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+        def key(doc: int) -> tuple[float, int]:
+            return scores[doc], doc
+
+        if limit:
+            return heapq.nlargest(limit, scores, key=key)
+        return sorted(scores, key=key, reverse=True)
+
+    def substring_candidates(self, text: str) -> Optional[set[int]]:
+        """Documents that can contain `text` as a substring, ignoring case, or None when the index cannot tell.
+
+        Only tokens of `text` whose boundaries are inside `text` narrow the search: a token cut at the start of
+        `text` may be the end of a longer one, a token cut at its end is matched as a prefix.
+        """
+        spans = [(m.start(), m.end(), m.group().lower()) for m in TOKEN_RE.finditer(text)]
+        docs: Optional[set[int]] = None
+        for start, end, token in spans:
+            if CJK_RE.fullmatch(token) or (start > 0 and end < len(text)):
+                found = set(self._postings.get(token, ()))
+            elif start > 0:
+                found, _ = self._prefix([token])
+            else:
+                continue
+            docs = found if docs is None else docs & found
+            if not docs:
+                return set()
+        return docs
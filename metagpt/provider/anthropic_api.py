@@ -5,31 +5,201 @@
 @Author  : Leo Xiao
 @File    : anthropic_api.py
 """
+import asyncio
+import time
+from typing import AsyncIterator, Optional
 
 import anthropic
-from anthropic import Anthropic
+import httpx
+from anthropic import Anthropic, AsyncAnthropic
 
 from metagpt.config import CONFIG
+from metagpt.logs import logger
+from metagpt.provider.base_gpt_api import BaseGPTAPI, StreamStats
+from metagpt.provider.openai_api import CostManager
+from metagpt.utils import telemetry
+from metagpt.utils.llm_cache import LLMCache, get_llm_cache
+from metagpt.utils.single_flight import get_single_flight
+from metagpt.utils.token_counter import count_string_tokens
 
+_async_clients: dict[asyncio.AbstractEventLoop, AsyncAnthropic] = {}
 
-class Claude2:
-    def ask(self, prompt):
-        client = Anthropic(api_key=CONFIG.claude_api_key)
 
-        res = client.completions.create(
-            model="claude-2",
-            prompt=f"{anthropic.HUMAN_PROMPT} {prompt} {anthropic.AI_PROMPT}",
-            max_tokens_to_sample=1000,
+def get_async_client() -> AsyncAnthropic:
+    """Return the AsyncAnthropic client of the running event loop, so its connection pool is reused across calls"""
+    loop = asyncio.get_running_loop()
+    for stale in [i for i in _async_clients if i.is_closed()]:
+        del _async_clients[stale]
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncAnthropic(
+            api_key=CONFIG.claude_api_key,
+            proxies=CONFIG.global_proxy,
+            connection_pool_limits=httpx.Limits(
+                max_connections=int(CONFIG.http_pool_limit),
+                max_keepalive_connections=int(CONFIG.http_pool_limit_per_host),
+                keepalive_expiry=float(CONFIG.http_pool_keepalive_timeout),
+            ),
         )
-        return res.completion
+    return _async_clients[loop]
 
-    async def aask(self, prompt):
-        client = Anthropic(api_key=CONFIG.claude_api_key)
 
-        res = client.completions.create(
-            model="claude-2",
-            prompt=f"{anthropic.HUMAN_PROMPT} {prompt} {anthropic.AI_PROMPT}",
-            max_tokens_to_sample=1000,
+class Claude2(BaseGPTAPI):
+    """Anthropic completion API behind the standard BaseGPTAPI interface.
+
+    Messages are rendered into the Human/Assistant prompt format, which starts with a Human turn: system messages
+    open the first one. The default system message is not sent, only those the caller passes.
+    Responses are returned in the OpenAI chat completion shape so `get_choice_text` works unchanged.
+    """
+
+    def __init__(self, model: str = "claude-2"):
+        self.model = model
+        self.max_tokens = CONFIG.max_tokens_rsp
+        self.temperature = 0.3
+        self._cost_manager = CostManager()
+
+    def _ask_msgs(self, msg: str, system_msgs: Optional[list[str]] = None) -> list[dict[str, str]]:
+        return self._system_msgs(system_msgs or []) + [self._user_msg(msg)]
+
+    def _cons_prompt(self, messages: list[dict]) -> str:
+        system = "\n".join(i["content"] for i in messages if i["role"] == "system")
+        turns = [i for i in messages if i["role"] != "system"]
+        if system:
+            if turns and turns[0]["role"] == "user":
+                turns[0] = self._user_msg(f"{system}\n\n{turns[0]['content']}")
+            else:
+                turns.insert(0, self._user_msg(system))
+        prompt = "".join(
+            f"{anthropic.HUMAN_PROMPT if i['role'] == 'user' else anthropic.AI_PROMPT} {i['content']}" for i in turns
         )
-        return res.completion
-    
\ No newline at end of file
+        return f"{prompt}{anthropic.AI_PROMPT}"
+
+    def _cons_kwargs(self, messages: list[dict]) -> dict:
+        return {
+            "model": self.model,
+            "prompt": self._cons_prompt(messages),
+            "max_tokens_to_sample": self.max_tokens,
+            "temperature": self.temperature,
+        }
+
+    def _to_chat_completion(self, completion: str, usage: dict) -> dict:
+        return {
+            "model": self.model,
+            "choices": [{"index": 0, "message": self._assistant_msg(completion), "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def ask(self, msg: str) -> str:
+        message = self._ask_msgs(msg)
+        rsp = self.completion(message)
+        return self.get_choice_text(rsp)
+
+    def completion(self, messages: list[dict]) -> dict:
+        client = Anthropic(api_key=CONFIG.claude_api_key)
+        kwargs = self._cons_kwargs(messages)
+        res = client.completions.create(**kwargs)
+        usage = {
+            "prompt_tokens": client.count_tokens(kwargs["prompt"]),
+            "completion_tokens": client.count_tokens(res.completion),
+        }
+        self._update_costs(usage)
+        return self._to_chat_completion(res.completion, usage)
+
+    async def acompletion(self, messages: list[dict]) -> dict:
+        with telemetry.track("claude", self.model):
+            client = get_async_client()
+            kwargs = self._cons_kwargs(messages)
+            res = await client.completions.create(**kwargs)
+            usage = await self._calc_usage(kwargs["prompt"], res.completion)
+            self._update_costs(usage)
+            return self._to_chat_completion(res.completion, usage)
+
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        """when streaming, print each token in place. Responses are served from the LLM cache when enabled, and
+        identical concurrent requests share one call."""
+        with telemetry.track("claude", self.model) as call:
+            key = LLMCache.make_key(self._cons_kwargs(messages))
+            cache = get_llm_cache() if use_cache else None
+            if cache:
+                rsp = cache.get(key)
+                if rsp is not None:
+                    logger.debug(f"LLM cache hit: {key}")
+                    call.cache_hit = True
+                    return rsp
+            single_flight = get_single_flight()
+            if single_flight:
+                rsp = await single_flight.do(key, lambda: self._acompletion_text(messages, stream))
+            else:
+                rsp = await self._acompletion_text(messages, stream)
+            if cache:
+                cache.set(key, rsp, self.model)
+            return rsp
+
+    async def _acompletion_text(self, messages: list[dict], stream: bool) -> str:
+        if not stream:
+            return self.get_choice_text(await self.acompletion(messages))
+        collected_messages = []
+        async for content in self.acompletion_stream(messages):
+            collected_messages.append(content)
+            if self.stream_sink:
+                self.stream_sink(content)
+        if self.stream_sink:
+            self.stream_sink("\n")
+        return "".join(collected_messages)
+
+    async def acompletion_stream(self, messages: list[dict]) -> AsyncIterator[str]:
+        """Yield content deltas as they arrive, recording time-to-first-token and tokens/sec in last_stream_stats"""
+        with telemetry.track("claude", self.model, bind=False) as call:
+            client = get_async_client()
+            kwargs = self._cons_kwargs(messages)
+            start = time.perf_counter()
+            first_token_at = None
+            collected_messages = []
+            response = await client.completions.create(**kwargs, stream=True)
+            try:
+                async for chunk in response:
+                    if not chunk.completion:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    collected_messages.append(chunk.completion)
+                    yield chunk.completion
+            finally:
+                end = time.perf_counter()
+                # estimated with a tiktoken encoding until the Anthropic tokenizer has counted the whole answer
+                completion_tokens = count_string_tokens("".join(collected_messages), self.model)
+                self.last_stream_stats = StreamStats.measure(start, first_token_at, completion_tokens, end)
+                call.time_to_first_token = self.last_stream_stats.time_to_first_token
+            usage = await self._calc_usage(kwargs["prompt"], "".join(collected_messages))
+            if usage:
+                self.last_stream_stats = StreamStats.measure(start, first_token_at, usage["completion_tokens"], end)
+            with telemetry.attach(call):
+                self._update_costs(usage)
+
+    async def acompletion_batch(self, batch: list[list[dict]]) -> list[dict]:
+        """Return full JSON, requests run concurrently over the shared client"""
+        return await asyncio.gather(*[self.acompletion(messages) for messages in batch])
+
+    async def acompletion_batch_text(self, batch: list[list[dict]]) -> list[str]:
+        """Only return plain text"""
+        return [self.get_choice_text(i) for i in await self.acompletion_batch(batch)]
+
+    async def _calc_usage(self, prompt: str, completion: str) -> dict:
+        usage = {}
+        if CONFIG.calc_usage:
+            try:
+                client = get_async_client()
+                usage["prompt_tokens"] = await client.count_tokens(prompt)
+                usage["completion_tokens"] = await client.count_tokens(completion)
+            except Exception as e:
+                logger.error(f"usage calculation failed: {e}")
+        return usage
+
+    def _update_costs(self, usage: dict):
+        if CONFIG.calc_usage and usage:
+            try:
+                self._cost_manager.update_cost(usage["prompt_tokens"], usage["completion_tokens"], self.model)
+            except Exception as e:
+                logger.error(f"updating costs failed: {e}")
+
+    def get_costs(self):
+        return self._cost_manager.get_costs()
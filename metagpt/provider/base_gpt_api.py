@@ -5,16 +5,44 @@
 @Author  : alexanderwu
 @File    : base_gpt_api.py
 """
+import time
 from abc import abstractmethod
-from typing import Optional
+from typing import AsyncIterator, NamedTuple, Optional
 
 from metagpt.logs import logger
 from metagpt.provider.base_chatbot import BaseChatbot
 
 
+def print_stream(content: str):
+    """Default stream sink, print each delta in place"""
+    print(content, end="", flush=True)
+
+
+class StreamStats(NamedTuple):
+    time_to_first_token: float
+    duration: float
+    completion_tokens: int
+    tokens_per_second: float
+
+    @classmethod
+    def measure(
+        cls, start: float, first_token_at: Optional[float], completion_tokens: int, end: Optional[float] = None
+    ) -> "StreamStats":
+        """Build the stats of a stream that started at `start` and ended at `end` or now, timestamps from
+        time.perf_counter. `completion_tokens` are tokens, not stream chunks, which may hold several tokens each"""
+        end = end or time.perf_counter()
+        ttft = (first_token_at or end) - start
+        generating = end - (first_token_at or end)
+        tps = completion_tokens / generating if generating > 0 else 0.0
+        return cls(ttft, end - start, completion_tokens, tps)
+
+
 class BaseGPTAPI(BaseChatbot):
     """GPT API abstract class, requiring all inheritors to provide a series of standard capabilities"""
     system_prompt = 'You are a helpful assistant.'
+    # called with every content delta of a streamed answer, set to None to stream silently
+    stream_sink = staticmethod(print_stream)
+    last_stream_stats: Optional[StreamStats] = None
 
     def _user_msg(self, msg: str) -> dict[str, str]:
         return {"role": "user", "content": msg}
@@ -31,21 +59,35 @@ class BaseGPTAPI(BaseChatbot):
     def _default_system_msg(self):
         return self._system_msg(self.system_prompt)
 
+    def _ask_msgs(self, msg: str, system_msgs: Optional[list[str]] = None) -> list[dict[str, str]]:
+        """Messages of a question, led by `system_msgs` or by the default system message"""
+        if system_msgs:
+            return self._system_msgs(system_msgs) + [self._user_msg(msg)]
+        return [self._default_system_msg(), self._user_msg(msg)]
+
     def ask(self, msg: str) -> str:
         message = [self._default_system_msg(), self._user_msg(msg)]
         rsp = self.completion(message)
         return self.get_choice_text(rsp)
 
-    async def aask(self, msg: str, system_msgs: Optional[list[str]] = None) -> str:
-        if system_msgs:
-            message = self._system_msgs(system_msgs) + [self._user_msg(msg)]
-        else:
-            message = [self._default_system_msg(), self._user_msg(msg)]
-        rsp = await self.acompletion_text(message, stream=True)
+    async def aask(self, msg: str, system_msgs: Optional[list[str]] = None, use_cache: bool = True) -> str:
+        message = self._ask_msgs(msg, system_msgs)
+        rsp = await self.acompletion_text(message, stream=True, use_cache=use_cache)
         logger.debug(message)
         # logger.debug(rsp)
         return rsp
 
+    async def aask_stream(self, msg: str, system_msgs: Optional[list[str]] = None) -> AsyncIterator[str]:
+        """Ask a question and yield the answer as content deltas while it is being generated"""
+        message = self._ask_msgs(msg, system_msgs)
+        logger.debug(message)
+        async for content in self.acompletion_stream(message):
+            yield content
+
+    async def acompletion_stream(self, messages: list[dict]) -> AsyncIterator[str]:
+        """Yield the completion as content deltas. Providers without native streaming yield the whole answer once"""
+        yield await self.acompletion_text(messages)
+
     def _extract_assistant_rsp(self, context):
         return "\n".join([i["content"] for i in context if i["role"] == "assistant"])
 
@@ -101,8 +143,9 @@ class BaseGPTAPI(BaseChatbot):
         """
 
     @abstractmethod
-    async def acompletion_text(self, messages: list[dict], stream=False) -> str:
-        """Asynchronous version of completion. Return str. Support stream-print"""
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        """Asynchronous version of completion. Return str. Support stream-print.
+        Pass use_cache=False to bypass the LLM response cache for this call"""
 
     def get_choice_text(self, rsp: dict) -> str:
         """Required to provide the first text of choice"""
@@ -6,10 +6,10 @@
 """
 import asyncio
 import time
-from typing import NamedTuple, Union
+from typing import AsyncIterator, NamedTuple, Union
 
 import openai
-from openai.error import APIConnectionError
+from openai.error import APIConnectionError, RateLimitError, ServiceUnavailableError, Timeout
 from tenacity import (
     after_log,
     retry,
@@ -20,7 +20,13 @@ from tenacity import (
 
 from metagpt.config import CONFIG
 from metagpt.logs import logger
-from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.provider.base_gpt_api import BaseGPTAPI, StreamStats
+from metagpt.utils import telemetry
+from metagpt.utils.batch_scheduler import BatchScheduler
+from metagpt.utils.http_pool import get_http_pool
+from metagpt.utils.llm_cache import LLMCache, get_llm_cache
+from metagpt.utils.rate_limiter import TokenBucketLimiter, get_rate_limiter
+from metagpt.utils.single_flight import get_single_flight
 from metagpt.utils.singleton import Singleton
 from metagpt.utils.token_counter import (
     TOKEN_COSTS,
@@ -30,31 +36,6 @@ from metagpt.utils.token_counter import (
 )
 
 
-class RateLimiter:
-    """Rate control class, each call goes through wait_if_needed, sleep if rate control is needed"""
-
-    def __init__(self, rpm):
-        self.last_call_time = 0
-        # Here 1.1 is used because even if the calls are made strictly according to time,
-        # they will still be QOS'd; consider switching to simple error retry later
-        self.interval = 1.1 * 60 / rpm
-        self.rpm = rpm
-
-    def split_batches(self, batch):
-        return [batch[i : i + self.rpm] for i in range(0, len(batch), self.rpm)]
-
-    async def wait_if_needed(self, num_requests):
-        current_time = time.time()
-        elapsed_time = current_time - self.last_call_time
-
-        if elapsed_time < self.interval * num_requests:
-            remaining_time = self.interval * num_requests - elapsed_time
-            logger.info(f"sleep {remaining_time}")
-            await asyncio.sleep(remaining_time)
-
-        self.last_call_time = time.time()
-
-
 class Costs(NamedTuple):
     total_prompt_tokens: int
     total_completion_tokens: int
@@ -86,6 +67,7 @@ class CostManager(metaclass=Singleton):
             prompt_tokens * TOKEN_COSTS[model]["prompt"] + completion_tokens * TOKEN_COSTS[model]["completion"]
         ) / 1000
         self.total_cost += cost
+        telemetry.add_usage(prompt_tokens, completion_tokens, cost)
         logger.info(
             f"Total running cost: ${self.total_cost:.3f} | Max budget: ${CONFIG.max_budget:.3f} | "
             f"Current cost: ${cost:.3f}, prompt_tokens: {prompt_tokens}, completion_tokens: {completion_tokens}"
@@ -137,18 +119,45 @@ See FAQ 5.8
     raise retry_state.outcome.exception()
 
 
-class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
+class OpenAIGPTAPI(BaseGPTAPI):
     """
     Check https://platform.openai.com/examples for examples
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        api_key: str = None,
+        api_base: str = None,
+        api_type: str = None,
+        api_version: str = None,
+        model: str = None,
+        deployment_name: str = None,
+        deployment_id: str = None,
+        rpm: int = None,
+        tpm: int = None,
+    ):
+        """Without arguments the client follows the global OPENAI_* settings. Arguments override them for this
+        instance only, so several keys and Azure deployments can be used side by side. An instance with its own
+        `rpm` or `tpm` gets its own rate limiter instead of sharing the process-wide one."""
         self.__init_openai(CONFIG)
         self.llm = openai
-        self.model = CONFIG.openai_api_model
+        self.model = model or CONFIG.openai_api_model
+        self.api_type = api_type or CONFIG.openai_api_type
+        if deployment_name or deployment_id:
+            self.deployment_name, self.deployment_id = deployment_name, deployment_id
+        else:
+            self.deployment_name, self.deployment_id = CONFIG.deployment_name, CONFIG.deployment_id
+        self._api_kwargs = {
+            k: v
+            for k, v in {"api_key": api_key, "api_base": api_base, "api_type": api_type, "api_version": api_version}.items()
+            if v
+        }
         self.auto_max_tokens = False
         self._cost_manager = CostManager()
-        RateLimiter.__init__(self, rpm=self.rpm)
+        if rpm or tpm:
+            self._rate_limiter = TokenBucketLimiter(rpm=int(rpm or 0), tpm=int(tpm or 0))
+        else:
+            self._rate_limiter = get_rate_limiter()
 
     def __init_openai(self, config):
         openai.api_key = config.openai_api_key
@@ -160,26 +169,72 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
         self.rpm = int(config.get("RPM", 10))
 
     async def _achat_completion_stream(self, messages: list[dict]) -> str:
-        response = await openai.ChatCompletion.acreate(**self._cons_kwargs(messages), stream=True)
-
-        # create variables to collect the stream of chunks
-        collected_chunks = []
         collected_messages = []
-        # iterate through the stream of events
-        async for chunk in response:
-            collected_chunks.append(chunk)  # save the event response
-            choices = chunk["choices"]
-            if len(choices) > 0:
-                chunk_message = chunk["choices"][0].get("delta", {})  # extract the message
-                collected_messages.append(chunk_message)  # save the message
-                if "content" in chunk_message:
-                    print(chunk_message["content"], end="")
-        print()
-
-        full_reply_content = "".join([m.get("content", "") for m in collected_messages])
-        usage = self._calc_usage(messages, full_reply_content)
-        self._update_costs(usage)
-        return full_reply_content
+        async for content in self.acompletion_stream(messages, use_cache=False):
+            collected_messages.append(content)
+            if self.stream_sink:
+                self.stream_sink(content)
+        if self.stream_sink:
+            self.stream_sink("\n")
+        return "".join(collected_messages)
+
+    async def acompletion_stream(self, messages: list[dict], use_cache=True) -> AsyncIterator[str]:
+        """Yield content deltas as they arrive, recording time-to-first-token and tokens/sec in last_stream_stats"""
+        with telemetry.track(self._provider, self.model, bind=False) as call:
+            cache = get_llm_cache() if use_cache else None
+            if cache:
+                key = self._cache_key(messages)
+                rsp = cache.get(key)
+                if rsp is not None:
+                    logger.debug(f"LLM cache hit: {key}")
+                    call.cache_hit = True
+                    yield rsp
+                    return
+
+            reserved = await self._throttle(messages)
+            start = time.perf_counter()
+            first_token_at = None
+            finished = False
+            collected_messages = []
+            try:
+                self._use_pooled_session()
+                response = await openai.ChatCompletion.acreate(
+                    **self._cons_kwargs(messages), **self._api_kwargs, stream=True
+                )
+            except Exception:
+                self._rate_limiter.refund(reserved)
+                raise
+            try:
+                async for chunk in response:
+                    choices = chunk["choices"]
+                    if len(choices) == 0:
+                        continue
+                    content = choices[0].get("delta", {}).get("content")
+                    if not content:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    collected_messages.append(content)
+                    yield content
+                finished = True
+            finally:
+                end = time.perf_counter()
+                full_reply_content = "".join(collected_messages)
+                usage = self._calc_usage(messages, full_reply_content)
+                completion_tokens = (usage or {}).get("completion_tokens")
+                if completion_tokens is None:
+                    completion_tokens = count_string_tokens(full_reply_content, self.model)
+                self.last_stream_stats = StreamStats.measure(start, first_token_at, completion_tokens, end)
+                call.time_to_first_token = self.last_stream_stats.time_to_first_token
+                logger.debug(
+                    f"stream finished, time to first token: {self.last_stream_stats.time_to_first_token:.2f}s, "
+                    f"{self.last_stream_stats.tokens_per_second:.1f} tokens/s"
+                )
+                with telemetry.attach(call):
+                    self._update_costs(usage)
+                self._settle(reserved, usage)
+            if cache and finished:
+                cache.set(key, full_reply_content, self.model)
 
     def _cons_kwargs(self, messages: list[dict]) -> dict:
         kwargs = {
@@ -190,15 +245,15 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
             "temperature": 0.3,
             "timeout": 3,
         }
-        if CONFIG.openai_api_type == "azure":
-            if CONFIG.deployment_name and CONFIG.deployment_id:
+        if self.api_type == "azure":
+            if self.deployment_name and self.deployment_id:
                 raise ValueError("You can only use one of the `deployment_id` or `deployment_name` model")
-            elif not CONFIG.deployment_name and not CONFIG.deployment_id:
+            elif not self.deployment_name and not self.deployment_id:
                 raise ValueError("You must specify `DEPLOYMENT_NAME` or `DEPLOYMENT_ID` parameter")
             kwargs_mode = (
-                {"engine": CONFIG.deployment_name}
-                if CONFIG.deployment_name
-                else {"deployment_id": CONFIG.deployment_id}
+                {"engine": self.deployment_name}
+                if self.deployment_name
+                else {"deployment_id": self.deployment_id}
             )
         else:
             kwargs_mode = {"model": self.model}
@@ -206,12 +261,39 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
         return kwargs
 
     async def _achat_completion(self, messages: list[dict]) -> dict:
-        rsp = await self.llm.ChatCompletion.acreate(**self._cons_kwargs(messages))
+        reserved = await self._throttle(messages)
+        try:
+            self._use_pooled_session()
+            rsp = await self.llm.ChatCompletion.acreate(**self._cons_kwargs(messages), **self._api_kwargs)
+        except Exception:
+            self._rate_limiter.refund(reserved)  # a failed call used nothing, retries must not drain the budget
+            raise
         self._update_costs(rsp.get("usage"))
+        self._settle(reserved, rsp.get("usage"))
         return rsp
 
+    def _use_pooled_session(self):
+        """Route openai's aiohttp requests in the current context through the shared keep-alive session."""
+        self.llm.aiosession.set(get_http_pool().session())
+
+    async def _throttle(self, messages: list[dict]) -> int:
+        """Wait for the process-wide RPM/TPM budget and return the number of tokens reserved."""
+        try:
+            reserved = count_message_tokens(messages, self.model) + self.get_max_tokens(messages)
+        except Exception:
+            reserved = sum(len(m["content"]) for m in messages) // 4 + self.get_max_tokens(messages)
+        await self._rate_limiter.acquire(reserved)
+        return reserved
+
+    def _settle(self, reserved: int, usage: dict):
+        """Give back the part of the reservation the call did not use."""
+        if not usage:
+            return
+        used = int(usage.get("prompt_tokens", 0)) + int(usage.get("completion_tokens", 0))
+        self._rate_limiter.refund(reserved - used)
+
     def _chat_completion(self, messages: list[dict]) -> dict:
-        rsp = self.llm.ChatCompletion.create(**self._cons_kwargs(messages))
+        rsp = self.llm.ChatCompletion.create(**self._cons_kwargs(messages), **self._api_kwargs)
         self._update_costs(rsp)
         return rsp
 
@@ -223,21 +305,51 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
     async def acompletion(self, messages: list[dict]) -> dict:
         # if isinstance(messages[0], Message):
         #     messages = self.messages_to_dict(messages)
-        return await self._achat_completion(messages)
+        with telemetry.track(self._provider, self.model):
+            return await self._achat_completion(messages)
+
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        """when streaming, print each token in place. Responses are served from the LLM cache when enabled, and
+        identical concurrent requests share one call."""
+        with telemetry.track(self._provider, self.model) as call:
+            key = self._cache_key(messages)
+            cache = get_llm_cache() if use_cache else None
+            if cache:
+                rsp = cache.get(key)
+                if rsp is not None:
+                    logger.debug(f"LLM cache hit: {key}")
+                    call.cache_hit = True
+                    return rsp
+            single_flight = get_single_flight()
+            if single_flight:
+                rsp = await single_flight.do(key, lambda: self._acompletion_text(messages, stream))
+            else:
+                rsp = await self._acompletion_text(messages, stream)
+            if cache:
+                cache.set(key, rsp, self.model)
+            return rsp
 
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_fixed(1),
         after=after_log(logger, logger.level("WARNING").name),
+        before_sleep=telemetry.note_retry,
         retry=retry_if_exception_type(APIConnectionError),
         retry_error_callback=log_and_reraise,
     )
-    async def acompletion_text(self, messages: list[dict], stream=False) -> str:
-        """when streaming, print each token in place."""
+    async def _acompletion_text(self, messages: list[dict], stream: bool) -> str:
         if stream:
             return await self._achat_completion_stream(messages)
-        rsp = await self._achat_completion(messages)
-        return self.get_choice_text(rsp)
+        return self.get_choice_text(await self._achat_completion(messages))
+
+    @property
+    def _provider(self) -> str:
+        return self.api_type or "openai"
+
+    def _cache_key(self, messages: list[dict]) -> str:
+        request = self._cons_kwargs(messages)
+        request.pop("timeout", None)
+        return LLMCache.make_key(request)
 
     def _calc_usage(self, messages: list[dict], rsp: str) -> dict:
         usage = {}
@@ -253,30 +365,34 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
         else:
             return usage
 
-    async def acompletion_batch(self, batch: list[list[dict]]) -> list[dict]:
-        """Return full JSON"""
-        split_batches = self.split_batches(batch)
-        all_results = []
-
-        for small_batch in split_batches:
-            logger.info(small_batch)
-            await self.wait_if_needed(len(small_batch))
+    def _batch_scheduler(self) -> BatchScheduler:
+        return BatchScheduler(
+            self.acompletion,
+            concurrency=int(CONFIG.batch_concurrency),
+            max_retries=3,
+            retry_on=(RateLimitError, Timeout, APIConnectionError, ServiceUnavailableError, asyncio.TimeoutError),
+        )
 
-            future = [self.acompletion(prompt) for prompt in small_batch]
-            results = await asyncio.gather(*future)
-            logger.info(results)
-            all_results.extend(results)
+    async def acompletion_batch(self, batch: list[list[dict]], priorities: list[int] = None) -> list[dict]:
+        """Return full JSON, in the order of the batch"""
+        logger.info(f"Running a batch of {len(batch)} requests")
+        return await self._batch_scheduler().run(batch, priorities)
 
-        return all_results
+    async def acompletion_batch_as_completed(
+        self, batch: list[list[dict]], priorities: list[int] = None
+    ) -> AsyncIterator[tuple[int, dict]]:
+        """Yield (index, full JSON) pairs as the requests of the batch finish"""
+        async for idx, rsp in self._batch_scheduler().as_completed(batch, priorities):
+            yield idx, rsp
 
-    async def acompletion_batch_text(self, batch: list[list[dict]]) -> list[str]:
+    async def acompletion_batch_text(self, batch: list[list[dict]], priorities: list[int] = None) -> list[str]:
         """Only return plain text"""
-        raw_results = await self.acompletion_batch(batch)
+        raw_results = await self.acompletion_batch(batch, priorities)
         results = []
         for idx, raw_result in enumerate(raw_results, start=1):
             result = self.get_choice_text(raw_result)
             results.append(result)
-            logger.info(f"Result of task {idx}: {result}")
+            logger.debug(f"Result of task {idx}: {len(result)} chars")
         return results
 
     def _update_costs(self, usage: dict):
@@ -321,5 +437,6 @@ class OpenAIGPTAPI(BaseGPTAPI, RateLimiter):
             logger.error(f"moderating failed:{e}")
 
     async def _amoderation(self, content: Union[str, list[str]]):
+        self._use_pooled_session()
         rsp = await self.llm.Moderation.acreate(input=content)
         return rsp
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 16:50
+@File    : router_api.py
+@Desc    : Latency-aware router with failover over several LLM backends.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Union
+
+import aiohttp
+import anthropic
+from openai import error as openai_error
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+from metagpt.provider.anthropic_api import Claude2
+from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.provider.openai_api import CostManager, Costs, OpenAIGPTAPI
+from metagpt.provider.spark_api import SparkAPI
+from metagpt.utils import telemetry
+from metagpt.utils.batch_scheduler import BatchScheduler
+
+# Failures that say nothing about the request itself, so another backend or a later retry may succeed
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    aiohttp.ClientError,
+    openai_error.APIConnectionError,
+    openai_error.Timeout,
+    openai_error.RateLimitError,
+    openai_error.ServiceUnavailableError,
+    anthropic.APIConnectionError,
+    anthropic.RateLimitError,
+    anthropic.InternalServerError,
+)
+
+
+def is_retryable(e: BaseException) -> bool:
+    """Whether a failed call may succeed elsewhere: transport errors, timeouts, 429 and 5xx. Client errors such as
+    an oversized or malformed request fail the same way on every backend, so they must not open any circuit."""
+    retryable = getattr(e, "retryable", None)
+    if retryable is not None:
+        return retryable
+    status = getattr(e, "http_status", None) or getattr(e, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(e, TRANSIENT_ERRORS) or type(e) is openai_error.APIError
+
+
+class Backend:
+    """One routed provider with its latency and error rate (both EWMA) and its circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and the backend is skipped for `cooldown`
+    seconds. It is then tried again, and the next failure opens the circuit right away.
+    """
+
+    def __init__(
+        self, name: str, llm: BaseGPTAPI, alpha: float = 0.3, failure_threshold: int = 3, cooldown: float = 30.0
+    ):
+        self.name = name
+        self.llm = llm
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.failures = 0
+        self.open_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def score(self) -> float:
+        """Expected cost of sending one more request here, lower is better. Requests in flight count as load, so
+        a batch spreads over several backends instead of queueing on the fastest one."""
+        return (self.latency + 1e-3) * (1 + self.in_flight) / max(1e-3, 1 - self.error_rate)
+
+    def record_success(self, elapsed: float):
+        self.latency = elapsed if not self.latency else (1 - self.alpha) * self.latency + self.alpha * elapsed
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self):
+        self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+            logger.warning(f"LLM backend {self.name} failed {self.failures} times in a row, skip it for {self.cooldown}s")
+
+
+class RouterGPTAPI(BaseGPTAPI):
+    """Send each request to the fastest healthy backend and fail over to the next one on errors.
+
+    Backends are ranked by `Backend.score`. A request that fails with a retryable error (see `is_retryable`) is
+    retried on the next backend in the ranking, and only the last error is raised once every backend has failed.
+    Other errors are raised right away. When all circuits are open, backends are still tried in the order they
+    recover, so a run is never refused outright.
+    """
+
+    def __init__(self, backends: list[Backend]):
+        if not backends:
+            raise ValueError("RouterGPTAPI needs at least one backend")
+        self.backends = backends
+        self._cost_manager = CostManager()
+
+    @classmethod
+    def from_config(cls, specs: list[dict]) -> "RouterGPTAPI":
+        """Build the router from the LLM_BACKENDS list, see config.yaml"""
+        return cls([create_backend(spec, idx) for idx, spec in enumerate(specs)])
+
+    def _ranked(self, method: Optional[str] = None) -> list[Backend]:
+        """Backends to try in order, only those whose llm has `method` when it is given"""
+        backends = [i for i in self.backends if method is None or hasattr(i.llm, method)]
+        if not backends:
+            raise NotImplementedError(f"No LLM backend supports {method}")
+        now = time.monotonic()
+        ranked = sorted((i for i in backends if i.available(now)), key=Backend.score)
+        return ranked or sorted(backends, key=lambda i: i.open_until)
+
+    async def _route(self, call: Callable[[BaseGPTAPI], Awaitable[Any]], method: Optional[str] = None) -> Any:
+        last_error = None
+        with telemetry.track("router", ""):
+            for backend in self._ranked(method):
+                if last_error:
+                    telemetry.note_retry()
+                backend.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    result = await call(backend.llm)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    backend.record_failure()
+                    logger.warning(f"LLM backend {backend.name} failed, failing over: {type(e).__name__}: {e}")
+                    last_error = e
+                    continue
+                finally:
+                    backend.in_flight -= 1
+                backend.record_success(time.perf_counter() - start)
+                return result
+            raise last_error
+
+    def _route_sync(self, call: Callable[[BaseGPTAPI], Any], method: Optional[str] = None) -> Any:
+        last_error = None
+        for backend in self._ranked(method):
+            start = time.perf_counter()
+            try:
+                result = call(backend.llm)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                backend.record_failure()
+                logger.warning(f"LLM backend {backend.name} failed, failing over: {type(e).__name__}: {e}")
+                last_error = e
+                continue
+            backend.record_success(time.perf_counter() - start)
+            return result
+        raise last_error
+
+    def _to_chat_completion(self, rsp: Any) -> dict:
+        """Some providers answer with plain text, present every answer in the OpenAI chat completion shape"""
+        if isinstance(rsp, str):
+            return {"choices": [{"index": 0, "message": self._assistant_msg(rsp), "finish_reason": "stop"}]}
+        return rsp
+
+    def completion(self, messages: list[dict]) -> dict:
+        return self._to_chat_completion(self._route_sync(lambda llm: llm.completion(messages)))
+
+    async def acompletion(self, messages: list[dict]) -> dict:
+        return self._to_chat_completion(await self._route(lambda llm: llm.acompletion(messages)))
+
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        return await self._route(lambda llm: llm.acompletion_text(messages, stream=stream, use_cache=use_cache))
+
+    async def acompletion_stream(self, messages: list[dict]) -> AsyncIterator[str]:
+        """Yield content deltas from the best backend. Failover is only possible before the first delta"""
+        last_error = None
+        for backend in self._ranked():
+            backend.in_flight += 1
+            start = time.perf_counter()
+            started = False
+            try:
+                async for content in backend.llm.acompletion_stream(messages):
+                    started = True
+                    yield content
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                backend.record_failure()
+                if started:
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed, failing over: {type(e).__name__}: {e}")
+                last_error = e
+                continue
+            finally:
+                backend.in_flight -= 1
+            backend.record_success(time.perf_counter() - start)
+            self.last_stream_stats = backend.llm.last_stream_stats
+            return
+        raise last_error
+
+    def _batch_scheduler(self, func: Callable[[list[dict]], Awaitable[Any]]) -> BatchScheduler:
+        """Bound the batch like OpenAIGPTAPI does, and back off once every backend is failing"""
+        return BatchScheduler(
+            func, concurrency=int(CONFIG.batch_concurrency), max_retries=3, retry_on=TRANSIENT_ERRORS
+        )
+
+    async def acompletion_batch(self, batch: list[list[dict]], priorities: list[int] = None) -> list[dict]:
+        """Return full JSON, in the order of the batch. Requests are spread over the backends"""
+        logger.info(f"Running a batch of {len(batch)} requests")
+        return await self._batch_scheduler(self.acompletion).run(batch, priorities)
+
+    async def acompletion_batch_text(self, batch: list[list[dict]], priorities: list[int] = None) -> list[str]:
+        """Only return plain text"""
+        return await self._batch_scheduler(self.acompletion_text).run(batch, priorities)
+
+    def moderation(self, content: Union[str, list[str]]):
+        """Served by the backends that have a moderation endpoint, such as OpenAI"""
+        return self._route_sync(lambda llm: llm.moderation(content=content), "moderation")
+
+    async def amoderation(self, content: Union[str, list[str]]):
+        return await self._route(lambda llm: llm.amoderation(content=content), "amoderation")
+
+    def get_costs(self) -> Costs:
+        return self._cost_manager.get_costs()
+
+
+def create_backend(spec: dict, idx: int = 0) -> Backend:
+    """Create a backend from one LLM_BACKENDS entry, keys follow the names of the top level settings"""
+    provider = spec.get("PROVIDER", "openai").lower()
+    if provider in ("openai", "azure"):
+        llm = OpenAIGPTAPI(
+            api_key=spec.get("OPENAI_API_KEY"),
+            api_base=spec.get("OPENAI_API_BASE"),
+            api_type="azure" if provider == "azure" else spec.get("OPENAI_API_TYPE"),
+            api_version=spec.get("OPENAI_API_VERSION"),
+            model=spec.get("OPENAI_API_MODEL"),
+            deployment_name=spec.get("DEPLOYMENT_NAME"),
+            deployment_id=spec.get("DEPLOYMENT_ID"),
+            rpm=spec.get("RPM"),
+            tpm=spec.get("TPM"),
+        )
+    elif provider == "claude":
+        llm = Claude2(model=spec.get("MODEL", "claude-2"))
+    elif provider == "spark":
+        llm = SparkAPI()
+    else:
+        raise ValueError(f"Unknown LLM backend provider: {provider}")
+    return Backend(
+        spec.get("NAME", f"{provider}-{idx}"),
+        llm,
+        failure_threshold=int(spec.get("FAILURE_THRESHOLD", 3)),
+        cooldown=float(spec.get("COOLDOWN", 30)),
+    )
+
+
+_router: Optional[RouterGPTAPI] = None
+
+
+def get_router() -> Optional[RouterGPTAPI]:
+    """Return the process-wide router, or None when LLM_BACKENDS is not set. Sharing it lets every role see
+    the same backend health."""
+    global _router
+    if not CONFIG.llm_backends:
+        return None
+    if _router is None:
+        _router = RouterGPTAPI.from_config(CONFIG.llm_backends)
+        logger.info(f"Routing LLM requests over {[i.name for i in _router.backends]}")
+    return _router
@@ -6,63 +6,206 @@
 @File    : anthropic_api.py
 """
 import _thread as thread
+import asyncio
 import base64
 import datetime
 import hashlib
 import hmac
 import json
 import ssl
+import time
 from time import mktime
-from typing import Optional
+from typing import AsyncIterator, Optional
 from urllib.parse import urlencode
 from urllib.parse import urlparse
 from wsgiref.handlers import format_date_time
 
+import aiohttp
 import websocket  # 使用websocket_client
 
 from metagpt.config import CONFIG
 from metagpt.logs import logger
-from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.provider.base_gpt_api import BaseGPTAPI, StreamStats
+from metagpt.utils import telemetry
+from metagpt.utils.http_pool import get_http_pool
+from metagpt.utils.llm_cache import LLMCache, get_llm_cache
+from metagpt.utils.token_counter import count_string_tokens
+
+
+class SparkAPIError(Exception):
+    """The Spark server answered with an error code, or the websocket ended before the answer was complete"""
+
+    RETRYABLE_CODES = frozenset({11202, 11203})  # over the QPS or the concurrency limit of the app
+
+    def __init__(self, code: Optional[int], message: str):
+        super().__init__(f"Spark API error {code}: {message}")
+        self.code = code
+        self.message = message
+
+    @property
+    def retryable(self) -> bool:
+        """A truncated stream or a rate limit may succeed on retry, other error codes reject the request itself"""
+        return self.code is None or self.code in self.RETRYABLE_CODES
 
 
 class SparkAPI(BaseGPTAPI):
+    """讯飞星火 over an asyncio websocket transport, so concurrent acompletion calls really run in parallel.
+
+    Every request opens its own websocket on the shared aiohttp session (the server closes the socket once it
+    has answered), while the signed url is reused for the whole signature validity window.
+    """
 
     def __init__(self):
-        logger.warning('当前方法无法支持异步运行。当你使用acompletion时，并不能并行访问。')
+        self._signer = SparkURLSigner(CONFIG.spark_appid, CONFIG.spark_api_key, CONFIG.spark_api_secret,
+                                      CONFIG.spark_url)
 
     def ask(self, msg: str) -> str:
         message = [self._default_system_msg(), self._user_msg(msg)]
         rsp = self.completion(message)
         return rsp
 
-    async def aask(self, msg: str, system_msgs: Optional[list[str]] = None) -> str:
+    async def aask(self, msg: str, system_msgs: Optional[list[str]] = None, use_cache: bool = True) -> str:
         if system_msgs:
             message = self._system_msgs(system_msgs) + [self._user_msg(msg)]
         else:
             message = [self._default_system_msg(), self._user_msg(msg)]
-        rsp = await self.acompletion(message)
+        rsp = await self.acompletion_text(message, stream=True, use_cache=use_cache)
         logger.debug(message)
         return rsp
 
     def get_choice_text(self, rsp: dict) -> str:
         return rsp["payload"]["choices"]["text"][-1]["content"]
 
-    async def acompletion_text(self, messages: list[dict], stream=False) -> str:
-        # 不支持
-        logger.error('该功能禁用。')
-        w = GetMessageFromWeb(messages)
-        return w.run()
-
-    async def acompletion(self, messages: list[dict]):
-        # 不支持异步
-        w = GetMessageFromWeb(messages)
-        return w.run()
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        """when streaming, print each partial text in place. Responses are served from the LLM cache when enabled"""
+        with telemetry.track("spark", CONFIG.domain or "") as call:
+            cache = get_llm_cache() if use_cache else None
+            if cache:
+                key = self._cache_key(messages)
+                rsp = cache.get(key)
+                if rsp is not None:
+                    logger.debug(f"LLM cache hit: {key}")
+                    call.cache_hit = True
+                    return rsp
+            collected_messages = []
+            async for content in self.acompletion_stream(messages):
+                collected_messages.append(content)
+                if stream and self.stream_sink:
+                    self.stream_sink(content)
+            if stream and self.stream_sink:
+                self.stream_sink("\n")
+            rsp = "".join(collected_messages)
+            if cache:
+                cache.set(key, rsp, CONFIG.domain or "spark")
+            return rsp
+
+    def _cache_key(self, messages: list[dict]) -> str:
+        """Keyed by the domain, the sampling parameters and the messages, not by the app id"""
+        request = {"provider": "spark", **gen_params(messages)["parameter"]["chat"], "messages": messages}
+        return LLMCache.make_key(request)
+
+    async def acompletion(self, messages: list[dict]) -> str:
+        return await self.acompletion_text(messages)
+
+    async def acompletion_batch(self, batch: list[list[dict]]) -> list[str]:
+        """Run every request of the batch concurrently, each on its own websocket"""
+        return await asyncio.gather(*[self.acompletion(messages) for messages in batch])
+
+    async def acompletion_stream(self, messages: list[dict]) -> AsyncIterator[str]:
+        """Yield the partial texts streamed back by the server. Raises SparkAPIError when the server answers with an
+        error code or the websocket ends before the last frame, so retries and router failover see the failure"""
+        with telemetry.track("spark", CONFIG.domain or "", bind=False) as call:
+            start = time.perf_counter()
+            first_token_at = None
+            collected_messages = []
+            completion_tokens = None
+            session = get_http_pool().session()
+            try:
+                async with session.ws_connect(self._signer.url()) as ws:
+                    await ws.send_json(gen_params(messages))
+                    finished = False
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            raise SparkAPIError(None, f"unexpected {msg.type.name} websocket frame: {msg.data}")
+                        data = json.loads(msg.data)
+                        if data["header"]["code"] != 0:
+                            logger.critical(f'回答获取失败，响应信息反序列化之后为： {data}')
+                            raise SparkAPIError(data["header"]["code"], data["header"].get("message", ""))
+                        choices = data["payload"]["choices"]
+                        content = choices["text"][0]["content"]
+                        if content:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                            collected_messages.append(content)
+                            yield content
+                        if choices["status"] == 2:  # 服务端是流式返回，status为2表示信息传送完毕
+                            usage = data["payload"].get("usage", {}).get("text", {})
+                            call.prompt_tokens += usage.get("prompt_tokens", 0)
+                            call.completion_tokens += usage.get("completion_tokens", 0)
+                            completion_tokens = usage.get("completion_tokens")
+                            finished = True
+                            break
+                    if not finished:
+                        raise SparkAPIError(None, "websocket closed before the answer was complete")
+            finally:
+                end = time.perf_counter()
+                if completion_tokens is None:  # the server reports usage in the last frame only
+                    completion_tokens = count_string_tokens("".join(collected_messages), CONFIG.domain or "spark")
+                self.last_stream_stats = StreamStats.measure(start, first_token_at, completion_tokens, end)
+                call.time_to_first_token = self.last_stream_stats.time_to_first_token
 
     def completion(self, messages: list[dict]):
         w = GetMessageFromWeb(messages)
         return w.run()
 
 
+class SparkURLSigner:
+    """Signs the Spark websocket url, reusing one signature for `validity` seconds.
+    The server rejects signatures whose date is more than 300 seconds off."""
+
+    def __init__(self, app_id, api_key, api_secret, spark_url, validity: float = 240):
+        self.ws_param = GetMessageFromWeb.WsParam(app_id, api_key, api_secret, spark_url)
+        self.validity = validity
+        self._url = None
+        self._signed_at = 0.0
+
+    def url(self) -> str:
+        now = time.monotonic()
+        if self._url is None or now - self._signed_at > self.validity:
+            self._url = self.ws_param.create_url()
+            self._signed_at = now
+        return self._url
+
+
+def gen_params(text) -> dict:
+    """处理请求数据
+    Build the request payload for a list of messages"""
+    data = {
+        "header": {
+            "app_id": CONFIG.spark_appid,
+            "uid": "1234"
+        },
+        "parameter": {
+            "chat": {
+                # domain为必传参数
+                "domain": CONFIG.domain,
+
+                # 以下为可微调，非必传参数
+                # 注意：官方建议，temperature和top_k修改一个即可
+                "max_tokens": 2048,  # 默认2048，模型回答的tokens的最大长度，即允许它输出文本的最长字数
+                "temperature": 0.5,  # 取值为[0,1],默认为0.5。取值越高随机性越强、发散性越高，即相同的问题得到的不同答案的可能性越高
+                "top_k": 4,  # 取值为[1，6],默认为4。从k个候选中随机选择一个（非等概率）
+            }
+        },
+        "payload": {
+            "message": {
+                "text": text
+            }
+        }
+    }
+    return data
+
+
 class GetMessageFromWeb:
     class WsParam:
         """
@@ -150,31 +293,7 @@ class GetMessageFromWeb:
 
     # 处理请求数据
     def gen_params(self):
-
-        data = {
-            "header": {
-                "app_id": self.spark_appid,
-                "uid": "1234"
-            },
-            "parameter": {
-                "chat": {
-                    # domain为必传参数
-                    "domain": self.domain,
-
-                    # 以下为可微调，非必传参数
-                    # 注意：官方建议，temperature和top_k修改一个即可
-                    "max_tokens": 2048,  # 默认2048，模型回答的tokens的最大长度，即允许它输出文本的最长字数
-                    "temperature": 0.5,  # 取值为[0,1],默认为0.5。取值越高随机性越强、发散性越高，即相同的问题得到的不同答案的可能性越高
-                    "top_k": 4,  # 取值为[1，6],默认为4。从k个候选中随机选择一个（非等概率）
-                }
-            },
-            "payload": {
-                "message": {
-                    "text": self.text
-                }
-            }
-        }
-        return data
+        return gen_params(self.text)
 
     def send(self, ws, *args):
         data = json.dumps(self.gen_params())
@@ -7,9 +7,10 @@ from metagpt.actions import Action, ActionOutput
 from metagpt.config import CONFIG
 from metagpt.const import WORKSPACE_ROOT
 from metagpt.logs import logger
-from metagpt.utils.common import CodeParser
+from metagpt.utils.common import CodeParser, OutputParser
 from metagpt.utils.get_template import get_template
 from metagpt.utils.json_to_markdown import json_to_markdown
+from metagpt.utils import telemetry
 from metagpt.llm import ai_func
 from pydantic import BaseModel
 import textwrap
@@ -39,13 +40,22 @@ class UserResearcher(Role):
         self.empathy_map = None
         self.interview_output = None
 
-    async def run_actions(self, service_design_problem):
+    @telemetry.traced("role")
+    async def interview(self, service_design_problem):
         user_interview = UserInterview(name="User Interview", context=service_design_problem, llm=ai_func)
         self.interview_output = await user_interview.run(service_design_problem)
-        create_empathy_map = CreateEmpathyMap(name="Create Empathy Map", context=self.interview_output.content,
-                                              llm=ai_func)
-        empathy_map_output = await create_empathy_map.run(self.interview_output.content)
+        return self.interview_output
+
+    @telemetry.traced("role")
+    async def create_empathy_map(self, interview_content):
+        create_empathy_map = CreateEmpathyMap(name="Create Empathy Map", context=interview_content, llm=ai_func)
+        empathy_map_output = await create_empathy_map.run(interview_content)
         self.empathy_map = empathy_map_output.content  # Extracting content from ActionOutput
+        return empathy_map_output
+
+    async def run_actions(self, service_design_problem):
+        await self.interview(service_design_problem)
+        await self.create_empathy_map(self.interview_output.content)
 
 class DesignStrategist(Role):
     """
@@ -58,14 +68,23 @@ class DesignStrategist(Role):
         goal: str = "Define clear problem statements based on user insights",
     ) -> None:
         super().__init__(name, profile, goal)
+        self.summarized_insights_output = None
         self.problem_statements_output = None
 
-    async def run_actions(self, user_insights):
+    @telemetry.traced("role")
+    async def summarize_insights(self, user_insights):
         summarize_insights = SummarizeInsights(name="summarised insights", context=user_insights, llm=ai_func)
-        define_problem_statements = DefineProblemStatements()
+        self.summarized_insights_output = await summarize_insights.run(user_insights)
+        return self.summarized_insights_output
 
-        summarized_insights = await summarize_insights.run(user_insights)
-        self.problem_statements_output = await define_problem_statements.run(summarized_insights.content)
+    @telemetry.traced("role")
+    async def define_problem_statements(self, summarized_insights):
+        self.problem_statements_output = await DefineProblemStatements().run(summarized_insights)
+        return self.problem_statements_output
+
+    async def run_actions(self, user_insights):
+        await self.summarize_insights(user_insights)
+        await self.define_problem_statements(self.summarized_insights_output.content)
 
 class ServiceDesigner(Role):
     """
@@ -88,9 +107,19 @@ class ServiceDesigner(Role):
         self.prototyping_output = None
         self.ideation_output = None
 
-    async def run_actions(self, problem_statements):
+    @telemetry.traced("role")
+    async def ideate(self, problem_statements):
         self.ideation_output = await IdeateSolutions().run(problem_statements)
-        self.prototyping_output = await PrototypeSolutions().run(self.ideation_output.content)
+        return self.ideation_output
+
+    @telemetry.traced("role")
+    async def prototype(self, ideas):
+        self.prototyping_output = await PrototypeSolutions().run(ideas)
+        return self.prototyping_output
+
+    async def run_actions(self, problem_statements):
+        await self.ideate(problem_statements)
+        await self.prototype(self.ideation_output.content)
 
 class InteractionDesigner(Role):
     """
@@ -113,6 +142,7 @@ class InteractionDesigner(Role):
         super().__init__(name, profile, goal)
         self.prototyping_details_output = None
 
+    @telemetry.traced("role")
     async def run_actions(self, ideas):
         self.prototyping_details_output = await DevelopPrototypes().run(ideas)
 
@@ -164,7 +194,40 @@ class ProductManager(Role):
         super().__init__(name, profile, goal)
         self.feature_plan_output = None
 
+    @staticmethod
+    def parse_ideas(ideation_results) -> list[dict]:
+        """Return the "Ideation Results" list of dicts with an "Idea" and a "Reason" from the ideation output"""
+        if isinstance(ideation_results, list):
+            return ideation_results
+        if hasattr(ideation_results, "instruct_content"):
+            ideation_results = ideation_results.instruct_content.dict()
+        if isinstance(ideation_results, str):
+            try:
+                ideation_results = OutputParser.extract_struct(ideation_results, dict)
+            except Exception as e:
+                logger.warning(f"could not parse the ideation results: {e}")
+                return []
+        ideas = ideation_results.get("Ideation Results", []) if isinstance(ideation_results, dict) else []
+        return [i for i in ideas if isinstance(i, dict) and "Idea" in i]
+
+    async def elaborate(self, idea: str) -> str:
+        elaboration_prompt = f"Elaborate on the idea: '{idea}'. Provide a detailed explanation and potential implementation steps."
+        return await ai_func(elaboration_prompt)
+
+    @telemetry.traced("role")
+    async def elaborate_ideas(self, ideation_results, policy: str = "top-k", k: int = 3) -> list[dict]:
+        """Elaborate on ideas without asking, for unattended runs. `policy` is "all" or "top-k", the latter taking
+        the first `k` ideas in the order the ideation listed them. The elaborations run concurrently."""
+        ideas = self.parse_ideas(ideation_results)
+        if policy == "top-k":
+            ideas = ideas[:k]
+        elif policy != "all":
+            raise ValueError(f"unknown idea selection policy: {policy}")
+        elaborations = await asyncio.gather(*[self.elaborate(i["Idea"]) for i in ideas])
+        return [{**idea, "Elaboration": elaboration} for idea, elaboration in zip(ideas, elaborations)]
+
     async def choose_idea(self, ideation_results):
+        ideation_results = self.parse_ideas(ideation_results)
         while True:
             print("\nIdeas from Ideation Results:")
             for i, idea in enumerate(ideation_results, start=1):
@@ -181,8 +244,7 @@ class ProductManager(Role):
                     print(f"\nSelected Idea: {selected_idea}\n")
 
                     # AI to elaborate on the selected idea
-                    elaboration_prompt = f"Elaborate on the idea: '{selected_idea}'. Provide a detailed explanation and potential implementation steps."
-                    elaboration = await ai_func(elaboration_prompt)
+                    elaboration = await self.elaborate(selected_idea)
                     print(f"\nAI's Elaboration on the Idea:\n{elaboration}")
 
                 else:
@@ -190,5 +252,10 @@ class ProductManager(Role):
             except ValueError:
                 print("Please enter a valid number.")
 
-    async def run_actions(self, ideation_results):
+    @telemetry.traced("role")
+    async def develop_feature_plan(self, ideation_results):
         self.feature_plan_output = await DevelopFeaturePlan().run(ideation_results)
+        return self.feature_plan_output
+
+    async def run_actions(self, ideation_results):
+        await self.develop_feature_plan(ideation_results)
@@ -7,7 +7,10 @@
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import hashlib
+import json
+import sys
+from dataclasses import FrozenInstanceError
 from typing import Type, TypedDict
 
 from pydantic import BaseModel
@@ -20,16 +23,105 @@ class RawMessage(TypedDict):
     role: str
 
 
-@dataclass
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
 class Message:
-    """list[<role>: <content>]"""
-    content: str
-    instruct_content: BaseModel = field(default=None)
-    role: str = field(default='user')  # system / user / assistant
-    cause_by: Type["Action"] = field(default="")
-    sent_from: str = field(default="")
-    send_to: str = field(default="")
-    restricted_to: str = field(default="")
+    """list[<role>: <content>]
+
+    Immutable and slotted, with no per-instance __dict__. The role and routing names repeat across many messages,
+    so they are interned. `digest` covers every field; it is computed on first use and cached, and equality and
+    hashing compare digests instead of whole contents. Use `replace` to derive a changed message.
+    """
+    __slots__ = (
+        "content", "instruct_content", "role", "cause_by", "sent_from", "send_to", "restricted_to", "_digest"
+    )
+    _fields = ("content", "instruct_content", "role", "cause_by", "sent_from", "send_to", "restricted_to")
+
+    def __init__(
+        self,
+        content: str,
+        instruct_content: BaseModel = None,
+        role: str = 'user',  # system / user / assistant
+        cause_by: Type["Action"] = "",
+        sent_from: str = "",
+        send_to: str = "",
+        restricted_to: str = "",
+    ):
+        _set = object.__setattr__
+        _set(self, "content", content)
+        _set(self, "instruct_content", instruct_content)
+        _set(self, "role", _intern(role))
+        _set(self, "cause_by", cause_by)
+        _set(self, "sent_from", _intern(sent_from))
+        _set(self, "send_to", _intern(send_to))
+        _set(self, "restricted_to", _intern(restricted_to))
+        _set(self, "_digest", None)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    @property
+    def digest(self) -> str:
+        """blake2b of all the fields, the action class by its qualified name and instruct_content by its values"""
+        if self._digest is None:
+            cause_by = self.cause_by
+            if isinstance(cause_by, type):
+                cause_by = f"{cause_by.__module__}.{cause_by.__qualname__}"
+            instruct = self.instruct_content
+            if hasattr(instruct, "dict"):
+                instruct = instruct.dict()
+            h = hashlib.blake2b(digest_size=16)
+            for value in (self.content, self.role, cause_by, self.sent_from, self.send_to, self.restricted_to):
+                data = str(value).encode("utf-8", "surrogatepass")
+                h.update(len(data).to_bytes(8, "little"))
+                h.update(data)
+            if instruct is not None:
+                h.update(json.dumps(instruct, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+            object.__setattr__(self, "_digest", h.hexdigest())
+        return self._digest
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Message):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def replace(self, **changes) -> Message:
+        """A copy of this message, of the same class, with `changes` applied"""
+        unknown = set(changes) - set(self._fields)
+        if unknown:
+            raise TypeError(f"unknown Message fields: {unknown}")
+        new = object.__new__(type(self))
+        new.__setstate__({**self.__getstate__(), **changes})
+        return new
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __setstate__(self, state: dict):
+        # also restores messages pickled before Message was slotted, whose state is their __dict__
+        defaults = {"instruct_content": None, "role": "user", "cause_by": "", "sent_from": "", "send_to": "",
+                    "restricted_to": ""}
+        _set = object.__setattr__
+        for name in self._fields:
+            value = state.get(name, defaults.get(name))
+            _set(self, name, value if name in ("content", "instruct_content", "cause_by") else _intern(value))
+        _set(self, "_digest", None)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self.replace()
 
     def __str__(self):
         # prefix = '-'.join([self.role, str(self.cause_by)])
@@ -45,31 +137,34 @@ class Message:
         }
 
 
-@dataclass
 class UserMessage(Message):
     """便于支持OpenAI的消息
        Facilitate support for OpenAI messages
     """
+    __slots__ = ()
+
     def __init__(self, content: str):
-        super().__init__(content, 'user')
+        super().__init__(content, role='user')
 
 
-@dataclass
 class SystemMessage(Message):
     """便于支持OpenAI的消息
        Facilitate support for OpenAI messages
     """
+    __slots__ = ()
+
     def __init__(self, content: str):
-        super().__init__(content, 'system')
+        super().__init__(content, role='system')
 
 
-@dataclass
 class AIMessage(Message):
     """便于支持OpenAI的消息
        Facilitate support for OpenAI messages
     """
+    __slots__ = ()
+
     def __init__(self, content: str):
-        super().__init__(content, 'assistant')
+        super().__init__(content, role='assistant')
 
 
 if __name__ == '__main__':
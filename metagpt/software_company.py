@@ -5,6 +5,8 @@
 @Author  : alexanderwu
 @File    : software_company.py
 """
+import time
+
 from pydantic import BaseModel, Field
 
 from metagpt.actions import BossRequirement
@@ -14,6 +16,7 @@ from metagpt.logs import logger
 from metagpt.roles import Role
 from metagpt.schema import Message
 from metagpt.utils.common import NoMoneyException
+from metagpt.utils.telemetry import get_telemetry
 
 
 class SoftwareCompany(BaseModel):
@@ -24,6 +27,7 @@ class SoftwareCompany(BaseModel):
     environment: Environment = Field(default_factory=Environment)
     investment: float = Field(default=10.0)
     idea: str = Field(default="")
+    round_timings: list[float] = Field(default_factory=list, exclude=True)  # seconds taken by each round run
 
     class Config:
         arbitrary_types_allowed = True
@@ -52,12 +56,26 @@ class SoftwareCompany(BaseModel):
         logger.info(self.json())
 
     async def run(self, n_round=3):
-        """Run company until target round or no money"""
-        while n_round > 0:
-            # self._save()
-            n_round -= 1
-            logger.debug(f"{n_round=}")
-            self._check_balance()
-            await self.environment.run()
+        """Run company until target round, no money, or no role has news left.
+
+        Each round runs the roles with news, a role can't hold it up longer than ROLE_TIMEOUT (see
+        `Environment.run`). The time each round took is logged and kept in `round_timings`. The history file is
+        closed at the end, the returned history can still be read.
+        """
+        self.round_timings = []
+        try:
+            for idx in range(1, n_round + 1):
+                # self._save()
+                if self.environment.is_idle():
+                    logger.info(f"No role has news left, stopping after {idx - 1} of {n_round} rounds")
+                    break
+                self._check_balance()
+                start = time.perf_counter()
+                reactions = await self.environment.run()
+                self.round_timings.append(time.perf_counter() - start)
+                logger.info(f"Round {idx}/{n_round} took {self.round_timings[-1]:.2f}s, roles: {reactions}")
+        finally:
+            self.environment.history.close()
+            get_telemetry().log_summary()
         return self.environment.history
     
\ No newline at end of file
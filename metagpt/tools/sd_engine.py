@@ -10,12 +10,12 @@ import os
 from os.path import join
 from typing import List
 
-from aiohttp import ClientSession
 from PIL import Image, PngImagePlugin
 
 from metagpt.config import Config
 from metagpt.const import WORKSPACE_ROOT
 from metagpt.logs import logger
+from metagpt.utils.http_pool import get_http_pool
 
 config = Config()
 
@@ -87,12 +87,11 @@ class SDEngine:
         batch_decode_base64_to_image(imgs, save_dir, save_name=save_name)
 
     async def run_t2i(self, prompts: List):
-        # Asynchronously run the SD API for multiple prompts
-        session = ClientSession()
+        # Asynchronously run the SD API for multiple prompts over the shared keep-alive session
+        session = get_http_pool().session()
         for payload_idx, payload in enumerate(prompts):
             results = await self.run(url=self.sd_t2i_url, payload=payload, session=session)
             self._save(results, save_name=f"output_{payload_idx}")
-        await session.close()
 
     async def run(self, url, payload, session):
         # Perform the HTTP POST request to the SD API
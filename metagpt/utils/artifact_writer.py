@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 22:15
+@File    : artifact_writer.py
+@Desc    : Write artifacts from a thread pool so the event loop never blocks on disk.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Sequence, Union
+
+from metagpt.logs import logger
+
+_collected: ContextVar[Optional[set[Future]]] = ContextVar("artifact_writer_collected", default=None)
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write to a temporary file next to `path` and rename it over `path`, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class ArtifactWriter:
+    """Queue of blocking artifact jobs drained by a thread pool.
+
+    `write_text`, `write_bytes`, `render` and `submit` return at once. Jobs for the same path run in submission
+    order, so the last write wins. Files are not fsynced one by one: `flush` waits for every queued job and then fsyncs the files
+    written since the previous flush, and their directories, in one batch. Await `flush` at the end of a run.
+    When several runs share the writer, `collect` the jobs of each one and `wait` for them to see its failures.
+    """
+
+    def __init__(self, max_workers: int = 4, fsync: bool = True):
+        self.fsync = fsync
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="artifact-writer")
+        self._lock = threading.Lock()
+        self._pending: set[Future] = set()
+        self._tails: dict[Path, Future] = {}
+        self._written: set[Path] = set()
+        self._errors: list[BaseException] = []
+
+    def submit(
+        self, func: Callable[..., Any], *args, path: Optional[Path] = None, after: Sequence[Path] = ()
+    ) -> Future:
+        """Run `func(*args)` in the pool, after the jobs already queued for `path` and for the `after` paths"""
+        with self._lock:
+            previous = [self._tails[i] for i in {path, *after} if i in self._tails]
+            future = self._executor.submit(self._run, previous, func, *args)
+            if path:
+                self._tails[path] = future
+            self._pending.add(future)
+        if (collected := _collected.get()) is not None:
+            collected.add(future)
+        future.add_done_callback(lambda f: self._done(f, path))
+        return future
+
+    @contextmanager
+    def collect(self) -> Iterator[set[Future]]:
+        """Gather the jobs submitted inside the block, and by the tasks it starts, into the yielded set"""
+        futures = set()
+        token = _collected.set(futures)
+        try:
+            yield futures
+        finally:
+            _collected.reset(token)
+
+    async def wait(self, futures: set[Future]):
+        """Wait until the `collect`ed jobs are done. Raises the first of their failures, which `flush` then no
+        longer raises"""
+        if not futures:
+            return
+        await asyncio.gather(*[asyncio.wrap_future(i) for i in futures], return_exceptions=True)
+        failures = [i.exception() for i in futures if not i.cancelled() and i.exception() is not None]
+        if failures:
+            with self._lock:
+                self._errors = [i for i in self._errors if all(i is not j for j in failures)]
+            raise failures[0]
+
+    def render(self, path: Union[str, Path], func: Callable[..., bytes], *args, after: Sequence[Path] = ()) -> Future:
+        """Write the bytes returned by `func(*args)`, rendering them in the pool too"""
+        path = Path(path)
+        return self.submit(self._write, path, func, *args, path=path, after=after)
+
+    def write_bytes(self, path: Union[str, Path], data: bytes) -> Future:
+        return self.render(path, lambda: data)
+
+    def write_text(self, path: Union[str, Path], text: str, encoding: str = "utf-8") -> Future:
+        return self.write_bytes(path, text.encode(encoding))
+
+    @staticmethod
+    def _run(previous: list[Future], func: Callable[..., Any], *args) -> Any:
+        for future in previous:  # started before us, the pool is FIFO, so waiting on them cannot deadlock
+            try:
+                future.result()
+            except BaseException:
+                pass
+        return func(*args)
+
+    def _write(self, path: Path, func: Callable[..., bytes], *args):
+        atomic_write(path, func(*args))
+        self.track(path)
+
+    def track(self, *paths: Path):
+        """Have the next `flush` fsync files a submitted job wrote itself"""
+        with self._lock:
+            self._written.update(paths)
+
+    def _done(self, future: Future, path: Optional[Path]):
+        with self._lock:
+            self._pending.discard(future)
+            if path and self._tails.get(path) is future:
+                del self._tails[path]
+            if not future.cancelled() and future.exception() is not None:
+                self._errors.append(future.exception())
+                logger.error(f"writing artifact {path or ''} failed: {future.exception()}")
+
+    def _sync(self, paths: set[Path]):
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                continue
+        if os.name == "posix":
+            for directory in {i.parent for i in paths}:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+    async def flush(self):
+        """Wait until every queued job is done and the files are on disk. Raises the first failure since the last
+        flush, after the other jobs have completed"""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            await asyncio.gather(*[asyncio.wrap_future(i) for i in pending], return_exceptions=True)
+        with self._lock:
+            written, self._written = self._written, set()
+            errors, self._errors = self._errors, []
+        if self.fsync and written:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._sync, written)
+        if errors:
+            raise errors[0]
+
+
+_artifact_writer: Optional[ArtifactWriter] = None
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Return the process-wide artifact writer"""
+    global _artifact_writer
+    if _artifact_writer is None:
+        _artifact_writer = ArtifactWriter()
+    return _artifact_writer
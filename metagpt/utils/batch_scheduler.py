@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 15:05
+@File    : batch_scheduler.py
+@Desc    : Bounded-concurrency batch scheduler with retries, priorities and streamed results.
+"""
+import asyncio
+import random
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
+
+from metagpt.logs import logger
+
+
+class AdaptiveLimit:
+    """Concurrency gate that halves its limit on throttling errors and grows it back by one on each success"""
+
+    def __init__(self, limit: int):
+        self.max_limit = limit
+        self.limit = limit
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, throttled: bool = False):
+        async with self._cond:
+            self.active -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.max_limit:
+                self.limit += 1
+            self._cond.notify_all()
+
+
+class BatchScheduler:
+    """Run `func` over a batch of items with at most `concurrency` calls in flight.
+
+    Items with a higher priority are started first. Calls failing with one of `retry_on` are retried up to
+    `max_retries` times with exponential backoff and full jitter, and shrink the concurrency limit while the
+    backend is throttling. Results can be consumed as they finish with `as_completed`, or in order with `run`.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 8,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        retry_on: tuple[type[BaseException], ...] = (asyncio.TimeoutError,),
+    ):
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def _call(self, gate: AdaptiveLimit, idx: int, item: Any) -> Any:
+        attempt = 0
+        while True:
+            await gate.acquire()
+            try:
+                result = await self.func(item)
+            except self.retry_on as e:
+                await gate.release(throttled=True)
+                if attempt >= self.max_retries:
+                    logger.error(f"task {idx} failed after {attempt + 1} attempts: {type(e).__name__}")
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning(f"task {idx} got {type(e).__name__}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                await gate.release()
+                raise
+            await gate.release()
+            return result
+
+    async def as_completed(
+        self,
+        items: Sequence[Any],
+        priorities: Optional[Sequence[int]] = None,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Yield (index, result) pairs in completion order.
+
+        When `return_exceptions` is False the first failure is raised and the remaining calls are cancelled,
+        otherwise the exception is yielded in place of the result.
+        """
+        pending = asyncio.PriorityQueue()
+        for idx, item in enumerate(items):
+            pending.put_nowait((-(priorities[idx] if priorities else 0), idx, item))
+        finished = asyncio.Queue()
+        gate = AdaptiveLimit(self.concurrency)
+
+        async def worker():
+            while not pending.empty():
+                _, idx, item = pending.get_nowait()
+                try:
+                    result = await self._call(gate, idx, item)
+                except Exception as e:
+                    result = e
+                finished.put_nowait((idx, result))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(items)))]
+        try:
+            for _ in range(len(items)):
+                idx, result = await finished.get()
+                if isinstance(result, Exception) and not return_exceptions:
+                    raise result
+                yield idx, result
+        finally:
+            for i in workers:
+                i.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run(
+        self,
+        items: Sequence[Any],
+        priorities: Optional[Sequence[int]] = None,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """Return the results in the order of `items`"""
+        results = [None] * len(items)
+        async for idx, result in self.as_completed(items, priorities, return_exceptions):
+            results[idx] = result
+        return results
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 21:05
+@File    : checkpoint.py
+@Desc    : Persist stage outputs of a run so an interrupted run can resume where it stopped.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+from pydantic import BaseModel, create_model
+
+from metagpt.const import WORKSPACE_ROOT
+from metagpt.logs import logger
+
+RUNS_ROOT = WORKSPACE_ROOT / "runs"
+
+
+class RestoredOutput(NamedTuple):
+    """Stand-in for an ActionOutput restored without a factory"""
+
+    content: Any
+    instruct_content: Any
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _encode(value: Any) -> Any:
+    """JSON form of a stage value. ActionOutputs keep their content and the fields of their instruct_content"""
+    if hasattr(value, "content") and hasattr(value, "instruct_content"):
+        instruct = value.instruct_content
+        return {
+            "__action_output__": True,
+            "content": value.content if isinstance(value.content, str) else _encode(value.content),
+            "instruct_content": {"name": type(instruct).__name__, "fields": instruct.dict()} if instruct else None,
+        }
+    if isinstance(value, BaseModel):
+        return value.dict()
+    return value
+
+
+class CheckpointStore:
+    """Stage outputs of one run, stored as JSON files under `workspace/runs/<run_id>/checkpoints`.
+
+    A checkpoint is keyed by the stage name, a fingerprint of how the stage works (its prompt template) and its
+    inputs, so a stage whose inputs or prompt changed runs again while the unchanged ones are restored.
+    `factory(content, instruct_content)` rebuilds restored ActionOutputs, instruct_content being recreated as a
+    pydantic model with the saved fields; without a factory they come back as RestoredOutput.
+    """
+
+    def __init__(self, run_id: str, root: Path = RUNS_ROOT, factory: Optional[Callable[[Any, Any], Any]] = None):
+        self.run_id = run_id
+        self.path = Path(root) / run_id
+        self.factory = factory
+
+    def key(self, stage: str, fingerprint: Any, inputs: list[Any]) -> str:
+        payload = json.dumps([stage, fingerprint, [_encode(i) for i in inputs]], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _file(self, stage: str, key: str) -> Path:
+        return self.path / "checkpoints" / f"{stage}-{key[:16]}.json"
+
+    def load(self, stage: str, key: str) -> tuple[bool, Any]:
+        """Return (True, output) when the stage has a checkpoint for `key`, else (False, None)"""
+        file = self._file(stage, key)
+        try:
+            data = json.loads(file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False, None
+        except (OSError, ValueError) as e:
+            logger.warning(f"ignoring unreadable checkpoint {file}: {e}")
+            return False, None
+        return True, self._decode(data["output"])
+
+    def save(self, stage: str, key: str, output: Any):
+        """Write atomically, so a run killed mid-write never leaves a truncated checkpoint"""
+        file = self._file(stage, key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        data = {"stage": stage, "key": key, "saved_at": time.time(), "output": _encode(output)}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, file)
+
+    def _decode(self, value: Any) -> Any:
+        if not (isinstance(value, dict) and value.get("__action_output__")):
+            return value
+        instruct = value["instruct_content"]
+        if instruct is not None:
+            model = create_model(instruct["name"], **{k: (Any, None) for k in instruct["fields"]})
+            instruct = model(**instruct["fields"])
+        content = self._decode(value["content"])
+        return (self.factory or RestoredOutput)(content, instruct)
+
+    def save_meta(self, **meta):
+        """Keep what is needed to resume the run, such as the user's problem statement"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / "run.json").write_text(json.dumps(meta, ensure_ascii=False, default=str), encoding="utf-8")
+
+    def load_meta(self) -> dict:
+        file = self.path / "run.json"
+        return json.loads(file.read_text(encoding="utf-8")) if file.exists() else {}
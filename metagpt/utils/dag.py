@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 20:30
+@File    : dag.py
+@Desc    : Run a pipeline of async stages as a dependency graph, independent stages concurrently.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from metagpt.logs import logger
+from metagpt.utils.checkpoint import CheckpointStore
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline. `func` is awaited with the values named in `inputs`, in that order, and its result
+    is stored under `output`, which defaults to the stage name. `fingerprint` identifies how the stage produces its
+    output, e.g. its prompt template, and is part of its checkpoint key."""
+
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    inputs: tuple[str, ...] = ()
+    output: Optional[str] = None
+    fingerprint: Any = None
+
+    def __post_init__(self):
+        self.inputs = tuple(self.inputs)
+        self.output = self.output or self.name
+
+
+class DAGExecutor:
+    """Run stages as soon as their inputs are available, with at most `concurrency` stages running at once.
+
+    The graph is checked before anything runs: every input must be an initial value or the output of exactly one
+    stage, and the stages must not form a cycle. The first stage to fail cancels the running ones and its
+    exception is raised. The total time is bound by the critical path of the graph instead of the sum of stages.
+
+    With `checkpoints`, each stage output is saved as soon as the stage finishes, and a stage whose checkpoint
+    exists for the same inputs and fingerprint is restored instead of run.
+    """
+
+    def __init__(self, stages: list[Stage], concurrency: int = 4, checkpoints: Optional[CheckpointStore] = None):
+        self.stages: dict[str, Stage] = {}
+        for stage in stages:
+            self.add(stage)
+        self.concurrency = max(1, concurrency)
+        self.checkpoints = checkpoints
+        self.timings: dict[str, float] = {}
+        self.restored: set[str] = set()
+
+    def add(self, stage: Stage):
+        if stage.name in self.stages:
+            raise ValueError(f"duplicate stage: {stage.name}")
+        self.stages[stage.name] = stage
+
+    def _check(self, initial: dict[str, Any]):
+        producers = {}
+        for stage in self.stages.values():
+            if stage.output in producers or stage.output in initial:
+                raise ValueError(f"{stage.output} is produced more than once")
+            producers[stage.output] = stage.name
+        for stage in self.stages.values():
+            missing = [i for i in stage.inputs if i not in producers and i not in initial]
+            if missing:
+                raise ValueError(f"stage {stage.name} needs {missing}, which nothing produces")
+
+        available, remaining = set(initial), dict(self.stages)
+        while remaining:
+            ready = [i for i in remaining.values() if all(j in available for j in i.inputs)]
+            if not ready:
+                raise ValueError(f"stages {sorted(remaining)} form a cycle")
+            for stage in ready:
+                available.add(stage.output)
+                del remaining[stage.name]
+
+    async def _run_stage(self, stage: Stage, values: dict[str, Any], gate: asyncio.Semaphore) -> Any:
+        inputs = [values[i] for i in stage.inputs]
+        loop = asyncio.get_running_loop()
+        key = None
+        if self.checkpoints:
+            key = self.checkpoints.key(stage.name, stage.fingerprint, inputs)
+            found, result = await loop.run_in_executor(None, self.checkpoints.load, stage.name, key)
+            if found:
+                logger.info(f"stage {stage.name} restored from checkpoint")
+                self.restored.add(stage.name)
+                return result
+        async with gate:
+            logger.info(f"stage {stage.name} started")
+            start = time.perf_counter()
+            result = await stage.func(*inputs)
+            self.timings[stage.name] = time.perf_counter() - start
+            logger.info(f"stage {stage.name} finished in {self.timings[stage.name]:.1f}s")
+        if self.checkpoints:
+            await loop.run_in_executor(None, self.checkpoints.save, stage.name, key, result)
+        return result
+
+    async def run(self, initial: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """Run every stage and return the initial values together with all stage outputs"""
+        values = dict(initial or {})
+        self._check(values)
+        gate = asyncio.Semaphore(self.concurrency)
+        pending = dict(self.stages)
+        running: dict[asyncio.Task, Stage] = {}
+        try:
+            while pending or running:
+                for stage in [i for i in pending.values() if all(j in values for j in i.inputs)]:
+                    del pending[stage.name]
+                    running[asyncio.create_task(self._run_stage(stage, values, gate))] = stage
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    values[stage.output] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        return values
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 22:50
+@File    : empathy_map_renderer.py
+@Desc    : Render empathy maps to PNG in a process pool, or to SVG, skipping unchanged maps.
+"""
+import functools
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+from metagpt.utils.artifact_writer import ArtifactWriter, atomic_write, get_artifact_writer
+from metagpt.utils.common import OutputParser
+
+SECTIONS = ("Thoughts", "Feelings", "Pain Points", "Goals")
+WIDTH, HEIGHT = 1024, 768
+LINE_HEIGHT = 20
+# (title, first content line) of each quadrant
+POSITIONS = {
+    "Thoughts": ((10, 10), (10, 50)),
+    "Feelings": ((10, 384), (10, 420)),
+    "Pain Points": ((512, 10), (512, 50)),
+    "Goals": ((512, 384), (512, 420)),
+}
+LAYOUT_VERSION = 1  # bump when the drawing changes, so cached renders are redone
+
+
+def parse_empathy_map(text: str) -> dict[str, str]:
+    """Sections of an empathy map, each a newline separated list of points.
+
+    Reads the markdown layout, a "Thoughts:" line followed by "- " points, and falls back to the JSON answer of the
+    empathy map prompt, {"Empathy Map": {"Thoughts": ...}}.
+    """
+    empathy_map = {}
+    current_section = None
+    for line in text.splitlines():
+        if line.startswith(tuple(f"{i}:" for i in SECTIONS)):
+            current_section = line.strip().split(":")[0]
+            empathy_map[current_section] = ""
+        elif current_section and line.startswith("- "):
+            empathy_map[current_section] += line[2:].strip() + "\n"
+    if empathy_map:
+        return empathy_map
+
+    try:
+        data = OutputParser.extract_struct(text, dict)
+    except Exception:
+        return {}
+    data = data.get("Empathy Map", data) if isinstance(data, dict) else {}
+    for section in SECTIONS:
+        points = data.get(section)
+        if isinstance(points, list):
+            points = "\n".join(str(i) for i in points)
+        if points:
+            empathy_map[section] = f"{points}\n"
+    return empathy_map
+
+
+def content_hash(empathy_map: dict[str, str], fmt: str) -> str:
+    payload = json.dumps([LAYOUT_VERSION, fmt, empathy_map], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=8)
+def load_font(size: int = 14) -> ImageFont.ImageFont:
+    """Loaded once per process and size, pool workers keep it between renders"""
+    try:
+        return ImageFont.truetype("arial.ttf", size=size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+def render_png(empathy_map: dict[str, str]) -> bytes:
+    """Draw the four quadrants on a white 1024x768 image. Module level, so it can run in a process pool"""
+    img = Image.new("RGB", (WIDTH, HEIGHT), color="white")
+    draw = ImageDraw.Draw(img)
+    font = load_font()
+    for section, (title, content) in POSITIONS.items():
+        draw.text(title, section, font=font, fill="black")
+        x, y = content
+        for line in empathy_map.get(section, "").split("\n"):
+            draw.text((x, y), line, font=font, fill="black")
+            y += LINE_HEIGHT
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_svg(empathy_map: dict[str, str]) -> bytes:
+    """Same layout as the PNG as SVG text, cheap enough to render anywhere"""
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+        f'font-family="Arial, sans-serif" font-size="14">',
+        f'<rect width="{WIDTH}" height="{HEIGHT}" fill="white"/>',
+    ]
+    for section, ((tx, ty), (cx, cy)) in POSITIONS.items():
+        lines.append(f'<text x="{tx}" y="{ty + 14}" font-weight="bold">{escape(section)}</text>')
+        for idx, line in enumerate(empathy_map.get(section, "").split("\n")):
+            if line:
+                lines.append(f'<text x="{cx}" y="{cy + 14 + idx * LINE_HEIGHT}">{escape(line)}</text>')
+    lines.append("</svg>")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _warm_up():
+    load_font()
+
+
+class EmpathyMapRenderer:
+    """Render empathy maps next to their markdown without holding up the caller.
+
+    PNGs are drawn in a process pool, SVGs in the artifact writer's threads. Writing goes through the artifact
+    writer, so `ArtifactWriter.flush` also waits for the renders. The content hash of each render is kept in a
+    `.<name>.sha256` file beside it, and a map whose hash did not change is not rendered again.
+    """
+
+    def __init__(self, formats: tuple[str, ...] = ("png",), max_workers: int = 2, writer: ArtifactWriter = None):
+        unknown = set(formats) - {"png", "svg"}
+        if unknown:
+            raise ValueError(f"unknown empathy map formats: {unknown}")
+        self.formats = formats
+        self.max_workers = max_workers
+        self.writer = writer or get_artifact_writer()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.max_workers, initializer=_warm_up)
+            return self._pool
+
+    def render(self, empathy_map: dict[str, str], path: Path):
+        """Queue the renders of `empathy_map` to `path` with the suffix of each format"""
+        for fmt in self.formats:
+            output = Path(path).with_suffix(f".{fmt}")
+            self.writer.submit(self._render, empathy_map, fmt, output, path=output)
+
+    def _render(self, empathy_map: dict[str, str], fmt: str, output: Path):
+        digest = content_hash(empathy_map, fmt)
+        stamp = output.with_name(f".{output.name}.sha256")
+        if output.exists() and stamp.exists() and stamp.read_text() == digest:
+            logger.debug(f"{output} is up to date")
+            return
+        data = self._render_png(empathy_map) if fmt == "png" else render_svg(empathy_map)
+        stamp.unlink(missing_ok=True)
+        atomic_write(output, data)
+        atomic_write(stamp, digest.encode("utf-8"))
+        self.writer.track(output, stamp)
+
+    def _render_png(self, empathy_map: dict[str, str]) -> bytes:
+        try:
+            return self.pool.submit(render_png, empathy_map).result()
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"empathy map process pool unavailable, rendering in a thread: {e}")
+            self.shutdown()
+            return render_png(empathy_map)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+_renderer: Optional[EmpathyMapRenderer] = None
+
+
+def get_empathy_map_renderer() -> EmpathyMapRenderer:
+    """Return the process-wide renderer for the EMPATHY_MAP_FORMATS"""
+    global _renderer
+    if _renderer is None:
+        _renderer = EmpathyMapRenderer(tuple(CONFIG.empathy_map_formats))
+    return _renderer
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 12:30
+@File    : http_pool.py
+@Desc    : Pooled keep-alive aiohttp sessions shared by LLM providers and tools.
+"""
+import asyncio
+from typing import Iterable, Optional
+
+import aiohttp
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+
+
+class HTTPSessionPool:
+    """Hands out one shared `aiohttp.ClientSession` per event loop.
+
+    The session's connector keeps connections alive between calls, caches DNS lookups and caps the number of
+    connections in total and per host, so repeated calls to the same API skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 20, keepalive_timeout: float = 30, dns_ttl: int = 300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session of the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        for stale in [i for i in self._sessions if i.is_closed()]:
+            del self._sessions[stale]
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[loop] = session
+        return session
+
+    async def warm_up(self, urls: Iterable[str]):
+        """Open a connection to each url ahead of time so the first real call skips the handshake."""
+
+        async def _touch(url):
+            try:
+                async with self.session().head(url, allow_redirects=False, proxy=CONFIG.global_proxy) as rsp:
+                    logger.debug(f"warmed up {url}: {rsp.status}")
+            except aiohttp.ClientError as e:
+                logger.warning(f"failed to warm up {url}: {e}")
+
+        await asyncio.gather(*[_touch(url) for url in urls if url])
+
+    async def close(self):
+        """Close the session of the running event loop."""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+
+_http_pool: Optional[HTTPSessionPool] = None
+
+
+def get_http_pool() -> HTTPSessionPool:
+    """Return the process-wide session pool, configured from the HTTP_POOL_* settings."""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HTTPSessionPool(
+            limit=int(CONFIG.http_pool_limit),
+            limit_per_host=int(CONFIG.http_pool_limit_per_host),
+            keepalive_timeout=float(CONFIG.http_pool_keepalive_timeout),
+            dns_ttl=int(CONFIG.http_pool_dns_ttl),
+        )
+    return _http_pool
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 10:05
+@File    : llm_cache.py
+@Desc    : Persistent, content-addressed cache of LLM responses.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+
+
+class LLMCache:
+    """On-disk LLM response cache backed by SQLite.
+
+    Entries are keyed by a digest of the full request (model, messages, sampling parameters). They expire
+    `ttl` seconds after being written and are evicted least-recently-used once the store holds more than
+    `max_entries` rows or more than `max_size` bytes of response text. A value of 0 disables the limit.
+    """
+
+    def __init__(self, path: Path, ttl: int = 0, max_entries: int = 0, max_size: int = 0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def make_key(request: dict) -> str:
+        """Return the content address of a request, independent of dict ordering."""
+        raw = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str, model: str = ""):
+        """Store a response and evict entries that exceed the configured limits."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if self.max_entries and count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self.max_size and size > self.max_size:
+            stale = []
+            for key, entry_size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                if size <= self.max_size:
+                    break
+                stale.append((key,))
+                size -= entry_size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide response cache, or None when LLM_CACHE is disabled."""
+    global _llm_cache
+    if not CONFIG.llm_cache:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMCache(
+            CONFIG.llm_cache_path,
+            ttl=int(CONFIG.llm_cache_ttl),
+            max_entries=int(CONFIG.llm_cache_max_entries),
+            max_size=int(CONFIG.llm_cache_max_size),
+        )
+        logger.info(f"LLM response cache enabled at {_llm_cache.path}")
+    return _llm_cache
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 11:20
+@File    : rate_limiter.py
+@Desc    : Process-wide token-bucket limiter for requests per minute and tokens per minute.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+
+
+class TokenBucket:
+    """A bucket holding up to `capacity` tokens, refilled continuously over `period` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available. Requests larger than the bucket wait for a full bucket."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class TokenBucketLimiter:
+    """Async limiter combining a requests-per-minute and a tokens-per-minute bucket.
+
+    Callers are admitted strictly in arrival order: the head of the queue holds the lock while it sleeps, so a
+    small request can never overtake a large one that is waiting for budget. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, period: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm, period) if rpm else None
+        self._tokens = TokenBucket(tpm, period) if tpm else None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens and tokens:
+            wait = max(wait, self._tokens.wait_time(tokens))
+        return wait
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request and `tokens` tokens fit in the budget, then reserve them."""
+        async with self._get_lock():
+            while (wait := self._wait_time(tokens)) > 0:
+                logger.debug(f"rate limited, sleep {wait:.2f}s for {tokens} tokens")
+                await asyncio.sleep(wait)
+            if self._requests:
+                self._requests.consume(1)
+            if self._tokens and tokens:
+                self._tokens.consume(tokens)
+
+    def refund(self, tokens: int):
+        """Return reserved tokens that the call did not actually use."""
+        if self._tokens and tokens > 0:
+            self._tokens.refund(tokens)
+
+
+_rate_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """Return the limiter shared by every LLM client in this process, built from RPM and TPM."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketLimiter(rpm=int(CONFIG.openai_api_rpm or 0), tpm=int(CONFIG.openai_api_tpm or 0))
+    return _rate_limiter
@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 # @Desc   : the implement of serialization and deserialization
 
-import copy
 import pickle
 from typing import Dict, List
 
@@ -43,15 +42,15 @@ def actionoutout_schema_to_mapping(schema: Dict) -> Dict:
 
 
 def serialize_message(message: Message):
-    message_cp = copy.deepcopy(message)  # avoid `instruct_content` value update by reference
-    ic = message_cp.instruct_content
+    ic = message.instruct_content
     if ic:
         # model create by pydantic create_model like `pydantic.main.prd`, can't pickle.dump directly
         schema = ic.schema()
         mapping = actionoutout_schema_to_mapping(schema)
 
-        message_cp.instruct_content = {"class": schema["title"], "mapping": mapping, "value": ic.dict()}
-    msg_ser = pickle.dumps(message_cp)
+        # Message is immutable, the copy leaves the original `instruct_content` untouched
+        message = message.replace(instruct_content={"class": schema["title"], "mapping": mapping, "value": ic.dict()})
+    msg_ser = pickle.dumps(message)
 
     return msg_ser
 
@@ -62,6 +61,6 @@ def deserialize_message(message_ser: str) -> Message:
         ic = message.instruct_content
         ic_obj = ActionOutput.create_model_class(class_name=ic["class"], mapping=ic["mapping"])
         ic_new = ic_obj(**ic["value"])
-        message.instruct_content = ic_new
+        message = message.replace(instruct_content=ic_new)
 
     return message
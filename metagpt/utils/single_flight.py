@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 16:10
+@File    : single_flight.py
+@Desc    : Coalesce identical concurrent calls into one in-flight call.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers that use the same key.
+
+    The first caller of a key starts the call, every caller arriving before it finishes awaits the same task and
+    gets the same result or exception. A caller being cancelled does not cancel the call for the others.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._inflight: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `func()`, or the call already running under `key`."""
+        flight = (asyncio.get_running_loop(), key)
+        task = self._inflight.get(flight)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[flight] = task
+            task.add_done_callback(lambda t: self._done(flight, t))
+        else:
+            self.hits += 1
+            logger.debug(f"joined in-flight call: {key}")
+        return await asyncio.shield(task)
+
+    def _done(self, flight: tuple, task: asyncio.Task):
+        self._inflight.pop(flight, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here too, in case every caller was cancelled
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Return the process-wide coalescer, or None when LLM_COALESCE is disabled."""
+    global _single_flight
+    if not CONFIG.llm_coalesce:
+        return None
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
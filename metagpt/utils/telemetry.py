@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 17:45
+@File    : telemetry.py
+@Desc    : Per-call LLM telemetry attributed to the calling Role and Action.
+"""
+import functools
+import inspect
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from metagpt.config import CONFIG
+from metagpt.logs import logger
+
+_role: ContextVar[str] = ContextVar("telemetry_role", default="")
+_action: ContextVar[str] = ContextVar("telemetry_action", default="")
+_call: ContextVar[Optional["CallRecord"]] = ContextVar("telemetry_call", default=None)
+
+
+@dataclass
+class CallRecord:
+    role: str
+    action: str
+    provider: str
+    model: str
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+    time_to_first_token: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    retries: int = 0
+    cache_hit: bool = False
+    error: str = ""
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    latency: float = 0.0
+    time_to_first_token: float = 0.0
+    streamed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    def add(self, record: CallRecord):
+        self.calls += 1
+        self.errors += bool(record.error)
+        self.cache_hits += record.cache_hit
+        self.retries += record.retries
+        self.latency += record.latency
+        if record.time_to_first_token is not None:
+            self.time_to_first_token += record.time_to_first_token
+            self.streamed += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost += record.cost
+
+
+class Telemetry:
+    """Collects one CallRecord per LLM call.
+
+    Records are aggregated in memory per (role, action, provider, model). Recording does no I/O, so it is cheap on
+    the event loop: records are buffered and `flush` appends them to a JSONL file when `jsonl_path` is set and
+    rewrites the aggregates as a Prometheus textfile when `prometheus_path` is set. A flush is started in a
+    background thread once `flush_size` records are buffered or `flush_interval` seconds have passed since the
+    last one, so long runs neither grow the buffer nor leave the exports stale. `log_summary` flushes the rest.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+        flush_size: int = 100,
+        flush_interval: float = 10.0,
+    ):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.stats: dict[tuple[str, str, str, str], CallStats] = {}
+        self._pending: list[CallRecord] = []
+        self._flushed_at = time.monotonic()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._last_write: Optional[Future] = None
+        for path in (self.jsonl_path, self.prometheus_path):
+            if path:
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, record: CallRecord):
+        key = (record.role, record.action, record.provider, record.model)
+        self.stats.setdefault(key, CallStats()).add(record)
+        if self.jsonl_path or self.prometheus_path:
+            self._pending.append(record)
+            if len(self._pending) >= self.flush_size or time.monotonic() - self._flushed_at >= self.flush_interval:
+                self.flush(wait=False)
+
+    def flush(self, wait: bool = True):
+        """Write the records made since the last flush to the exporters. Writes run in order on one background
+        thread, with `wait` the call returns once every write started so far is done"""
+        pending, self._pending = self._pending, []
+        self._flushed_at = time.monotonic()
+        if pending:
+            # the aggregates keep changing on the caller's thread, render them here and only write in the background
+            prometheus = self.prometheus_text() if self.prometheus_path else None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(1, thread_name_prefix="telemetry")
+            self._last_write = self._executor.submit(self._write, pending, prometheus)
+        if wait and self._last_write:
+            self._last_write.result()
+
+    def _write(self, pending: list[CallRecord], prometheus: Optional[str]):
+        try:
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(asdict(i), ensure_ascii=False) + "\n" for i in pending)
+            if prometheus is not None:
+                tmp = self.prometheus_path.with_suffix(".tmp")
+                tmp.write_text(prometheus, encoding="utf-8")
+                os.replace(tmp, self.prometheus_path)  # atomically, for the node_exporter textfile collector
+        except OSError as e:
+            logger.error(f"writing telemetry failed: {e}")
+
+    def prometheus_text(self) -> str:
+        """The aggregates in the Prometheus text exposition format"""
+        metrics = [
+            ("llm_calls_total", "counter", "LLM calls", lambda s: s.calls),
+            ("llm_errors_total", "counter", "LLM calls that raised", lambda s: s.errors),
+            ("llm_cache_hits_total", "counter", "LLM calls served from the response cache", lambda s: s.cache_hits),
+            ("llm_retries_total", "counter", "Retries and failovers of LLM calls", lambda s: s.retries),
+            ("llm_latency_seconds_total", "counter", "Wall-clock time spent in LLM calls", lambda s: s.latency),
+            ("llm_prompt_tokens_total", "counter", "Prompt tokens", lambda s: s.prompt_tokens),
+            ("llm_completion_tokens_total", "counter", "Completion tokens", lambda s: s.completion_tokens),
+            ("llm_cost_usd_total", "counter", "Cost of LLM calls in USD", lambda s: s.cost),
+        ]
+        lines = []
+        for name, kind, doc, value in metrics:
+            lines.append(f"# HELP metagpt_{name} {doc}")
+            lines.append(f"# TYPE metagpt_{name} {kind}")
+            for (role, action, provider, model), stats in self.stats.items():
+                labels = f'role="{role}",action="{action}",provider="{provider}",model="{model}"'
+                lines.append(f"metagpt_{name}{{{labels}}} {value(stats)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Table of calls, time and spend per role and action, most expensive in wall-clock time first"""
+        rows = {}
+        for (role, action, _, _), stats in self.stats.items():
+            rows.setdefault((role or "-", action or "-"), CallStats())
+            total = rows[(role or "-", action or "-")]
+            for name in CallStats.__dataclass_fields__:
+                setattr(total, name, getattr(total, name) + getattr(stats, name))
+        header = f"{'role':<24}{'action':<28}{'calls':>6}{'cached':>7}{'errors':>7}{'time(s)':>9}{'ttft(s)':>9}" \
+                 f"{'prompt':>9}{'compl':>8}{'cost($)':>9}"
+        lines = [header, "-" * len(header)]
+        for (role, action), s in sorted(rows.items(), key=lambda i: -i[1].latency):
+            ttft = s.time_to_first_token / s.streamed if s.streamed else 0.0
+            lines.append(
+                f"{role[:23]:<24}{action[:27]:<28}{s.calls:>6}{s.cache_hits:>7}{s.errors:>7}{s.latency:>9.1f}"
+                f"{ttft:>9.2f}{s.prompt_tokens:>9}{s.completion_tokens:>8}{s.cost:>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def log_summary(self):
+        self.flush()
+        if self.stats:
+            logger.info(f"LLM usage by role and action:\n{self.summary()}")
+
+
+@contextmanager
+def scope(role: Optional[str] = None, action: Optional[str] = None):
+    """Attribute the LLM calls made inside the block to `role` and/or `action`"""
+    tokens = []
+    if role is not None:
+        tokens.append((_role, _role.set(role)))
+    if action is not None:
+        tokens.append((_action, _action.set(action)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def traced(kind: str):
+    """Decorate an async Role or Action method so the calls it makes are attributed to its profile or class"""
+
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if kind == "role":
+                context = scope(role=getattr(self, "profile", "") or type(self).__name__)
+            else:
+                context = scope(action=type(self).__name__)
+            with context:
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def track(provider: str, model: str, bind: bool = True) -> Iterator[CallRecord]:
+    """Measure one LLM call. Nested calls, e.g. a router calling a backend, share the outer record.
+
+    Async generators should pass `bind=False` and wrap their non-yielding bookkeeping in `attach`, since a context
+    variable set across a `yield` may be reset from another context when the generator is closed.
+    """
+    current = _call.get()
+    if current is not None:
+        current.provider, current.model = provider, model
+        yield current
+        return
+    record = CallRecord(role=_role.get(), action=_action.get(), provider=provider, model=model)
+    token = _call.set(record) if bind else None
+    start = time.perf_counter()
+    try:
+        yield record
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        if token:
+            _call.reset(token)
+        record.latency = time.perf_counter() - start
+        get_telemetry().record(record)
+
+
+@contextmanager
+def attach(record: CallRecord):
+    """Make `record` the current call inside the block"""
+    token = _call.set(record)
+    try:
+        yield record
+    finally:
+        _call.reset(token)
+
+
+def current_call() -> Optional[CallRecord]:
+    return _call.get()
+
+
+def add_usage(prompt_tokens: int, completion_tokens: int, cost: float):
+    if record := _call.get():
+        record.prompt_tokens += prompt_tokens
+        record.completion_tokens += completion_tokens
+        record.cost += cost
+
+
+def note_retry(*_):
+    """Count a retry on the current call, usable as a tenacity `before_sleep` callback"""
+    if record := _call.get():
+        record.retries += 1
+
+
+_telemetry: Optional[Telemetry] = None
+
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide telemetry, exporting to TELEMETRY_JSONL_PATH and TELEMETRY_PROMETHEUS_PATH"""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry(
+            CONFIG.telemetry_jsonl_path,
+            CONFIG.telemetry_prometheus_path,
+            flush_interval=float(CONFIG.telemetry_flush_interval),
+        )
+    return _telemetry
@@ -1,11 +1,14 @@
-from typing import Generator, Sequence
+from typing import Generator, Optional, Sequence, TextIO, Union
 
-from metagpt.utils.token_counter import TOKEN_MAX, count_string_tokens
+from metagpt.utils.token_counter import TOKEN_MAX, TOKENIZERS, count_string_tokens
 
 
 def reduce_message_length(msgs: Generator[str, None, None], model_name: str, system_text: str, reserved: int = 0,) -> str:
     """Reduce the length of concatenated message segments to fit within the maximum token size.
 
+    The candidates are searched with doubling steps and then bisected, so only O(log n) of them are tokenized and
+    the generator is consumed no further than twice the index of the answer.
+
     Args:
         msgs: A generator of strings representing progressively shorter valid prompts.
         model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
@@ -19,56 +22,239 @@ def reduce_message_length(msgs: Generator[str, None, None], model_name: str, sys
         RuntimeError: If it fails to reduce the concatenated message length.
     """
     max_token = TOKEN_MAX.get(model_name, 2048) - count_string_tokens(system_text, model_name) - reserved
-    for msg in msgs:
-        if count_string_tokens(msg, model_name) < max_token:
-            return msg
+    msgs = iter(msgs)
+    candidates: list[str] = []
+
+    def get(idx: int) -> Optional[str]:
+        """The idx-th candidate, pulled from `msgs` only when first needed, None past the last one"""
+        while len(candidates) <= idx:
+            msg = next(msgs, None)
+            if msg is None:
+                return None
+            candidates.append(msg)
+        return candidates[idx]
+
+    def fits(idx: int) -> bool:
+        return count_string_tokens(candidates[idx], model_name) < max_token
+
+    # candidates before lo are too long; double the step until one fits or the generator runs out
+    lo, idx, step = 0, 0, 1
+    while get(idx) is not None and not fits(idx):
+        lo = idx + 1
+        idx += step
+        step *= 2
+    hi = min(idx, len(candidates))  # candidates[hi] fits, or hi is past the last candidate
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    if lo < len(candidates):
+        return candidates[lo]
 
     raise RuntimeError("fail to reduce message length")
 
 
+def fit_message(
+    text: str, model_name: str, system_text: str, reserved: int = 0, strategy: str = "middle"
+) -> tuple[str, int]:
+    """Truncate a message so it fits in the context window next to the system prompts.
+
+    Args:
+        text: The message to truncate.
+        model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
+        system_text: The system prompts.
+        reserved: The number of reserved tokens.
+        strategy: The part of the text to keep, see `truncate_text`.
+
+    Returns:
+        The truncated message and its number of tokens.
+    """
+    max_token = TOKEN_MAX.get(model_name, 2048) - count_string_tokens(system_text, model_name) - reserved
+    return truncate_text(text, model_name, max_token, strategy)
+
+
+def truncate_text(
+    text: str, model_name: str, max_token: int, strategy: str = "head", marker: str = "\n...\n"
+) -> tuple[str, int]:
+    """Truncate a text to at most `max_token` tokens.
+
+    The text is tokenized once and cut on token offsets. The cut text is re-encoded to get its exact number of
+    tokens, and if joining the pieces made it longer than `max_token`, the number of kept tokens is binary searched.
+
+    Args:
+        text: The text to truncate.
+        model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
+        max_token: The maximum number of tokens.
+        strategy: "head" keeps the beginning of the text, "tail" keeps the end, "middle" keeps both ends and
+            replaces the middle with `marker`.
+        marker: The text standing in for the elided middle.
+
+    Returns:
+        The truncated text and its number of tokens.
+    """
+    if strategy not in ("head", "tail", "middle"):
+        raise ValueError(f"Unknown truncation strategy: {strategy}")
+    encoding = TOKENIZERS.encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_token:
+        return text, len(tokens)
+    pieces = encoding.decode_tokens_bytes(tokens)
+    marker_tokens = len(encoding.encode(marker, disallowed_special=())) if strategy == "middle" else 0
+
+    def cut(kept: int) -> tuple[str, int]:
+        if strategy == "head":
+            candidate = _join(pieces[: _align_back(pieces, kept)])
+        elif strategy == "tail":
+            candidate = _join(pieces[_align(pieces, len(pieces) - kept):])
+        else:
+            head = _align_back(pieces, kept - kept // 2)
+            tail = _align(pieces, len(pieces) - kept // 2)
+            candidate = _join(pieces[:head]) + marker + _join(pieces[tail:])
+        return candidate, len(encoding.encode(candidate, disallowed_special=()))
+
+    lo, hi = 0, max(0, max_token - marker_tokens)
+    best = cut(hi)
+    if best[1] <= max_token:
+        return best
+    best = cut(lo)
+    while lo < hi - 1:
+        mid = (lo + hi) // 2
+        candidate = cut(mid)
+        if candidate[1] <= max_token:
+            lo, best = mid, candidate
+        else:
+            hi = mid
+    return best
+
+
 def generate_prompt_chunk(
-    text: str,
+    text: Union[str, TextIO],
     prompt_template: str,
     model_name: str,
     system_text: str,
     reserved: int = 0,
+    overlap: int = 0,
 ) -> Generator[str, None, None]:
     """Split the text into chunks of a maximum token size.
 
     Args:
-        text: The text to split.
+        text: The text to split, or a file-like object to stream it from.
         prompt_template: The template for the prompt, containing a single `{}` placeholder. For example, "### Reference\n{}".
         model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
         system_text: The system prompts.
         reserved: The number of reserved tokens.
+        overlap: The number of tokens repeated at the start of each chunk from the end of the previous one.
 
     Yields:
         The chunk of text.
     """
-    paragraphs = text.splitlines(keepends=True)
-    current_token = 0
-    current_lines = []
-
-    reserved = reserved + count_string_tokens(prompt_template+system_text, model_name)
+    reserved = reserved + count_string_tokens(prompt_template + system_text, model_name)
     # 100 is a magic number to ensure the maximum context length is not exceeded
-    max_token = TOKEN_MAX.get(model_name, 2048) - reserved - 100  
-
-    while paragraphs:
-        paragraph = paragraphs.pop(0)
-        token = count_string_tokens(paragraph, model_name)
-        if current_token + token <= max_token:
-            current_lines.append(paragraph)
-            current_token += token
-        elif token > max_token:
-            paragraphs = split_paragraph(paragraph) + paragraphs
-            continue
-        else:
-            yield prompt_template.format("".join(current_lines))
-            current_lines = [paragraph]
-            current_token = token
+    max_token = TOKEN_MAX.get(model_name, 2048) - reserved - 100
+
+    for chunk in split_text_by_tokens(text, model_name, max_token, overlap):
+        yield prompt_template.format(chunk)
+
+
+def split_text_by_tokens(
+    source: Union[str, TextIO],
+    model_name: str,
+    max_token: int,
+    overlap: int = 0,
+    block_size: int = 1 << 20,
+) -> Generator[str, None, None]:
+    """Split a text into chunks of at most `max_token` tokens.
+
+    The text is encoded once and cut on token offsets, preferably after a line break, else after a sentence end,
+    found in the second half of the chunk. File-like sources are read `block_size` characters at a time, so only
+    one block and one unfinished chunk are held in memory.
+
+    Args:
+        source: The text, or a file-like object opened in text mode.
+        model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
+        max_token: The maximum number of tokens of a chunk.
+        overlap: The number of tokens repeated at the start of each chunk from the end of the previous one.
+        block_size: The number of characters read from a file-like source at a time.
+
+    Yields:
+        The chunks of text.
+    """
+    if max_token <= 0:
+        raise ValueError(f"max_token must be positive, got {max_token}")
+    overlap = min(max(overlap, 0), max_token // 2)
+    encoding = TOKENIZERS.encoding(model_name)
+    pending = ""
+    for block, last in _read_blocks(source, block_size):
+        pieces = encoding.decode_tokens_bytes(encoding.encode(pending + block, disallowed_special=()))
+        start = 0
+        # Away from the end of the input, keep the last chunk pending: the text that follows may change its tokens
+        while start < len(pieces) and (last or len(pieces) - start > max_token):
+            end = start + max_token
+            if end >= len(pieces):
+                end = len(pieces)
+            else:
+                end = _find_cut(pieces, start, end)
+            yield _join(pieces[start:end])
+            if end == len(pieces):
+                start = end
+                break
+            start = max(_align(pieces, end - overlap), start + 1)
+        pending = _join(pieces[start:])
+
+
+_SENTENCE_ENDS = tuple(i.encode("utf-8") for i in (".", "!", "?", ";", "。", "！", "？", "；"))
+
+
+def _is_char_start(piece: bytes) -> bool:
+    """Whether a token starts on a character boundary, multi-byte characters may span several tokens"""
+    return not piece or piece[0] & 0xC0 != 0x80
+
+
+def _align(pieces: list[bytes], idx: int) -> int:
+    while idx < len(pieces) and not _is_char_start(pieces[idx]):
+        idx += 1
+    return idx
+
+
+def _align_back(pieces: list[bytes], idx: int) -> int:
+    while 0 < idx < len(pieces) and not _is_char_start(pieces[idx]):
+        idx -= 1
+    return idx
+
+
+def _join(pieces: list[bytes]) -> str:
+    return b"".join(pieces).decode("utf-8", "ignore")
+
+
+def _find_cut(pieces: list[bytes], start: int, end: int) -> int:
+    """Return the token index to end a chunk at, looking back from `end` no further than the middle of the chunk"""
+    floor = start + (end - start) // 2
+    for ends in ((b"\n",), _SENTENCE_ENDS):
+        for idx in range(end, floor, -1):
+            if pieces[idx - 1].rstrip(b" \t").endswith(ends) and _is_char_start(pieces[idx]):
+                return idx
+    while end > start + 1 and not _is_char_start(pieces[end]):
+        end -= 1
+    return end
+
 
-    if current_lines:
-        yield prompt_template.format("".join(current_lines))
+def _read_blocks(source: Union[str, TextIO], block_size: int) -> Generator[tuple[str, bool], None, None]:
+    """Yield (text, is_last) blocks of a text or file-like object, breaking file blocks after their last line break"""
+    if isinstance(source, str):
+        yield source, True
+        return
+    carry = ""
+    block = source.read(block_size)
+    while block:
+        following = source.read(block_size)
+        text = carry + block
+        if following:
+            cut = text.rfind("\n") + 1 or len(text)
+            text, carry = text[:cut], text[cut:]
+        yield text, not following
+        block = following
 
 
 def split_paragraph(paragraph: str, sep: str = ".,", count: int = 2) -> list[str]:
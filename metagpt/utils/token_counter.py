@@ -8,8 +8,16 @@ ref1: https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_
 ref2: https://github.com/Significant-Gravitas/Auto-GPT/blob/master/autogpt/llm/token_counter.py
 ref3: https://github.com/hwchase17/langchain/blob/master/langchain/chat_models/openai.py
 """
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 import tiktoken
 
+from metagpt.logs import logger
+
 TOKEN_COSTS = {
     "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
     "gpt-3.5-turbo-0301": {"prompt": 0.0015, "completion": 0.002},
@@ -22,6 +30,8 @@ TOKEN_COSTS = {
     "gpt-4-32k-0314": {"prompt": 0.06, "completion": 0.12},
     "gpt-4-0613": {"prompt": 0.06, "completion": 0.12},
     "text-embedding-ada-002": {"prompt": 0.0004, "completion": 0.0},
+    "claude-instant-1": {"prompt": 0.00163, "completion": 0.00551},
+    "claude-2": {"prompt": 0.01102, "completion": 0.03268},
 }
 
 
@@ -37,16 +47,96 @@ TOKEN_MAX = {
     "gpt-4-32k-0314": 32768,
     "gpt-4-0613": 8192,
     "text-embedding-ada-002": 8192,
+    "claude-instant-1": 100000,
+    "claude-2": 100000,
 }
 
 
-def count_message_tokens(messages, model="gpt-3.5-turbo-0613"):
-    """Return the number of tokens used by a list of messages."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+class TokenizerRegistry:
+    """Resolves the tiktoken encoding of each model once and caches token counts.
+
+    Counts are kept in a bounded LRU keyed by encoding name and a digest of the text, so the long system prompts
+    and conversation histories that are counted again on every call are only encoded once.
+    """
+
+    def __init__(self, max_cached_counts: int = 4096):
+        self.max_cached_counts = max_cached_counts
+        self.hits = 0
+        self.misses = 0
+        self._encodings: dict[str, tiktoken.Encoding] = {}
+        self._counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encoding(self, model: str) -> tiktoken.Encoding:
+        encoding = self._encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                logger.warning(f"model {model} not found, using cl100k_base encoding")
+                encoding = tiktoken.get_encoding("cl100k_base")
+            self._encodings[model] = encoding
+        return encoding
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _get(self, key: tuple[str, bytes]) -> Optional[int]:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None:
+                self.misses += 1
+                return None
+            self._counts.move_to_end(key)
+            self.hits += 1
+            return count
+
+    def _put(self, key: tuple[str, bytes], count: int):
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_cached_counts:
+                self._counts.popitem(last=False)
+
+    def count(self, text: str, model: str) -> int:
+        """Return the number of tokens of `text` under the encoding of `model`"""
+        if not text:
+            return 0
+        encoding = self.encoding(model)
+        key = (encoding.name, self._digest(text))
+        count = self._get(key)
+        if count is None:
+            count = len(encoding.encode(text))
+            self._put(key, count)
+        return count
+
+    def count_batch(self, texts: list[str], model: str, num_threads: int = 8) -> list[int]:
+        """Count the tokens of many texts, encoding the uncached ones in parallel threads with `encode_batch`"""
+        encoding = self.encoding(model)
+        keys = [(encoding.name, self._digest(text)) for text in texts]
+        counts = [self._get(key) if text else 0 for key, text in zip(keys, texts)]
+        missing = [idx for idx, count in enumerate(counts) if count is None]
+        if len(missing) > 1:
+            encoded = encoding.encode_batch([texts[idx] for idx in missing], num_threads=num_threads)
+        else:
+            encoded = [encoding.encode(texts[idx]) for idx in missing]
+        for idx, tokens in zip(missing, encoded):
+            counts[idx] = len(tokens)
+            self._put(keys[idx], counts[idx])
+        return counts
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+TOKENIZERS = TokenizerRegistry()
+
+
+@functools.lru_cache(maxsize=None)
+def _message_format(model: str) -> tuple[int, int]:
+    """Return (tokens_per_message, tokens_per_name) of the chat format used by `model`"""
     if model in {
         "gpt-3.5-turbo-0613",
         "gpt-3.5-turbo-16k-0613",
@@ -55,26 +145,28 @@ def count_message_tokens(messages, model="gpt-3.5-turbo-0613"):
         "gpt-4-0613",
         "gpt-4-32k-0613",
     }:
-        tokens_per_message = 3
-        tokens_per_name = 1
+        return 3, 1
     elif model == "gpt-3.5-turbo-0301":
-        tokens_per_message = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
-        tokens_per_name = -1  # if there's a name, the role is omitted
+        return 4, -1  # every message follows <|start|>{role/name}\n{content}<|end|>\n, a name replaces the role
     elif "gpt-3.5-turbo" in model:
-        print("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0613.")
-        return count_message_tokens(messages, model="gpt-3.5-turbo-0613")
+        logger.debug("gpt-3.5-turbo may update over time. Counting tokens assuming gpt-3.5-turbo-0613.")
+        return _message_format("gpt-3.5-turbo-0613")
     elif "gpt-4" in model:
-        print("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
-        return count_message_tokens(messages, model="gpt-4-0613")
-    else:
-        raise NotImplementedError(
-            f"""num_tokens_from_messages() is not implemented for model {model}. See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."""
-        )
+        logger.debug("gpt-4 may update over time. Counting tokens assuming gpt-4-0613.")
+        return _message_format("gpt-4-0613")
+    raise NotImplementedError(
+        f"""num_tokens_from_messages() is not implemented for model {model}. See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."""
+    )
+
+
+def count_message_tokens(messages, model="gpt-3.5-turbo-0613"):
+    """Return the number of tokens used by a list of messages."""
+    tokens_per_message, tokens_per_name = _message_format(model)
     num_tokens = 0
     for message in messages:
         num_tokens += tokens_per_message
         for key, value in message.items():
-            num_tokens += len(encoding.encode(value))
+            num_tokens += TOKENIZERS.count(value, model)
             if key == "name":
                 num_tokens += tokens_per_name
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
@@ -92,8 +184,22 @@ def count_string_tokens(string: str, model_name: str) -> int:
     Returns:
         int: The number of tokens in the text string.
     """
-    encoding = tiktoken.encoding_for_model(model_name)
-    return len(encoding.encode(string))
+    return TOKENIZERS.count(string, model_name)
+
+
+def count_string_tokens_batch(strings: list[str], model_name: str, num_threads: int = 8) -> list[int]:
+    """
+    Returns the number of tokens of each text string, encoding large lists in parallel threads.
+
+    Args:
+        strings (list[str]): The text strings.
+        model_name (str): The name of the encoding to use. (e.g., "gpt-3.5-turbo")
+        num_threads (int): The number of threads passed to tiktoken's encode_batch.
+
+    Returns:
+        list[int]: The number of tokens of each text string.
+    """
+    return TOKENIZERS.count_batch(strings, model_name, num_threads)
 
 
 def get_max_completion_tokens(messages: list[dict], model: str, default: int) -> int:
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 21:40
+@File    : workspace.py
+@Desc    : Workspace root of the current run, so concurrent runs write their artifacts apart.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from metagpt.const import WORKSPACE_ROOT
+
+_workspace: ContextVar[Path] = ContextVar("workspace", default=WORKSPACE_ROOT)
+
+
+def get_workspace() -> Path:
+    """Directory actions save their artifacts under, WORKSPACE_ROOT unless a run set its own"""
+    return _workspace.get()
+
+
+@contextmanager
+def use_workspace(path: Path):
+    """Save the artifacts of actions run inside the block, and of tasks they start, under `path`"""
+    token = _workspace.set(Path(path))
+    try:
+        yield
+    finally:
+        _workspace.reset(token)
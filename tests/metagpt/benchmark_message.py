@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 00:40
+@File    : benchmark_message.py
+@Desc    : Memory and time of the slotted Message against the dataclass it replaced, on a 100k message environment.
+           Run with `python tests/metagpt/benchmark_message.py [messages]`.
+"""
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Type
+
+from pydantic import BaseModel
+
+from metagpt.memory.memory import Memory
+from metagpt.schema import Message
+
+ROLES = ["Alice", "Bob", "Charlie", "Fiona"]
+
+
+@dataclass
+class LegacyMessage:
+    """The mutable dataclass Message was, kept as the baseline"""
+    content: str
+    instruct_content: BaseModel = field(default=None)
+    role: str = field(default='user')
+    cause_by: Type["Action"] = field(default="")
+    sent_from: str = field(default="")
+    send_to: str = field(default="")
+    restricted_to: str = field(default="")
+
+
+def make(cls, n: int) -> list:
+    # role names are built at runtime, as they are when read from a profile or a response, so they are not
+    # shared constants unless the class interns them
+    return [
+        cls(
+            content=f"{i}: the interviewee described the booking flow",
+            role="".join(ROLES[i % 4]),
+            sent_from="".join(ROLES[i % 4]),
+            send_to="".join(ROLES[(i + 1) % 4]),
+        )
+        for i in range(n)
+    ]
+
+
+def measure(name: str, cls, n: int):
+    start = time.perf_counter()
+    make(cls, n)
+    built = time.perf_counter() - start
+    tracemalloc.start()
+    messages = make(cls, n)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    probes = messages[-1000:]
+    if cls is LegacyMessage:
+        # no hash: membership scans the stored list, as the list-backed memory did. 10 probes, scaled to 1000
+        start = time.perf_counter()
+        for probe in probes[:10]:
+            probe in messages
+        lookup = (time.perf_counter() - start) * 100
+    else:
+        memory = Memory()
+        memory.add_batch(messages)
+        start = time.perf_counter()
+        for probe in probes:
+            probe in memory
+        lookup = time.perf_counter() - start
+    print(f"{name:<8}{n:>8} messages {size / 2 ** 20:>8.1f} MiB {size / n:>7.0f} B/message "
+          f"build {built:>6.2f}s  1000 lookups {lookup * 1000:>9.1f}ms")
+
+
+def main(n: int = 100000):
+    measure("legacy", LegacyMessage, n)
+    measure("slotted", Message, n)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
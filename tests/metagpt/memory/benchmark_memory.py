@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 23:20
+@File    : benchmark_memory.py
+@Desc    : Compare the indexed Memory with the list-scanning one it replaced, over a growing conversation, and
+           time keyword recall with and without the full text index.
+           Run with `python tests/metagpt/memory/benchmark_memory.py [messages]`.
+"""
+import sys
+import time
+
+from metagpt.memory.memory import Memory
+from metagpt.schema import Message
+
+
+class LegacyMemory:
+    """The list-backed memory before the digest index, kept as the baseline"""
+
+    def __init__(self):
+        self.storage: list[Message] = []
+
+    def add(self, message: Message):
+        if message in self.storage:
+            return
+        self.storage.append(message)
+
+    def get(self, k=0) -> list[Message]:
+        return self.storage[-k:]
+
+    def find_news(self, observed: list[Message], k=0) -> list[Message]:
+        already_observed = self.get(k)
+        return [i for i in observed if i not in already_observed]
+
+
+def make_messages(n: int) -> list[Message]:
+    filler = "The interviewee described the booking flow in detail. " * 20
+    return [Message(content=f"{i}: {filler}", role=f"role {i % 4}") for i in range(n)]
+
+
+def legacy_round(env: LegacyMemory, mine: LegacyMemory, message: Message):
+    """One message published to the environment, then observed and received by a role, as Role._observe did"""
+    env.add(message)
+    mine.find_news(env.get())
+    for i in env.get():
+        if i not in mine.get():
+            mine.add(i)
+
+
+def indexed_round(env: Memory, mine: Memory, cursor: list[int], message: Message):
+    env.add(message)
+    news, cursor[0] = env.get_since(cursor[0])
+    mine.find_news(news)
+    for i in news:
+        if i not in mine:
+            mine.add(i)
+
+
+def bench(name, func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10}{len(messages):>8} messages {elapsed:>9.3f}s {elapsed / len(messages) * 1e6:>10.1f}us/message")
+
+
+def bench_recall(n: int, queries: int = 200):
+    filler = "The interviewee described the booking flow in detail. "
+    messages = [Message(content=f"{filler * 5}Ticket T{i} mentions feature{i % 1000}.") for i in range(n)]
+    indexed, scanned = Memory(), Memory(full_text_index=False)
+    indexed.add_batch(messages)
+    scanned.add_batch(messages)
+    indexed.search("warm up")  # builds the index
+    cases = [
+        ("search", lambda i: indexed.search(f"feature{i}")),
+        # whole words inside the substring narrow it down through the index
+        ("substring indexed", lambda i: indexed.try_remember(f" feature{i}.")),
+        ("substring scan", lambda i: scanned.try_remember(f" feature{i}.")),
+    ]
+    for name, query in cases:
+        start = time.perf_counter()
+        for i in range(queries):
+            query(i)
+        elapsed = (time.perf_counter() - start) / queries
+        print(f"recall {name:<18}{n:>8} messages {elapsed * 1e3:>9.3f}ms/query")
+
+
+def main(n: int = 10000):
+    messages = make_messages(n)
+    env, mine, cursor = Memory(), Memory(), [0]
+    bench("indexed", lambda m: indexed_round(env, mine, cursor, m), messages)
+    # each legacy round scans the whole history once per message in it, time a prefix instead of waiting for hours
+    prefix = min(n, 300)
+    env, mine = LegacyMemory(), LegacyMemory()
+    bench("legacy", lambda m: legacy_round(env, mine, m), messages[:prefix])
+    if prefix < n:
+        print(f"legacy rounds grow with the square of the history, {n} messages take ~{(n / prefix) ** 3:.0f}x longer")
+    bench_recall(n)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 20:10
+@File    : test_history_compactor.py
+"""
+import pytest
+
+from metagpt.memory.history_compactor import HistoryCompactor
+from metagpt.schema import Message
+from metagpt.utils.token_counter import count_string_tokens
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def aask(self, prompt, system_msgs=None):
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)}"
+
+
+def _messages(start, stop):
+    return [Message(content=f"answer {i}: " + "the booking flow was confusing. " * 10) for i in range(start, stop)]
+
+
+@pytest.mark.asyncio
+async def test_short_history_is_kept_verbatim():
+    llm = FakeLLM()
+    compactor = HistoryCompactor(llm, "gpt-3.5-turbo", budget=4000)
+    messages = _messages(0, 3)
+    assert await compactor.compact(messages) == messages
+    assert not llm.prompts
+
+
+@pytest.mark.asyncio
+async def test_old_messages_are_summarized_once():
+    llm = FakeLLM()
+    compactor = HistoryCompactor(llm, "gpt-3.5-turbo", budget=500, batch_tokens=300)
+    messages = _messages(0, 20)
+    compacted = await compactor.compact(messages)
+    assert compacted[0].content.startswith("Summary of the earlier conversation")
+    assert compacted[-1] is messages[-1]
+    assert sum(count_string_tokens(str(i), "gpt-3.5-turbo") for i in compacted) <= 500
+    calls = len(llm.prompts)
+    assert calls > 1
+
+    # the next round only folds the messages that left the recent window
+    messages += _messages(20, 22)
+    await compactor.compact(messages)
+    assert len(llm.prompts) - calls <= 2
+    assert all("answer 0:" not in i for i in llm.prompts[calls:])
+
+
+@pytest.mark.asyncio
+async def test_oversized_last_message_is_truncated():
+    compactor = HistoryCompactor(FakeLLM(), "gpt-3.5-turbo", budget=200)
+    compacted = await compactor.compact([Message(content="word " * 2000)])
+    assert count_string_tokens(compacted[-1].content, "gpt-3.5-turbo") <= 120
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 00:10
+@File    : test_history_log.py
+"""
+import pytest
+
+from metagpt.memory.history_log import HistoryLog
+from metagpt.schema import Message
+
+
+def _messages(n):
+    return [Message(f"message {i}", role=f"role {i % 3}") for i in range(n)]
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_history_log_renders_like_the_history_string(tmp_path, spill):
+    log = HistoryLog(tmp_path / "history.jsonl" if spill else None, keep_in_memory=4)
+    history = ""
+    for message in _messages(10):
+        log.append(message)
+        history += f"\n{message}"
+    assert str(log) == history
+    assert len(log) == len(history)
+    assert log.count() == 10
+    assert log.render_last(3) == "".join(f"\n{i}" for i in _messages(10)[-3:])
+    assert log.render_last(100) == history
+    assert log.render_by_role("role 1") == "".join(f"\n{i}" for i in _messages(10) if i.role == "role 1")
+    log.close()
+    assert str(log) == history
+
+
+def test_history_log_spill_bounds_memory(tmp_path):
+    log = HistoryLog(tmp_path / "history.jsonl", keep_in_memory=4)
+    for message in _messages(100):
+        log.append(message)
+    assert len(log._recent) == 4
+    assert list(log)[0] == "role 0: message 0"
+    assert len((tmp_path / "history.jsonl").read_text().splitlines()) == 100
+
+
+def test_history_log_in_dir(tmp_path):
+    assert HistoryLog.in_dir(None).spill_path is None
+    log = HistoryLog.in_dir(str(tmp_path))
+    log.append(Message("hi"))
+    log.close()
+    assert log.spill_path.parent == tmp_path and log.spill_path.exists()
+
+
+def test_history_log_append_after_close(tmp_path):
+    log = HistoryLog(tmp_path / "history.jsonl", keep_in_memory=2)
+    messages = _messages(6)
+    for message in messages[:3]:
+        log.append(message)
+    log.close()
+    for message in messages[3:]:
+        log.append(message)
+    log.close()
+    assert list(log) == [str(i) for i in messages]
+    assert len((tmp_path / "history.jsonl").read_text().splitlines()) == 6
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 23:20
+@File    : test_memory.py
+"""
+import pytest
+
+from metagpt.memory.memory import Memory, message_key
+from metagpt.schema import Message
+
+
+class WritePRD:
+    pass
+
+
+class WriteDesign:
+    pass
+
+
+def test_memory_dedupes_equal_messages():
+    memory = Memory()
+    assert memory.add(Message("prd", role="PM", cause_by=WritePRD))
+    assert not memory.add(Message("prd", role="PM", cause_by=WritePRD))
+    assert memory.add(Message("prd", role="Architect", cause_by=WritePRD))
+    assert memory.count() == 2
+    assert Message("prd", role="PM", cause_by=WritePRD) in memory
+    assert Message("prd", role="PM", cause_by=WriteDesign) not in memory
+    assert message_key(Message("a")) == message_key(Message("a"))
+
+
+def test_memory_indexes():
+    memory = Memory()
+    prd = Message("prd", role="PM", cause_by=WritePRD)
+    design = Message("design", role="Architect", cause_by=WriteDesign)
+    memory.add_batch([prd, design, Message("note", role="PM")])
+    assert memory.get_by_role("PM") == [prd, Message("note", role="PM")]
+    assert memory.get_by_action(WritePRD) == [prd]
+    assert memory.get_by_actions([WriteDesign, WritePRD]) == [design, prd]
+
+    memory.delete(Message("prd", role="PM", cause_by=WritePRD))
+    assert prd not in memory
+    assert memory.get_by_role("PM") == [Message("note", role="PM")]
+    assert memory.get_by_action(WritePRD) == []
+    with pytest.raises(ValueError):
+        memory.delete(prd)
+
+
+def test_memory_get_recent():
+    memory = Memory()
+    memory.add_batch(Message(str(i)) for i in range(5))
+    assert [i.content for i in memory.get()] == ["0", "1", "2", "3", "4"]
+    assert [i.content for i in memory.get(2)] == ["3", "4"]
+    assert [i.content for i in memory.get(10)] == ["0", "1", "2", "3", "4"]
+
+
+def test_memory_get_since_cursor():
+    memory = Memory()
+    memory.add_batch(Message(str(i)) for i in range(3))
+    news, cursor = memory.get_since(0)
+    assert [i.content for i in news] == ["0", "1", "2"]
+    assert memory.get_since(cursor) == ([], cursor)
+
+    memory.add(Message("3"))
+    memory.delete(Message("2"))
+    memory.add(Message("4"))
+    news, cursor = memory.get_since(cursor)
+    assert [i.content for i in news] == ["3", "4"]
+
+    memory.clear()
+    memory.add(Message("5"))
+    assert [i.content for i in memory.get_since(cursor)[0]] == ["5"]
+
+
+def test_memory_find_news():
+    memory = Memory()
+    memory.add_batch(Message(str(i)) for i in range(5))
+    observed = [Message("1"), Message("4"), Message("9")]
+    assert memory.find_news(observed) == [Message("9")]
+    assert memory.find_news(observed, k=1) == [Message("1"), Message("9")]
+
+
+@pytest.mark.parametrize("full_text_index", [True, False])
+def test_memory_get_by_content(full_text_index):
+    memory = Memory(full_text_index=full_text_index)
+    memory.add_batch([Message("the booking flow"), Message("rebooking flows"), Message("Booking Flow")])
+    assert [i.content for i in memory.get_by_content("booking flow")] == ["the booking flow", "rebooking flows"]
+    assert len(memory.get_by_content("ook")) == 3
+    memory.delete(Message("the booking flow"))
+    memory.add(Message("booking flow again"))
+    assert [i.content for i in memory.get_by_content("booking flow")] == ["rebooking flows", "booking flow again"]
+
+
+def test_memory_search_and_try_remember():
+    memory = Memory()
+    memory.add_batch([Message("booking flow"), Message("checkout flow"), Message("booking booking")])
+    assert memory.search("booking") == [Message("booking booking"), Message("booking flow")]
+    assert memory.search('"checkout flow"') == [Message("checkout flow")]
+    assert memory.search("book*", k=1) == [Message("booking booking")]
+
+    # the index is kept up to date once built
+    memory.add(Message("booking again"))
+    memory.delete(Message("booking booking"))
+    assert memory.search("booking") == [Message("booking again"), Message("booking flow")]
+    # recall keeps substring matching in insertion order, fragments of words included
+    assert memory.try_remember("book") == [Message("booking flow"), Message("booking again")]
+    assert memory.try_remember("heck") == [Message("checkout flow")]
+
+    memory.clear()
+    memory.add(Message("booking"))
+    assert memory.search("booking") == [Message("booking")]
+    assert Memory(full_text_index=False).search("booking") == []
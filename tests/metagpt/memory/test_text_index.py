@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 01:10
+@File    : test_text_index.py
+"""
+from metagpt.memory.text_index import InvertedIndex, tokenize
+
+
+def make_index(*texts: str) -> InvertedIndex:
+    index = InvertedIndex()
+    for doc_id, text in enumerate(texts):
+        index.add(doc_id, text)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Booking-flow, user_id 42") == ["booking", "flow", "user_id", "42"]
+    assert tokenize("用户旅程 map") == ["用", "户", "旅", "程", "map"]
+
+
+def test_keyword_phrase_and_prefix():
+    index = make_index("the booking flow is slow", "flow of booking", "booked a slow flow", "nothing here")
+    assert sorted(index.search("booking")) == [0, 1]
+    assert sorted(index.search("booking flow")) == [0, 1]
+    assert index.search('"booking flow"') == [0]
+    assert sorted(index.search("book*")) == [0, 1, 2]
+    assert sorted(index.search("book* slow")) == [0, 2]
+    assert index.search("missing") == []
+    assert index.search("") == []
+
+
+def test_ranking():
+    index = make_index("flow", "flow flow flow", "other")
+    assert index.search("flow") == [1, 0]
+    assert index.search("flow", limit=1) == [1]
+    # ties go to the most recent document
+    assert make_index("same text", "same text").search("same") == [1, 0]
+
+
+def test_remove():
+    index = make_index("booking flow", "booking")
+    index.remove(0, "booking flow")
+    assert 0 not in index and len(index) == 1
+    assert index.search("booking") == [1]
+    assert index.search("flow") == []
+    assert index.expand("fl") == []
+
+
+def test_substring_candidates():
+    index = make_index("the booking flow is slow", "rebooking flows", "unrelated")
+    # a token cut at the start of the text may be the end of a longer one, it does not narrow
+    assert index.substring_candidates("booking") is None
+    assert index.substring_candidates("booking flow") == {0, 1}
+    assert index.substring_candidates(" flow is") == {0}
+    assert index.substring_candidates("king xyz ") == set()
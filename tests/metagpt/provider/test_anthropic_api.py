@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 14:20
+@File    : test_anthropic_api.py
+"""
+import asyncio
+
+import pytest
+
+from metagpt.provider.anthropic_api import Claude2
+
+
+class MockCompletion:
+    def __init__(self, completion):
+        self.completion = completion
+
+
+class MockAsyncClient:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def count_tokens(self, text):
+        return len(text.split())
+
+    async def create(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream(["Hello", " world"])
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return MockCompletion(prompt.rsplit("Human: ", 1)[-1].split("\n")[0])
+
+    async def _stream(self, chunks):
+        for i in chunks:
+            yield MockCompletion(i)
+
+
+@pytest.fixture
+def client(mocker):
+    client = MockAsyncClient()
+    client.completions = mocker.Mock(create=client.create)
+    mocker.patch("metagpt.provider.anthropic_api.get_async_client", return_value=client)
+    return client
+
+
+def test_cons_prompt():
+    llm = Claude2()
+    prompt = llm._cons_prompt([llm._system_msg("Be brief."), llm._user_msg("hi"), llm._assistant_msg("hello")])
+    assert prompt == "\n\nHuman: Be brief.\n\nhi\n\nAssistant: hello\n\nAssistant:"
+    # without system messages the prompt is the plain Human turn, the default system message is not sent
+    assert llm._cons_prompt(llm._ask_msgs("hi")) == "\n\nHuman: hi\n\nAssistant:"
+    assert llm._cons_prompt(llm._ask_msgs("hi", ["Be brief."])) == "\n\nHuman: Be brief.\n\nhi\n\nAssistant:"
+
+
+@pytest.mark.asyncio
+async def test_acompletion_batch_runs_concurrently(client):
+    llm = Claude2()
+    batch = [[llm._user_msg(f"q{i}")] for i in range(5)]
+    results = await llm.acompletion_batch_text(batch)
+    assert results == [f"q{i}" for i in range(5)]
+    assert client.max_running == 5
+
+
+@pytest.mark.asyncio
+async def test_aask_stream(client):
+    llm = Claude2()
+    chunks = [i async for i in llm.aask_stream("hi")]
+    assert chunks == ["Hello", " world"]
+    assert llm.last_stream_stats.completion_tokens == 2
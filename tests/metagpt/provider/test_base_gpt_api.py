@@ -5,7 +5,11 @@
 @Author  : alexanderwu
 @File    : test_base_gpt_api.py
 """
+import time
 
+import pytest
+
+from metagpt.provider.base_gpt_api import BaseGPTAPI, StreamStats
 from metagpt.schema import Message
 
 
@@ -13,3 +17,33 @@ def test_message():
     message = Message(role='user', content='wtf')
     assert 'role' in message.to_dict()
     assert 'user' in str(message)
+
+
+class MockGPTAPI(BaseGPTAPI):
+    def completion(self, messages: list[dict]):
+        return {"choices": [{"message": {"content": messages[-1]["content"]}}]}
+
+    async def acompletion(self, messages: list[dict]):
+        return self.completion(messages)
+
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        return self.get_choice_text(self.completion(messages))
+
+
+@pytest.mark.asyncio
+async def test_aask_stream_falls_back_to_whole_answer():
+    llm = MockGPTAPI()
+    chunks = [i async for i in llm.aask_stream("hello")]
+    assert chunks == ["hello"]
+
+
+def test_stream_stats():
+    start = time.perf_counter()
+    stats = StreamStats.measure(start - 1, start - 0.5, 10)
+    assert 0.49 < stats.time_to_first_token < 0.6
+    assert stats.duration >= 1
+    assert stats.completion_tokens == 10
+    assert 15 < stats.tokens_per_second <= 20
+
+    empty = StreamStats.measure(start, None, 0)
+    assert empty.tokens_per_second == 0
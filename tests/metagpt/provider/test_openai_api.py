@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/18 10:20
+@File    : test_openai_api.py
+"""
+import asyncio
+
+import openai
+import pytest
+from openai.error import RateLimitError, Timeout
+
+from metagpt.provider.openai_api import OpenAIGPTAPI
+from metagpt.utils.token_counter import count_string_tokens
+
+MSG = [{"role": "user", "content": "hi"}]
+CHUNKS = ["Hello", " wonderful", " world"]
+
+
+async def fake_stream(**kwargs):
+    async def chunks():
+        yield {"choices": [{"delta": {"role": "assistant"}}]}
+        for content in CHUNKS:
+            await asyncio.sleep(0.02)
+            yield {"choices": [{"delta": {"content": content}}]}
+        yield {"choices": []}
+
+    assert kwargs["stream"]
+    return chunks()
+
+
+@pytest.mark.asyncio
+async def test_acompletion_stream(mocker):
+    mocker.patch.object(openai.ChatCompletion, "acreate", side_effect=fake_stream)
+    llm = OpenAIGPTAPI()
+    assert [i async for i in llm.acompletion_stream(MSG, use_cache=False)] == CHUNKS
+
+    stats = llm.last_stream_stats
+    assert 0.02 <= stats.time_to_first_token < stats.duration
+    assert stats.completion_tokens == count_string_tokens("".join(CHUNKS), llm.model)
+    assert stats.tokens_per_second > 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_text_goes_to_the_sink(mocker):
+    mocker.patch.object(openai.ChatCompletion, "acreate", side_effect=fake_stream)
+    llm = OpenAIGPTAPI()
+    sink = mocker.Mock()
+    llm.stream_sink = sink
+    assert await llm.acompletion_text(MSG, stream=True, use_cache=False) == "".join(CHUNKS)
+    assert [i.args[0] for i in sink.call_args_list] == CHUNKS + ["\n"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_failed_calls_refund_their_reservation(mocker, stream):
+    llm = OpenAIGPTAPI(tpm=10000)
+    mocker.patch.object(openai.ChatCompletion, "acreate", side_effect=[Timeout("timed out"), RateLimitError("429")])
+    for _ in range(2):
+        with pytest.raises((Timeout, RateLimitError)):
+            if stream:
+                [i async for i in llm.acompletion_stream(MSG, use_cache=False)]
+            else:
+                await llm._achat_completion(MSG)
+    assert llm._rate_limiter._tokens.wait_time(10000) == 0
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 17:20
+@File    : test_router_api.py
+"""
+import asyncio
+import time
+
+import pytest
+from openai.error import InvalidRequestError
+
+from metagpt.config import CONFIG
+from metagpt.provider.base_gpt_api import BaseGPTAPI
+from metagpt.provider.router_api import Backend, RouterGPTAPI
+
+
+class FakeGPTAPI(BaseGPTAPI):
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False, error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.error = error or (ConnectionError(name) if fail else None)
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    def completion(self, messages: list[dict]):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"choices": [{"message": {"content": self.name}}]}
+
+    async def acompletion(self, messages: list[dict]):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return self.completion(messages)
+
+    async def acompletion_text(self, messages: list[dict], stream=False, use_cache=True) -> str:
+        return self.get_choice_text(await self.acompletion(messages))
+
+
+MSG = [{"role": "user", "content": "hi"}]
+
+
+@pytest.mark.asyncio
+async def test_prefers_the_fastest_backend():
+    slow, fast = FakeGPTAPI("slow", delay=0.05), FakeGPTAPI("fast", delay=0.0)
+    router = RouterGPTAPI([Backend("slow", slow), Backend("fast", fast)])
+    for _ in range(2):  # one call each to learn the latencies
+        await router.acompletion_text(MSG)
+    assert [await router.acompletion_text(MSG) for _ in range(3)] == ["fast"] * 3
+    assert slow.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_opens_the_circuit():
+    broken, healthy = FakeGPTAPI("broken", fail=True), FakeGPTAPI("healthy", delay=0.01)
+    backends = [Backend("broken", broken, failure_threshold=2, cooldown=60), Backend("healthy", healthy)]
+    router = RouterGPTAPI(backends)
+    for _ in range(4):
+        assert await router.aask("hi") == "healthy"
+    assert broken.calls == 2
+    assert not backends[0].available(time.monotonic())
+    assert backends[0].error_rate > 0
+
+
+@pytest.mark.asyncio
+async def test_raises_when_every_backend_fails():
+    router = RouterGPTAPI([Backend("a", FakeGPTAPI("a", fail=True)), Backend("b", FakeGPTAPI("b", fail=True))])
+    with pytest.raises(ConnectionError):
+        await router.acompletion(MSG)
+    with pytest.raises(ConnectionError):
+        router.completion(MSG)
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_raised_without_failover():
+    bad_request, other = FakeGPTAPI("a", error=InvalidRequestError("context length exceeded", None)), FakeGPTAPI("b")
+    backends = [Backend("a", bad_request, failure_threshold=1), Backend("b", other)]
+    router = RouterGPTAPI(backends)
+    for _ in range(3):
+        with pytest.raises(InvalidRequestError):
+            await router.acompletion([{"role": "user", "content": "x" * 100}])
+        with pytest.raises(InvalidRequestError):
+            router.completion(MSG)
+        backends[1].latency = 1.0  # keep the failing backend first in the ranking
+    assert other.calls == 0
+    assert backends[0].available(time.monotonic()) and backends[0].failures == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_spreads_over_backends():
+    a, b = FakeGPTAPI("a", delay=0.01), FakeGPTAPI("b", delay=0.01)
+    router = RouterGPTAPI([Backend("a", a), Backend("b", b)])
+    assert len(await router.acompletion_batch_text([MSG] * 6)) == 6
+    assert a.calls and b.calls
+
+
+@pytest.mark.asyncio
+async def test_batch_is_bounded_by_the_scheduler(monkeypatch):
+    monkeypatch.setattr(CONFIG, "batch_concurrency", 2)
+    llm = FakeGPTAPI("a", delay=0.01)
+    router = RouterGPTAPI([Backend("a", llm)])
+    assert len(await router.acompletion_batch([MSG] * 6)) == 6
+    assert llm.calls == 6 and llm.max_running == 2
+
+
+class FakeModerationAPI(FakeGPTAPI):
+    def moderation(self, content):
+        self.calls += 1
+        return {"results": [{"flagged": False}]}
+
+    async def amoderation(self, content):
+        return self.moderation(content)
+
+
+@pytest.mark.asyncio
+async def test_moderation_goes_to_a_backend_that_supports_it():
+    chat, moderated = FakeGPTAPI("chat"), FakeModerationAPI("moderated")
+    router = RouterGPTAPI([Backend("chat", chat), Backend("moderated", moderated)])
+    assert router.moderation("hi") == {"results": [{"flagged": False}]}
+    assert await router.amoderation(["hi"]) == {"results": [{"flagged": False}]}
+    assert moderated.calls == 2 and chat.calls == 0
+
+    with pytest.raises(NotImplementedError):
+        RouterGPTAPI([Backend("chat", chat)]).moderation("hi")
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_delta():
+    router = RouterGPTAPI([Backend("broken", FakeGPTAPI("broken", fail=True)), Backend("ok", FakeGPTAPI("ok"))])
+    assert [i async for i in router.acompletion_stream(MSG)] == ["ok"]
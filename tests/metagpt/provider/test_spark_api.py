@@ -1,5 +1,15 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from metagpt.config import CONFIG
 from metagpt.logs import logger
-from metagpt.provider.spark_api import SparkAPI
+from metagpt.provider.spark_api import SparkAPI, SparkAPIError, SparkURLSigner
+from metagpt.utils.http_pool import get_http_pool
+from metagpt.utils.llm_cache import LLMCache
 
 
 def test_message():
@@ -9,3 +19,116 @@ def test_message():
     result = llm.ask('写一篇五百字的日记')
     logger.info(result)
     assert len(result) > 100
+
+
+@asynccontextmanager
+async def spark_server(error_code: int = 0, close_early: bool = False):
+    """A local stand-in for the Spark websocket api, echoing the last message back in three frames.
+    With `error_code` it answers with that code instead, with `close_early` it closes after the first frame"""
+    state = {"running": 0, "max_running": 0, "requests": 0, "urls": set()}
+
+    async def handle(request):
+        state["urls"].add(str(request.rel_url))
+        state["requests"] += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        data = json.loads((await ws.receive()).data)
+        text = data["payload"]["message"]["text"][-1]["content"]
+        if error_code:
+            await ws.send_json({"header": {"code": error_code, "message": "AppIdNoAuthError"}})
+            await ws.close()
+            return ws
+        state["running"] += 1
+        state["max_running"] = max(state["max_running"], state["running"])
+        for seq, part in enumerate([text[:2], text[2:], ""][:1 if close_early else 3]):
+            await asyncio.sleep(0.02)
+            status = 2 if seq == 2 else 1
+            payload = {"choices": {"seq": seq, "status": status, "text": [{"content": part}]}}
+            if status == 2:
+                payload["usage"] = {"text": {"prompt_tokens": 1, "completion_tokens": 3}}
+            await ws.send_json({"header": {"code": 0}, "payload": payload})
+        state["running"] -= 1
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/v2.1/chat", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"ws://127.0.0.1:{port}/v2.1/chat", state
+    finally:
+        await get_http_pool().close()
+        await runner.cleanup()
+
+
+@pytest.fixture
+def spark_config(mocker):
+    mocker.patch.object(CONFIG, "spark_appid", "appid")
+    mocker.patch.object(CONFIG, "spark_api_key", "key")
+    mocker.patch.object(CONFIG, "spark_api_secret", "secret")
+    mocker.patch.object(CONFIG, "domain", "generalv2")
+
+
+@pytest.mark.asyncio
+async def test_acompletion_batch_concurrent(spark_config, mocker):
+    async with spark_server() as (url, state):
+        mocker.patch.object(CONFIG, "spark_url", url)
+        llm = SparkAPI()
+        batch = [[llm._user_msg(f"hello {i}")] for i in range(4)]
+        results = await llm.acompletion_batch(batch)
+        assert results == [f"hello {i}" for i in range(4)]
+        assert state["max_running"] == 4
+        assert len(state["urls"]) == 1  # the signed url is reused
+
+
+@pytest.mark.asyncio
+async def test_acompletion_stream(spark_config, mocker):
+    async with spark_server() as (url, _):
+        mocker.patch.object(CONFIG, "spark_url", url)
+        llm = SparkAPI()
+        chunks = [i async for i in llm.aask_stream("hello")]
+        assert chunks == ["he", "llo"]
+        assert llm.last_stream_stats.completion_tokens == 3  # as reported by the server, not the chunk count
+
+
+@pytest.mark.asyncio
+async def test_acompletion_raises_server_error(spark_config, mocker):
+    async with spark_server(error_code=11200) as (url, _):
+        mocker.patch.object(CONFIG, "spark_url", url)
+        llm = SparkAPI()
+        with pytest.raises(SparkAPIError) as e:
+            await llm.acompletion_text([llm._user_msg("hello")])
+        assert e.value.code == 11200
+
+
+@pytest.mark.asyncio
+async def test_acompletion_raises_on_early_close(spark_config, mocker):
+    async with spark_server(close_early=True) as (url, _):
+        mocker.patch.object(CONFIG, "spark_url", url)
+        llm = SparkAPI()
+        with pytest.raises(SparkAPIError):
+            await llm.acompletion_text([llm._user_msg("hello")])
+
+
+@pytest.mark.asyncio
+async def test_aask_uses_llm_cache(spark_config, mocker, tmp_path):
+    mocker.patch("metagpt.provider.spark_api.get_llm_cache", return_value=LLMCache(tmp_path / "cache.db"))
+    async with spark_server() as (url, state):
+        mocker.patch.object(CONFIG, "spark_url", url)
+        llm = SparkAPI()
+        assert await llm.aask("hello") == "hello"
+        assert await llm.aask("hello") == "hello"
+        assert state["requests"] == 1
+        assert await llm.aask("hello", use_cache=False) == "hello"
+        assert state["requests"] == 2
+
+
+def test_url_signer_reuses_signature():
+    signer = SparkURLSigner("appid", "key", "secret", "ws://localhost/v2.1/chat", validity=60)
+    assert signer.url() == signer.url()
+    signer.validity = -1
+    assert signer.url().startswith("ws://localhost/v2.1/chat?authorization=")
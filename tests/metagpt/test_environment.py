@@ -6,6 +6,9 @@
 @File    : test_environment.py
 """
 
+import asyncio
+import time
+
 import pytest
 
 from metagpt.actions import BossRequirement
@@ -54,3 +57,123 @@ async def test_publish_and_process_message(env: Environment):
     await env.run(k=2)
     logger.info(f"{env.history=}")
     assert len(env.history) > 10
+
+
+class WritePRD:
+    pass
+
+
+class WriteDesign:
+    pass
+
+
+class Unrelated:
+    pass
+
+
+class Echo(Role):
+    """Answers every message it watches with one message caused by `cause_by`"""
+
+    def __init__(self, profile, watch, cause_by, delay=0.0):
+        super().__init__(profile, profile)
+        self._rc.watch.update(watch)
+        self.cause_by = cause_by
+        self.delay = delay
+        self.runs = []
+
+    async def _react(self):
+        start = time.perf_counter()
+        await asyncio.sleep(self.delay)
+        self.runs.append((start, time.perf_counter()))
+        msg = Message(f"{self.profile} {len(self.runs)}", role=self.profile, cause_by=self.cause_by)
+        self._rc.memory.add(msg)
+        return msg
+
+
+@pytest.mark.asyncio
+async def test_run_wakes_only_subscribed_roles(env: Environment):
+    pm = Echo("PM", {BossRequirement}, WritePRD)
+    architect = Echo("Architect", {WritePRD}, WriteDesign)
+    idle = [Echo(f"Idle {i}", {Unrelated}, Unrelated) for i in range(20)]
+    env.add_roles([pm, architect, *idle])
+    env.publish_message(Message(role="BOSS", content="a search engine", cause_by=BossRequirement))
+
+    await env.run(k=5)
+    assert len(pm.runs) == 1
+    assert len(architect.runs) == 1
+    assert all(not i.runs for i in idle)
+    assert env.memory.get_by_action(WriteDesign)[0].content == "Architect 1"
+
+
+@pytest.mark.asyncio
+async def test_run_stops_at_round_cap(env: Environment):
+    ping = Echo("Ping", {BossRequirement, WriteDesign}, WritePRD)
+    pong = Echo("Pong", {WritePRD}, WriteDesign)
+    env.add_roles([ping, pong])
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+
+    await env.run(k=3)
+    assert len(ping.runs) == 3
+    assert len(pong.runs) == 3
+
+
+@pytest.mark.asyncio
+async def test_run_reacts_as_soon_as_input_arrives(env: Environment):
+    slow = Echo("Slow", {BossRequirement}, Unrelated, delay=0.3)
+    fast = Echo("Fast", {BossRequirement}, WritePRD)
+    follower = Echo("Follower", {WritePRD}, WriteDesign)
+    env.add_roles([slow, fast, follower])
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+
+    await env.run(k=1)
+    assert follower.runs[0][1] < slow.runs[0][1]  # no waiting for the slow role to end the round
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_earlier_messages(env: Environment):
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+    pm = Echo("PM", {BossRequirement}, WritePRD)
+    env.add_role(pm)
+    await env.run()
+    assert len(pm.runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_cancels_role_past_timeout(env: Environment):
+    hung = Echo("Hung", {BossRequirement}, Unrelated, delay=60)
+    pm = Echo("PM", {BossRequirement}, WritePRD)
+    architect = Echo("Architect", {WritePRD}, WriteDesign)
+    env.add_roles([hung, pm, architect])
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+
+    start = time.perf_counter()
+    reactions = await env.run(k=1, role_timeout=0.2)
+    assert time.perf_counter() - start < 5
+    assert not hung.runs
+    assert len(architect.runs) == 1
+    assert reactions == {"Hung": 1, "PM": 1, "Architect": 1}
+    assert env.is_idle()
+
+
+@pytest.mark.asyncio
+async def test_run_caps_concurrent_roles(env: Environment):
+    roles = [Echo(f"Worker {i}", {BossRequirement}, Unrelated, delay=0.05) for i in range(6)]
+    env.add_roles(roles)
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+    assert not env.is_idle()
+
+    await env.run(k=1, max_concurrency=2)
+    spans = [run for role in roles for run in role.runs]
+    assert len(spans) == 6
+    most = max(sum(1 for start, end in spans if start <= t < end) for t, _ in spans)
+    assert most <= 2
+
+
+@pytest.mark.asyncio
+async def test_republished_message_is_not_delivered_again(env: Environment):
+    pm = Echo("PM", {BossRequirement}, WritePRD)
+    env.add_role(pm)
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+    env.publish_message(Message(role="BOSS", content="go", cause_by=BossRequirement))
+    assert pm._rc.inbox.qsize() == 1
+    assert env.history.count() == 1
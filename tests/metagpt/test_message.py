@@ -5,6 +5,10 @@
 @Author  : alexanderwu
 @File    : test_message.py
 """
+import copy
+import pickle
+from dataclasses import FrozenInstanceError
+
 import pytest
 
 from metagpt.schema import AIMessage, Message, RawMessage, SystemMessage, UserMessage
@@ -26,6 +30,7 @@ def test_all_messages():
     ]
     for msg in msgs:
         assert msg.content == test_content
+    assert [i.role for i in msgs] == ['user', 'system', 'assistant', 'QA']
 
 
 def test_raw_message():
@@ -34,3 +39,51 @@ def test_raw_message():
     assert msg['content'] == 'raw'
     with pytest.raises(KeyError):
         assert msg['1'] == 1, "KeyError: '1'"
+
+
+def test_message_is_frozen():
+    msg = Message('frozen', role='QA')
+    with pytest.raises(FrozenInstanceError):
+        msg.content = 'changed'
+    with pytest.raises(AttributeError):
+        msg.extra = 1
+    assert not hasattr(msg, '__dict__')
+
+
+def test_message_digest_equality():
+    a = Message('same', role='QA', send_to='Bob')
+    b = Message('same', role='QA', send_to='Bob')
+    assert a == b and hash(a) == hash(b) and a.digest == b.digest
+    assert len({a, b}) == 1
+    assert a != Message('same', role='QA', send_to='Alice')
+    assert a != Message('same', role='QA', send_to='Bob', restricted_to='Alice')
+
+
+def test_message_interns_names():
+    role = ''.join(['Q', 'A'])
+    msg = Message('interned', role=role, sent_from=role, send_to=''.join(['B', 'ob']))
+    assert msg.role is msg.sent_from is Message('other', role='QA').role
+    assert msg.send_to is Message('other', send_to='Bob').send_to
+
+
+def test_message_replace():
+    msg = UserMessage('before')
+    new = msg.replace(content='after')
+    assert isinstance(new, UserMessage)
+    assert (msg.content, new.content, new.role) == ('before', 'after', 'user')
+    assert new != msg
+    with pytest.raises(TypeError):
+        msg.replace(unknown=1)
+
+
+def test_message_pickle_and_copy():
+    msg = Message('pickled', role='QA', sent_from='Alice')
+    restored = pickle.loads(pickle.dumps(msg))
+    assert restored == msg and restored.sent_from == 'Alice'
+    assert copy.copy(msg) is msg
+    assert copy.deepcopy(msg) == msg
+
+    # messages pickled when Message was a dataclass carry their __dict__ as state
+    legacy = object.__new__(Message)
+    legacy.__setstate__({'content': 'old', 'role': 'QA'})
+    assert legacy == Message('old', role='QA')
@@ -7,8 +7,11 @@
 """
 import pytest
 
+from metagpt.actions import BossRequirement
+from metagpt.config import CONFIG
 from metagpt.logs import logger
 from metagpt.software_company import SoftwareCompany
+from tests.metagpt.test_environment import Echo
 
 
 @pytest.mark.asyncio
@@ -17,3 +20,29 @@ async def test_software_company():
     company.start_project("做一个基础搜索引擎，可以支持知识库")
     history = await company.run(n_round=5)
     logger.info(history)
+
+
+class WritePRD:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_software_company_stops_when_idle():
+    company = SoftwareCompany()
+    pm = Echo("PM", {BossRequirement}, WritePRD)
+    company.hire([pm])
+    company.start_project("a search engine")
+    await company.run(n_round=5)
+    assert len(pm.runs) == 1
+    assert len(company.round_timings) == 1
+
+
+@pytest.mark.asyncio
+async def test_software_company_closes_the_history_file(tmp_path, mocker):
+    mocker.patch.object(CONFIG, "history_log_dir", str(tmp_path))
+    company = SoftwareCompany()
+    company.hire([Echo("PM", {BossRequirement}, WritePRD)])
+    company.start_project("a search engine")
+    history = await company.run(n_round=5)
+    assert history._file is None
+    assert "a search engine" in str(history)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 19:20
+@File    : benchmark_text.py
+@Desc    : Compare generate_prompt_chunk with the paragraph-by-paragraph chunker it replaced.
+           Run with `python tests/metagpt/utils/benchmark_text.py [size in MB]`.
+"""
+import io
+import sys
+import time
+
+from metagpt.utils.text import generate_prompt_chunk, split_paragraph
+from metagpt.utils.token_counter import TOKEN_MAX, TOKENIZERS, count_string_tokens
+
+
+def legacy_generate_prompt_chunk(text, prompt_template, model_name, system_text, reserved=0):
+    """The chunker before the token-offset rewrite, kept as the baseline"""
+    paragraphs = text.splitlines(keepends=True)
+    current_token = 0
+    current_lines = []
+    reserved = reserved + count_string_tokens(prompt_template + system_text, model_name)
+    max_token = TOKEN_MAX.get(model_name, 2048) - reserved - 100
+    while paragraphs:
+        paragraph = paragraphs.pop(0)
+        token = count_string_tokens(paragraph, model_name)
+        if current_token + token <= max_token:
+            current_lines.append(paragraph)
+            current_token += token
+        elif token > max_token:
+            paragraphs = split_paragraph(paragraph) + paragraphs
+            continue
+        else:
+            yield prompt_template.format("".join(current_lines))
+            current_lines = [paragraph]
+            current_token = token
+    if current_lines:
+        yield prompt_template.format("".join(current_lines))
+
+
+def make_transcript(size: int) -> str:
+    lines, total, i = [], 0, 0
+    while total < size:
+        line = f"Interviewer: How did step {i} of the service go for you? Participant: " + (
+            "It was slow, I waited on the phone and nobody explained what would happen next. " * (1 + i % 7)
+        ) + "\n"
+        if i % 50 == 0:
+            line = line.strip() * 40 + "\n"  # the odd monologue without line breaks
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return "".join(lines)
+
+
+def bench(name, func):
+    TOKENIZERS.clear()
+    start = time.perf_counter()
+    chunks = sum(1 for _ in func())
+    print(f"{name:<28}{chunks:>8} chunks{time.perf_counter() - start:>10.2f}s")
+
+
+def main(megabytes: float = 4):
+    text = make_transcript(int(megabytes * 1024 * 1024))
+    args = ("### Reference\n{}", "gpt-3.5-turbo", "You are a user researcher.", 500)
+    print(f"transcript: {len(text) / 1024 / 1024:.1f}MB, {text.count(chr(10))} lines")
+    bench("legacy", lambda: legacy_generate_prompt_chunk(text, *args))
+    bench("token offsets, str", lambda: generate_prompt_chunk(text, *args))
+    bench("token offsets, file", lambda: generate_prompt_chunk(io.StringIO(text), *args))
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 22:15
+@File    : test_artifact_writer.py
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from metagpt.utils.artifact_writer import ArtifactWriter
+
+
+@pytest.mark.asyncio
+async def test_artifact_writer_writes_off_loop(tmp_path):
+    writer = ArtifactWriter()
+    threads = set()
+
+    def slow(data):
+        threads.add(threading.get_ident())
+        time.sleep(0.2)
+        return data
+
+    start = time.perf_counter()
+    writer.render(tmp_path / "docs" / "a.md", slow, b"a")
+    writer.write_text(tmp_path / "docs" / "b.md", "b")
+    assert time.perf_counter() - start < 0.1  # queued, not written
+    await writer.flush()
+    assert (tmp_path / "docs" / "a.md").read_bytes() == b"a"
+    assert (tmp_path / "docs" / "b.md").read_text() == "b"
+    assert threading.get_ident() not in threads
+    assert not list((tmp_path / "docs").glob("*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_artifact_writer_keeps_order_per_path(tmp_path):
+    writer = ArtifactWriter(max_workers=4)
+    path = tmp_path / "a.md"
+
+    def slow(data):
+        time.sleep(0.05)
+        return data
+
+    writer.render(path, slow, b"first")
+    writer.write_bytes(path, b"second")
+    writer.render(tmp_path / "a.png", lambda: path.read_bytes() + b"!", after=[path])
+    await writer.flush()
+    assert path.read_bytes() == b"second"
+    assert (tmp_path / "a.png").read_bytes() == b"second!"
+
+
+@pytest.mark.asyncio
+async def test_artifact_writer_flush_raises_failures(tmp_path):
+    writer = ArtifactWriter()
+
+    def fail():
+        raise ValueError("render failed")
+
+    writer.render(tmp_path / "a.png", fail)
+    writer.write_text(tmp_path / "b.md", "b")
+    with pytest.raises(ValueError):
+        await writer.flush()
+    assert (tmp_path / "b.md").exists()
+    assert not (tmp_path / "a.png").exists()
+    await writer.flush()  # failures are reported once
+
+
+@pytest.mark.asyncio
+async def test_artifact_writer_reports_failures_per_run(tmp_path):
+    writer = ArtifactWriter()
+
+    def fail():
+        raise ValueError("render failed")
+
+    async def stage(name, ok):
+        writer.write_text(tmp_path / f"{name}.md", name)
+        if not ok:
+            writer.render(tmp_path / f"{name}.png", fail)
+
+    async def run(name, ok):
+        with writer.collect() as artifacts:
+            await asyncio.create_task(stage(name, ok))  # jobs of tasks started by the run are collected too
+        await writer.wait(artifacts)
+        return (tmp_path / f"{name}.md").read_text()
+
+    results = await asyncio.gather(run("a", True), run("b", False), return_exceptions=True)
+    assert results[0] == "a"
+    assert isinstance(results[1], ValueError)
+    await writer.flush()  # already reported by the run
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 15:40
+@File    : test_batch_scheduler.py
+"""
+import asyncio
+
+import pytest
+
+from metagpt.utils.batch_scheduler import BatchScheduler
+
+
+class Throttled(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_order_and_bounds_concurrency():
+    running = {"now": 0, "max": 0}
+
+    async def work(item):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01 * (5 - item))
+        running["now"] -= 1
+        return item * 2
+
+    results = await BatchScheduler(work, concurrency=2).run(list(range(5)))
+    assert results == [0, 2, 4, 6, 8]
+    assert running["max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_as_completed_streams_fast_results_first():
+    async def work(item):
+        await asyncio.sleep(item)
+        return item
+
+    order = [idx async for idx, _ in BatchScheduler(work, concurrency=3).as_completed([0.1, 0.01, 0.05])]
+    assert order == [1, 2, 0]
+
+
+@pytest.mark.asyncio
+async def test_priorities():
+    started = []
+
+    async def work(item):
+        started.append(item)
+        return item
+
+    await BatchScheduler(work, concurrency=1).run(["low", "high", "mid"], priorities=[0, 2, 1])
+    assert started == ["high", "mid", "low"]
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff():
+    attempts = {}
+
+    async def work(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if attempts[item] < 3:
+            raise Throttled()
+        return item
+
+    scheduler = BatchScheduler(work, concurrency=2, base_delay=0.01, retry_on=(Throttled,))
+    assert await scheduler.run(["a", "b"]) == ["a", "b"]
+    assert attempts == {"a": 3, "b": 3}
+
+
+@pytest.mark.asyncio
+async def test_failures():
+    async def work(item):
+        if item == "bad":
+            raise ValueError(item)
+        return item
+
+    scheduler = BatchScheduler(work, max_retries=1, base_delay=0.01, retry_on=(Throttled,))
+    with pytest.raises(ValueError):
+        await scheduler.run(["ok", "bad"])
+    results = await scheduler.run(["ok", "bad"], return_exceptions=True)
+    assert results[0] == "ok"
+    assert isinstance(results[1], ValueError)
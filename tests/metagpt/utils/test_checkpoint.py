@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 21:05
+@File    : test_checkpoint.py
+"""
+import pytest
+from pydantic import BaseModel
+
+from metagpt.utils.checkpoint import CheckpointStore, RestoredOutput
+from metagpt.utils.dag import DAGExecutor, Stage
+
+
+class Instruct(BaseModel):
+    ideas: list
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    store = CheckpointStore("run", root=tmp_path)
+    output = RestoredOutput("some ideas", Instruct(ideas=[{"Idea": "a"}]))
+    key = store.key("ideation", "template", ["problem"])
+    assert store.load("ideation", key) == (False, None)
+
+    store.save("ideation", key, output)
+    found, restored = CheckpointStore("run", root=tmp_path).load("ideation", key)
+    assert found
+    assert restored.content == "some ideas"
+    assert restored.instruct_content.dict() == {"ideas": [{"Idea": "a"}]}
+
+
+def test_checkpoint_key_depends_on_inputs_and_fingerprint(tmp_path):
+    store = CheckpointStore("run", root=tmp_path)
+    key = store.key("s", "template", ["a"])
+    assert key == store.key("s", "template", ["a"])
+    assert key != store.key("s", "template", ["b"])
+    assert key != store.key("s", "changed template", ["a"])
+
+
+def test_checkpoint_meta(tmp_path):
+    store = CheckpointStore("run", root=tmp_path)
+    assert store.load_meta() == {}
+    store.save_meta(problem="long queues")
+    assert CheckpointStore("run", root=tmp_path).load_meta() == {"problem": "long queues"}
+
+
+@pytest.mark.asyncio
+async def test_dag_resumes_from_checkpoints(tmp_path):
+    calls = []
+
+    def stage(name, fail=False):
+        async def func(*args):
+            calls.append(name)
+            if fail:
+                raise RuntimeError(name)
+            return RestoredOutput(f"{name}({','.join(i.content for i in args)})", None)
+
+        return func
+
+    def stages(fail):
+        return [
+            Stage("a", stage("a"), ("x",)),
+            Stage("b", stage("b"), ("a",)),
+            Stage("c", stage("c", fail), ("b",)),
+        ]
+
+    x = RestoredOutput("x", None)
+    with pytest.raises(RuntimeError):
+        await DAGExecutor(stages(fail=True), checkpoints=CheckpointStore("run", root=tmp_path)).run({"x": x})
+    assert calls == ["a", "b", "c"]
+
+    calls.clear()
+    executor = DAGExecutor(stages(fail=False), checkpoints=CheckpointStore("run", root=tmp_path))
+    values = await executor.run({"x": x})
+    assert calls == ["c"]
+    assert executor.restored == {"a", "b"}
+    assert values["c"].content == "c(b(a(x)))"
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 20:30
+@File    : test_dag.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from metagpt.utils.dag import DAGExecutor, Stage
+
+
+def sleeper(delay, log=None, name=""):
+    async def func(*args):
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(("end", name))
+        return f"{name}({','.join(map(str, args))})"
+
+    return func
+
+
+@pytest.mark.asyncio
+async def test_dag_runs_independent_stages_concurrently():
+    stages = [
+        Stage("a", sleeper(0.1, name="a"), inputs=("x",)),
+        Stage("b", sleeper(0.1, name="b"), inputs=("a",)),
+        Stage("c", sleeper(0.1, name="c"), inputs=("a",)),
+        Stage("d", sleeper(0.1, name="d"), inputs=("b", "c")),
+    ]
+    start = time.perf_counter()
+    values = await DAGExecutor(stages).run({"x": 1})
+    assert time.perf_counter() - start < 0.35  # the critical path is 3 stages, the sum is 4
+    assert values["d"] == "d(b(a(1)),c(a(1)))"
+
+
+@pytest.mark.asyncio
+async def test_dag_respects_concurrency():
+    log = []
+    stages = [Stage(f"s{i}", sleeper(0.05, log, f"s{i}")) for i in range(4)]
+    executor = DAGExecutor(stages, concurrency=2)
+    await executor.run()
+    running = peak = 0
+    for event, _ in log:
+        running += 1 if event == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+    assert set(executor.timings) == {"s0", "s1", "s2", "s3"}
+
+
+@pytest.mark.asyncio
+async def test_dag_custom_output():
+    executor = DAGExecutor([Stage("a", sleeper(0, name="a"), output="out"), Stage("b", sleeper(0, name="b"), ("out",))])
+    values = await executor.run()
+    assert values["b"] == "b(a())"
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [Stage("a", sleeper(0), inputs=("b",)), Stage("b", sleeper(0), inputs=("a",))],
+        [Stage("a", sleeper(0), inputs=("missing",))],
+        [Stage("a", sleeper(0)), Stage("b", sleeper(0), output="a")],
+    ],
+)
+@pytest.mark.asyncio
+async def test_dag_invalid_graph(stages):
+    with pytest.raises(ValueError):
+        await DAGExecutor(stages).run()
+
+
+@pytest.mark.asyncio
+async def test_dag_failure_cancels_running_stages():
+    log = []
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    executor = DAGExecutor([Stage("fail", fail), Stage("slow", sleeper(1, log, "slow"))])
+    with pytest.raises(RuntimeError):
+        await executor.run()
+    assert log == [("start", "slow")]
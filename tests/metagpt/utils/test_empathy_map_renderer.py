@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 22:50
+@File    : test_empathy_map_renderer.py
+"""
+import pytest
+
+from metagpt.utils.artifact_writer import ArtifactWriter
+from metagpt.utils.empathy_map_renderer import (
+    EmpathyMapRenderer,
+    load_font,
+    parse_empathy_map,
+    render_png,
+)
+
+EMPATHY_MAP = {"Thoughts": "too slow\n", "Feelings": "frustrated\n", "Pain Points": "queues\n", "Goals": "speed\n"}
+
+
+def test_parse_empathy_map_markdown():
+    text = "Thoughts:\n- too slow\n- pricey\nGoals:\n- speed\n"
+    assert parse_empathy_map(text) == {"Thoughts": "too slow\npricey\n", "Goals": "speed\n"}
+
+
+def test_parse_empathy_map_json():
+    text = '[CONTENT]{"Empathy Map": {"Thoughts": ["too slow", "pricey"], "Goals": "speed"}}[/CONTENT]'
+    assert parse_empathy_map(text) == {"Thoughts": "too slow\npricey\n", "Goals": "speed\n"}
+
+
+def test_font_is_cached():
+    assert load_font() is load_font()
+
+
+def test_render_png():
+    assert render_png(EMPATHY_MAP).startswith(b"\x89PNG")
+    assert render_png({}).startswith(b"\x89PNG")  # missing sections are left empty
+
+
+@pytest.mark.asyncio
+async def test_renderer_skips_unchanged_maps(tmp_path):
+    writer = ArtifactWriter()
+    renderer = EmpathyMapRenderer(("png", "svg"), max_workers=1, writer=writer)
+    try:
+        renderer.render(EMPATHY_MAP, tmp_path / "empathy_map.png")
+        await writer.flush()
+        png, svg = tmp_path / "empathy_map.png", tmp_path / "empathy_map.svg"
+        assert png.read_bytes().startswith(b"\x89PNG")
+        assert "<svg" in svg.read_text() and "frustrated" in svg.read_text()
+
+        mtime = png.stat().st_mtime_ns
+        renderer.render(dict(EMPATHY_MAP), tmp_path / "empathy_map.png")
+        await writer.flush()
+        assert png.stat().st_mtime_ns == mtime
+
+        renderer.render({**EMPATHY_MAP, "Goals": "calm\n"}, tmp_path / "empathy_map.png")
+        await writer.flush()
+        assert "calm" in svg.read_text()
+        assert png.stat().st_mtime_ns != mtime
+    finally:
+        renderer.shutdown()
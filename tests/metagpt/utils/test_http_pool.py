@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 13:10
+@File    : test_http_pool.py
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from metagpt.utils.http_pool import HTTPSessionPool
+
+
+@asynccontextmanager
+async def serve():
+    """Start a local http server, yielding its url and the set of client connections it has seen"""
+    peers = set()
+
+    async def handle(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}/", peers
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_session_is_shared_and_kept_alive():
+    pool = HTTPSessionPool(limit_per_host=1)
+    async with serve() as (url, peers):
+        assert pool.session() is pool.session()
+        for _ in range(3):
+            async with pool.session().get(url) as rsp:
+                assert await rsp.text() == "ok"
+        assert len(peers) == 1  # all requests reused one connection
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_and_close():
+    pool = HTTPSessionPool()
+    async with serve() as (url, peers):
+        await pool.warm_up([url, None])
+        assert len(peers) == 1
+        session = pool.session()
+        await pool.close()
+        assert session.closed
+        assert pool.session() is not session
+        await pool.close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 10:40
+@File    : test_llm_cache.py
+"""
+import time
+
+from metagpt.utils.llm_cache import LLMCache
+
+
+def _request(content="hello", temperature=0.3):
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": content}],
+        "temperature": temperature,
+        "max_tokens": 100,
+    }
+
+
+def test_make_key_is_content_addressed():
+    request = _request()
+    reordered = dict(reversed(list(request.items())))
+    assert LLMCache.make_key(request) == LLMCache.make_key(reordered)
+    assert LLMCache.make_key(request) != LLMCache.make_key(_request(temperature=0.5))
+    assert LLMCache.make_key(request) != LLMCache.make_key(_request(content="hi"))
+
+
+def test_get_set(tmp_path):
+    cache = LLMCache(tmp_path / "cache.db")
+    key = LLMCache.make_key(_request())
+    assert cache.get(key) is None
+    cache.set(key, "world", "gpt-3.5-turbo")
+    assert cache.get(key) == "world"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    reopened = LLMCache(tmp_path / "cache.db")
+    assert reopened.get(key) == "world"
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMCache(tmp_path / "cache.db", ttl=1)
+    key = LLMCache.make_key(_request())
+    cache.set(key, "world")
+    time.sleep(1.1)
+    assert cache.get(key) is None
+    assert cache.count() == 0
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    cache = LLMCache(tmp_path / "cache.db", max_entries=2)
+    keys = [LLMCache.make_key(_request(content=str(i))) for i in range(3)]
+    cache.set(keys[0], "0")
+    cache.set(keys[1], "1")
+    assert cache.get(keys[0]) == "0"  # keys[1] becomes the least recently used
+    cache.set(keys[2], "2")
+    assert cache.count() == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "0"
+
+
+def test_eviction_by_size(tmp_path):
+    cache = LLMCache(tmp_path / "cache.db", max_size=10)
+    keys = [LLMCache.make_key(_request(content=str(i))) for i in range(3)]
+    for key in keys:
+        cache.set(key, "x" * 4)
+    assert cache.count() == 2
+    assert cache.get(keys[0]) is None
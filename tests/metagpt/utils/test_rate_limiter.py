@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 11:50
+@File    : test_rate_limiter.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from metagpt.utils.rate_limiter import TokenBucket, TokenBucketLimiter
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(10, period=1)
+    assert bucket.wait_time(10) == 0
+    bucket.consume(10)
+    assert 0 < bucket.wait_time(5) <= 0.5
+    bucket.refund(10)
+    assert bucket.wait_time(10) == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_requests_per_period():
+    limiter = TokenBucketLimiter(rpm=5, period=0.5)
+    start = time.monotonic()
+    for _ in range(10):
+        await limiter.acquire()
+    # the first 5 go through immediately, the next 5 wait for the refill
+    assert time.monotonic() - start >= 0.45
+
+
+@pytest.mark.asyncio
+async def test_limiter_fifo_order():
+    limiter = TokenBucketLimiter(tpm=100, period=0.5)
+    await limiter.acquire(100)
+    order = []
+
+    async def call(idx, tokens):
+        await limiter.acquire(tokens)
+        order.append(idx)
+
+    tasks = [asyncio.create_task(call(0, 80))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call(1, 1)))
+    await asyncio.gather(*tasks)
+    assert order == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_limiter_refund():
+    limiter = TokenBucketLimiter(tpm=100, period=60)
+    await limiter.acquire(100)
+    limiter.refund(60)
+    start = time.monotonic()
+    await limiter.acquire(50)
+    assert time.monotonic() - start < 0.1
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 16:25
+@File    : test_single_flight.py
+"""
+import asyncio
+
+import pytest
+
+from metagpt.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_flight():
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    flight = SingleFlight()
+    results = await asyncio.gather(*[flight.do(k, lambda k=k: work(k)) for k in ["a", "a", "b", "a"]])
+    assert results == ["A", "A", "B", "A"]
+    assert calls == ["a", "b"]
+    assert (flight.hits, flight.misses) == (2, 2)
+    assert flight.in_flight() == 0
+
+    await flight.do("a", lambda: work("a"))
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    flight = SingleFlight()
+    results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+    assert all(isinstance(i, ValueError) for i in results)
+    assert flight.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    flight = SingleFlight()
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "done"
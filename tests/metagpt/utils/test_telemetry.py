@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 18:30
+@File    : test_telemetry.py
+"""
+import json
+
+import pytest
+
+from metagpt.utils import telemetry
+from metagpt.utils.telemetry import Telemetry
+
+
+@pytest.fixture()
+def sink(tmp_path, mocker):
+    sink = Telemetry(tmp_path / "calls.jsonl", tmp_path / "metagpt.prom")
+    mocker.patch.object(telemetry, "_telemetry", sink)
+    return sink
+
+
+class Interview:
+    @telemetry.traced("action")
+    async def run(self):
+        with telemetry.track("openai", "gpt-4") as call:
+            with telemetry.track("azure", "gpt-4"):  # nested calls share the record
+                telemetry.add_usage(10, 5, 0.01)
+                telemetry.note_retry()
+            call.time_to_first_token = 0.5
+
+
+class Researcher:
+    profile = "User Researcher"
+
+    @telemetry.traced("role")
+    async def run_actions(self):
+        await Interview().run()
+
+
+@pytest.mark.asyncio
+async def test_calls_are_attributed_and_exported(sink):
+    await Researcher().run_actions()
+    with telemetry.track("openai", "gpt-4") as call:
+        call.cache_hit = True
+
+    assert not sink.jsonl_path.exists()  # nothing is written while calls are being recorded
+    sink.flush()
+    records = [json.loads(i) for i in sink.jsonl_path.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["role"] == "User Researcher"
+    assert records[0]["action"] == "Interview"
+    assert records[0]["provider"] == "azure"
+    assert (records[0]["prompt_tokens"], records[0]["completion_tokens"], records[0]["retries"]) == (10, 5, 1)
+    assert records[1]["role"] == "" and records[1]["cache_hit"]
+
+    prom = sink.prometheus_path.read_text()
+    assert 'metagpt_llm_calls_total{role="User Researcher",action="Interview",provider="azure",model="gpt-4"} 1' in prom
+    assert "# TYPE metagpt_llm_cost_usd_total counter" in prom
+
+    summary = sink.summary()
+    assert "User Researcher" in summary and "Interview" in summary
+
+
+def test_errors_are_recorded(sink):
+    with pytest.raises(ValueError):
+        with telemetry.track("openai", "gpt-4"):
+            raise ValueError()
+    stats = next(iter(sink.stats.values()))
+    assert (stats.calls, stats.errors) == (1, 1)
+    assert telemetry.current_call() is None
+
+
+def test_records_are_flushed_during_the_run(tmp_path):
+    sink = Telemetry(tmp_path / "calls.jsonl", tmp_path / "metagpt.prom", flush_size=2, flush_interval=3600)
+    for _ in range(3):
+        sink.record(telemetry.CallRecord("role", "action", "openai", "gpt-4"))
+    sink._last_write.result()
+    assert len(sink.jsonl_path.read_text().splitlines()) == 2
+    assert 'model="gpt-4"} 2' in sink.prometheus_path.read_text()
+    assert len(sink._pending) == 1
+
+    sink.flush_interval = 0
+    sink.record(telemetry.CallRecord("role", "action", "openai", "gpt-4"))
+    sink._last_write.result()
+    assert len(sink.jsonl_path.read_text().splitlines()) == 4
+    assert 'model="gpt-4"} 4' in sink.prometheus_path.read_text()
@@ -1,11 +1,17 @@
+import io
+
 import pytest
 
 from metagpt.utils.text import (
     decode_unicode_escape,
+    fit_message,
     generate_prompt_chunk,
     reduce_message_length,
     split_paragraph,
+    split_text_by_tokens,
+    truncate_text,
 )
+from metagpt.utils.token_counter import count_string_tokens
 
 
 def _msgs():
@@ -49,6 +55,71 @@ def test_generate_prompt_chunk(text, prompt_template, model_name, system_text, r
     assert len(ret) == expected
 
 
+def _transcript(n):
+    return "".join(f"Interviewer: question {i}? Participant: answer {i}. It was fine.\n" for i in range(n))
+
+
+@pytest.mark.parametrize("max_token", [50, 200])
+def test_split_text_by_tokens(max_token):
+    text = _transcript(200)
+    chunks = list(split_text_by_tokens(text, "gpt-3.5-turbo", max_token))
+    assert "".join(chunks) == text
+    assert all(count_string_tokens(i, "gpt-3.5-turbo") <= max_token for i in chunks)
+    assert all(i.endswith("\n") for i in chunks[:-1])
+
+
+def test_split_text_by_tokens_cuts_sentences_and_multibyte_text():
+    text = "这是一个很长的句子。" * 200
+    chunks = list(split_text_by_tokens(text, "gpt-3.5-turbo", 64))
+    assert "".join(chunks) == text
+    assert all(i.endswith("。") for i in chunks[:-1])
+
+
+def test_split_text_by_tokens_overlap():
+    text = _transcript(100)
+    chunks = list(split_text_by_tokens(text, "gpt-3.5-turbo", 100, overlap=20))
+    assert len(chunks) > 1
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert prev[-20:] in cur
+
+
+def test_split_text_by_tokens_streams_file_objects():
+    text = _transcript(500)
+    chunks = list(split_text_by_tokens(io.StringIO(text), "gpt-3.5-turbo", 200, block_size=1000))
+    assert "".join(chunks) == text
+    assert all(count_string_tokens(i, "gpt-3.5-turbo") <= 200 for i in chunks)
+
+
+@pytest.mark.parametrize("strategy", ["head", "tail", "middle"])
+def test_truncate_text(strategy):
+    text = _transcript(300)
+    ret, tokens = truncate_text(text, "gpt-3.5-turbo", 500, strategy)
+    assert tokens == count_string_tokens(ret, "gpt-3.5-turbo")
+    assert 480 <= tokens <= 500
+    if strategy != "tail":
+        assert ret.startswith("Interviewer: question 0?")
+    if strategy != "head":
+        assert ret.endswith("answer 299. It was fine.\n")
+    if strategy == "middle":
+        assert "\n...\n" in ret
+
+
+def test_truncate_text_keeps_short_text():
+    assert truncate_text("Hello World.", "gpt-3.5-turbo", 100, "middle") == ("Hello World.", 3)
+
+
+def test_truncate_text_multibyte():
+    text = "这是一个很长的句子。" * 500
+    ret, tokens = truncate_text(text, "gpt-4", 101, "middle")
+    assert tokens <= 101
+    assert "\ufffd" not in ret
+
+
+def test_fit_message():
+    ret, tokens = fit_message(_transcript(1000), "gpt-3.5-turbo", "System", 1000)
+    assert tokens <= 4096 - count_string_tokens("System", "gpt-3.5-turbo") - 1000
+
+
 @pytest.mark.parametrize(
     "paragraph, sep, count, expected",
     [
@@ -7,7 +7,13 @@
 """
 import pytest
 
-from metagpt.utils.token_counter import count_message_tokens, count_string_tokens
+from metagpt.utils.token_counter import (
+    TOKENIZERS,
+    TokenizerRegistry,
+    count_message_tokens,
+    count_string_tokens,
+    count_string_tokens_batch,
+)
 
 
 def test_count_message_tokens():
@@ -67,3 +73,25 @@ def test_count_string_tokens_gpt_4():
 
     string = "Hello, world!"
     assert count_string_tokens(string, model_name="gpt-4-0314") == 4
+
+
+def test_count_string_tokens_is_cached():
+    TOKENIZERS.clear()
+    hits = TOKENIZERS.hits
+    string = "Hello, world!" * 10
+    assert count_string_tokens(string, "gpt-4") == count_string_tokens(string, "gpt-3.5-turbo")
+    assert TOKENIZERS.hits == hits + 1  # both models share the cl100k_base encoding
+
+
+def test_count_string_tokens_batch():
+    strings = ["Hello, world!", "", "Hello, world!" * 3, "Hi there!"]
+    assert count_string_tokens_batch(strings, "gpt-3.5-turbo") == [
+        count_string_tokens(i, "gpt-3.5-turbo") for i in strings
+    ]
+
+
+def test_cached_counts_are_bounded():
+    registry = TokenizerRegistry(max_cached_counts=2)
+    for i in ["a", "b", "c"]:
+        registry.count(i, "gpt-4")
+    assert len(registry._counts) == 2
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time    : 2026/10/17 21:40
+@File    : test_workspace.py
+"""
+import asyncio
+
+import pytest
+
+from metagpt.const import WORKSPACE_ROOT
+from metagpt.utils.workspace import get_workspace, use_workspace
+
+
+@pytest.mark.asyncio
+async def test_workspace_is_local_to_each_run(tmp_path):
+    async def peek():
+        return get_workspace()
+
+    async def run(name):
+        with use_workspace(tmp_path / name):
+            await asyncio.sleep(0.01)
+            inner = await asyncio.create_task(peek())
+            return get_workspace(), inner
+
+    results = await asyncio.gather(run("a"), run("b"))
+    assert results == [(tmp_path / "a", tmp_path / "a"), (tmp_path / "b", tmp_path / "b")]
+    assert get_workspace() == WORKSPACE_ROOT